@@ -26,13 +26,29 @@ def create_app(config_name=None):
     init_extensions(app)
     init_oauth(app)
 
+    # Configure the Gemini client once per worker and share models across requests
+    from google_ai import model_registry
+    model_registry.init_app(app)
+
+    from .utils.evaluation_cache import init_evaluation_cache
+    init_evaluation_cache(app)
+
+    from .utils.question_cache import init_question_cache
+    init_question_cache(app)
+
+    from .utils.query_counter import init_query_counter
+    init_query_counter(app)
+
+    from .utils.user_cache import init_user_cache
+    init_user_cache(app)
+
     if app.config['SQLALCHEMY_ECHO']:
         # Set up SQLAlchemy query logging
         logging.basicConfig()
         logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
     # Import models to ensure they are registered with SQLAlchemy
-    from .models import User, Quiz, Question, Answer, PageScan, PrepSession
+    from .models import User, Quiz, Question, Answer, PageScan, PrepSession, Job
 
     # Import auth_helpers here to avoid circular imports
     from . import auth_helpers
@@ -53,9 +69,14 @@ def create_app(config_name=None):
     from .language_practice import language_practice as language_practice_blueprint
     app.register_blueprint(language_practice_blueprint, url_prefix='/language-practice')
 
-    # Import and register the init-db command
-    from .cli import init_db_command
+    from .jobs import jobs as jobs_blueprint
+    app.register_blueprint(jobs_blueprint, url_prefix='/jobs')
+
+    # Import and register the CLI commands
+    from .cli import init_db_command, run_worker_command, repair_counters_command
     app.cli.add_command(init_db_command)
+    app.cli.add_command(run_worker_command)
+    app.cli.add_command(repair_counters_command)
 
     # Register error handlers
     register_error_handlers(app)
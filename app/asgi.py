@@ -0,0 +1,213 @@
+"""
+ASGI entry point with async streaming audio evaluation.
+
+The audio evaluation endpoints spend seconds streaming model output. Under WSGI every such
+request pins a worker for the whole stream. Here they run as coroutines on the event loop,
+so one process can hold hundreds of concurrent feedback streams. All other requests are
+passed through to the regular Flask app, which asgiref runs in a thread pool.
+
+Run with an ASGI-capable worker, for example:
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+"""
+import asyncio
+import io
+import json
+import sys
+import tempfile
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import request, current_app
+from flask_login import current_user
+
+from . import create_app, db
+from .language_practice.routes import generate_audio_evaluation_async as generate_language_evaluation_async
+from .models import Quiz
+from .quiz_session.routes import (generate_audio_evaluation_async as generate_quiz_evaluation_async,
+                                  validate_input, process_audio_file)
+
+DEFAULT_MAX_BODY_SIZE = 32 * 1024 * 1024
+BODY_SPOOL_SIZE = 1024 * 1024
+
+
+def _quiz_session_stream(question, audio_file_path, prep_session):
+    return generate_quiz_evaluation_async(question, question.quiz, audio_file_path, prep_session.user_id,
+                                          prep_session.id)
+
+
+def _language_practice_stream(question, audio_file_path, prep_session):
+    return generate_language_evaluation_async(question, db.session.get(Quiz, prep_session.quiz_id), audio_file_path,
+                                              prep_session)
+
+
+STREAMING_ROUTES = {
+    '/quiz-session/evaluate_audio': _quiz_session_stream,
+    '/language-practice/evaluate_audio': _language_practice_stream,
+}
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class StreamingEvaluationApp:
+    """ASGI application serving the streaming evaluation endpoints natively and everything else via Flask."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(self._serve_wsgi)
+        self.max_body_size = flask_app.config.get('MAX_CONTENT_LENGTH') or DEFAULT_MAX_BODY_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] in STREAMING_ROUTES:
+            await self.handle_evaluation(scope, receive, send, STREAMING_ROUTES[scope['path']])
+        else:
+            await self.wsgi_app(scope, receive, send)
+
+    def _serve_wsgi(self, environ, start_response):
+        # asgiref passes a BytesIO as wsgi.errors, which Flask's log handler cannot write text to
+        environ['wsgi.errors'] = sys.stderr
+        return self.flask_app(environ, start_response)
+
+    async def handle_evaluation(self, scope, receive, send, stream_factory):
+        try:
+            body = await self._read_body(receive)
+        except RequestTooLarge:
+            await self._send_json(send, 413, {'error': 'Request body too large'})
+            return
+
+        ctx = self.flask_app.request_context(build_environ(scope, body))
+        ctx.push()
+        try:
+            # The app's before_request hooks only touch request state, so they run on the event loop
+            # (they must run in the same thread as the teardown hooks that ctx.pop() calls)
+            early_response = self.flask_app.preprocess_request()
+            if early_response is not None:
+                await self._send_response(send, self.flask_app.make_response(early_response))
+                return
+
+            # Loading the user and the database rows and writing the upload block, so they run in
+            # worker threads (asyncio.to_thread copies the request context into the thread)
+            if not await asyncio.to_thread(lambda: current_user.is_authenticated):
+                await self._send_json(send, 401, {'error': 'Unauthorized'})
+                return
+
+            try:
+                stream = await asyncio.to_thread(_open_stream, stream_factory)
+            except Exception as e:
+                error_message = f"Error in evaluate_audio: {str(e)}"
+                current_app.logger.exception(error_message)
+                await self._send_json(send, 500, {'error': error_message})
+                return
+
+            # Streamed like a Flask response: after_request hooks see it before the body is sent
+            response = self.flask_app.process_response(
+                self.flask_app.response_class(content_type='text/plain; charset=utf-8'))
+            await self._send_start(send, response)
+            try:
+                async for chunk in stream:
+                    await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            except Exception as e:
+                current_app.logger.exception(f"Error while streaming evaluation: {str(e)}")
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            ctx.pop()
+            body.close()
+
+    async def _read_body(self, receive):
+        # Spool large bodies to disk so an upload only holds a bounded buffer in memory
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_SIZE)
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                body.close()
+                raise RequestTooLarge()
+            body.write(chunk)
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    @staticmethod
+    async def _send_start(send, response):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.headers.items()]
+        })
+
+    async def _send_response(self, send, response):
+        response = self.flask_app.process_response(response)
+        await self._send_start(send, response)
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    @staticmethod
+    async def _send_json(send, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def _open_stream(stream_factory):
+    """Validate the upload, store the audio and create the evaluation stream for the current request."""
+    audio_file = request.files.get('audio')
+    question_id = request.form.get('question_id')
+    session_id = request.form.get('session_id')
+
+    question, prep_session = validate_input(audio_file, question_id, session_id, current_user.id)
+
+    audio_file_path = process_audio_file(audio_file)
+    current_app.logger.info(f"Audio file processed: {audio_file_path}")
+
+    stream = stream_factory(question, audio_file_path, prep_session)
+    # Hand the connection back to the pool: an open session would hold it for the whole stream, and
+    # the pool size would cap the concurrent streams. The loaded rows stay readable once detached.
+    db.session.close()
+    return stream
+
+
+def build_environ(scope, body):
+    """Build a WSGI environ from an ASGI HTTP scope and the fully read request body (bytes or a file)."""
+    if isinstance(body, bytes):
+        body = io.BytesIO(body)
+    body.seek(0, io.SEEK_END)
+    content_length = body.tell()
+    body.seek(0)
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(content_length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(config_name=None):
+    return StreamingEvaluationApp(create_app(config_name))
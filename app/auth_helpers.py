@@ -1,10 +1,36 @@
-from flask import render_template, request, redirect, url_for, session
-from .extensions import login_manager
+from flask import render_template, request, redirect, url_for, session, current_app
+from sqlalchemy.orm import make_transient_to_detached
+from .extensions import login_manager, db
 from .models import User
+from .utils.user_cache import get_user_cache
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
+    # The signed session cookie already carries the identity stored at login
+    if current_app.config.get('USER_FROM_SESSION'):
+        data = session.get('user')
+        if data and data.get('id') == user_id:
+            return user_from_dict(data)
+
+    cache = get_user_cache()
+    if cache is not None:
+        data = cache.get(user_id)
+        if data is not None:
+            return user_from_dict(data)
+
+    user = db.session.get(User, user_id)
+    if user is not None and cache is not None:
+        cache.set(user_id, user.to_dict())
+    return user
+
+
+def user_from_dict(data):
+    """Attach a User built from a to_dict() snapshot to the session without querying the database."""
+    user = User(email=data['email'], first_name=data.get('first_name'), last_name=data.get('last_name'),
+                picture=data.get('picture'))
+    user.id = data['id']
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 @login_manager.unauthorized_handler
 def unauthorized():
@@ -24,4 +24,28 @@ def init_db_command():
             db_path = os.path.join(current_app.instance_path, db_path)
         click.echo(f"SQLite database location: {os.path.abspath(db_path)}")
     else:
-        click.echo(f"Database URI: {db_uri}")
\ No newline at end of file
+        click.echo(f"Database URI: {db_uri}")
+
+
+@click.command('run-worker')
+@click.option('--once', is_flag=True, help='Process all runnable jobs and exit.')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--lease', default=600, show_default=True, help='Seconds a claimed job stays locked to this worker.')
+@with_appcontext
+def run_worker_command(once, poll_interval, lease):
+    """Run the background job worker (question generation etc.)."""
+    from .jobs.queue import run_worker
+
+    processed = run_worker(poll_interval=poll_interval, lease_seconds=lease, once=once)
+    click.echo(f"Processed {processed} job(s)")
+
+@click.command('repair-counters')
+@with_appcontext
+def repair_counters_command():
+    """Recompute the denormalized quiz question and session progress counters."""
+    from .models import Quiz, PrepSession
+
+    quizzes = Quiz.repair_question_counts()
+    sessions = PrepSession.repair_answered_counts()
+    db.session.commit()
+    click.echo(f"Repaired counters of {quizzes} quiz(zes) and {sessions} session(s)")
@@ -0,0 +1,108 @@
+import hashlib
+import os
+
+from google_ai import generate_quiz_title
+from google_ai.image_preprocessing import processed_path_for
+
+from .queue import job_handler, enqueue, update_progress
+from .. import db
+from ..models import Question, Quiz
+
+GENERATE_QUESTIONS_JOB = 'generate_questions'
+
+
+@job_handler(GENERATE_QUESTIONS_JOB)
+def generate_questions_job(job, payload):
+    """
+    Generate questions for the uploaded page images of a quiz.
+
+    Payload:
+        quiz_id (str): The quiz the questions belong to.
+        image_paths (list): Paths of the uploaded page images.
+        generate_title (bool): Whether to generate a quiz title once the questions exist.
+
+    The page images are deleted once the questions are generated. A failed job keeps them, so
+    it can be retried.
+    """
+    from ..quiz.routes import generate_and_save_questions
+
+    quiz = Quiz.query.get(payload['quiz_id'])
+    if quiz is None:
+        raise RuntimeError(f"Quiz not found: {payload['quiz_id']}")
+
+    image_paths = payload.get('image_paths', [])
+    update_progress(job, 0, len(image_paths))
+
+    saved_ids = []
+
+    def questions_saved(ids):
+        # Commit each group so it can be shown (see jobs.events) while later pages are generated
+        saved_ids.extend(ids)
+        db.session.commit()
+
+    try:
+        created = generate_and_save_questions(
+            image_paths, quiz.id,
+            on_page_done=lambda done, total: update_progress(job, done, total),
+            on_questions_saved=questions_saved
+        )
+    except Exception:
+        # A retry regenerates every page, so drop what this attempt already committed
+        discard_questions(quiz.id, saved_ids)
+        raise
+
+    if payload.get('generate_title'):
+        quiz.title = generate_quiz_title(quiz.questions)
+
+    remove_page_images(image_paths)
+    return {'questions_created': created}
+
+
+def discard_questions(quiz_id, question_ids):
+    """Delete committed questions of a failed generation attempt and fix the quiz question count."""
+    db.session.rollback()
+    if not question_ids:
+        return
+    deleted = Question.query.filter(Question.id.in_(question_ids)).delete(synchronize_session=False)
+    Quiz.adjust_question_count(quiz_id, -deleted)
+    db.session.commit()
+
+
+def enqueue_question_generation(quiz_id, image_paths, user_id, generate_title=False):
+    """
+    Queue question generation for newly uploaded page images. The caller commits.
+
+    The idempotency key is built from the image contents, so submitting the same pages again
+    returns the existing job, and the images of the repeated upload are deleted.
+    """
+    idempotency_key = f"{GENERATE_QUESTIONS_JOB}:{quiz_id}:{images_digest(image_paths)}"
+    job = enqueue(
+        GENERATE_QUESTIONS_JOB,
+        {'quiz_id': quiz_id, 'image_paths': image_paths, 'generate_title': generate_title},
+        user_id=user_id,
+        quiz_id=quiz_id,
+        idempotency_key=idempotency_key
+    )
+    queued_paths = job.get_payload().get('image_paths', [])
+    remove_page_images([path for path in image_paths if path not in queued_paths])
+    return job
+
+
+def remove_page_images(image_paths):
+    """Delete uploaded page images and the preprocessed copies made from them."""
+    for path in image_paths:
+        for file_path in (path, processed_path_for(path)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+def images_digest(image_paths):
+    """Hash the contents of the given images, independent of their order."""
+    digests = []
+    for path in image_paths:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as image:
+            for block in iter(lambda: image.read(1 << 16), b''):
+                sha.update(block)
+        digests.append(sha.hexdigest())
+    return hashlib.sha256('|'.join(sorted(digests)).encode()).hexdigest()
@@ -0,0 +1,238 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, and_
+
+from .. import db
+from ..models import Job, JobStatus
+
+JOB_HANDLERS = {}
+
+DEFAULT_LEASE_SECONDS = 600
+RETRY_BACKOFF_SECONDS = 10
+
+
+def job_handler(job_type):
+    """
+    Register a function as the handler for a job type.
+
+    The handler is called with (job, payload) inside an app context. Whatever it returns is
+    stored as the job result. Changes still pending when it returns are committed together with
+    the job's success, and rolled back if it raises. Anything committed before that stays, and
+    update_progress commits the session, so a handler that may fail after reporting progress
+    must undo its committed work itself before re-raising (see generate_questions_job) for a
+    retry to be safe.
+    """
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue(job_type, payload, user_id=None, quiz_id=None, idempotency_key=None, max_attempts=3):
+    """
+    Add a job to the queue. The caller is responsible for committing the session.
+
+    If a job with the same idempotency key already exists it is returned instead of
+    creating a duplicate.
+    """
+    if idempotency_key:
+        existing = Job.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    job = Job(
+        type=job_type,
+        payload=json.dumps(payload),
+        user_id=user_id,
+        quiz_id=quiz_id,
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts,
+        status=JobStatus.QUEUED
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def claim_next(worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Atomically claim the oldest runnable job for this worker.
+
+    Runnable jobs are queued jobs whose retry delay has passed, and running jobs whose
+    worker lease has expired (the worker died mid-job). The claim is a compare-and-set on
+    (status, attempts), so concurrent workers never run the same attempt twice.
+
+    Returns:
+    Job or None: The claimed job, or None if nothing is runnable.
+    """
+    now = datetime.utcnow()
+    candidates = Job.query.filter(or_(
+        and_(Job.status == JobStatus.QUEUED, or_(Job.run_after.is_(None), Job.run_after <= now)),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_until < now)
+    )).order_by(Job.created_date).limit(10).all()
+
+    for job in candidates:
+        if job.attempts >= job.max_attempts:
+            _mark_failed(job, job.error or "Worker lease expired")
+            continue
+
+        if claim(job, worker_id, lease_seconds=lease_seconds):
+            return job
+
+    return None
+
+
+def claim(job, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Claim a job for this worker with a compare-and-set on its (status, attempts).
+
+    Returns:
+    bool: True if this worker got the job (it is then running and refreshed), False if another
+        worker claimed or finished it first.
+    """
+    now = datetime.utcnow()
+    claimed = Job.query.filter(
+        Job.id == job.id,
+        Job.status == job.status,
+        Job.attempts == job.attempts
+    ).update({
+        Job.status: JobStatus.RUNNING,
+        Job.attempts: job.attempts + 1,
+        Job.locked_by: worker_id,
+        Job.locked_until: now + timedelta(seconds=lease_seconds),
+        Job.started_date: now
+    }, synchronize_session=False)
+    db.session.commit()
+
+    if claimed:
+        db.session.refresh(job)
+    return bool(claimed)
+
+
+def run_inline(job):
+    """
+    Run a job in the current request instead of on a worker (RUN_JOBS_INLINE).
+
+    Only a queued job is run, and only after claiming it like a worker would, so a job returned
+    again for the same idempotency key, which already ran or is running, is left alone. With no
+    worker to pick up a retry, a failed attempt fails the job; it can be retried through the
+    retry endpoint.
+    """
+    if job.status != JobStatus.QUEUED:
+        return job
+    if not claim(job, f"inline:{socket.gethostname()}:{os.getpid()}"):
+        return db.session.get(Job, job.id)
+    return run_job(job, requeue_on_failure=False)
+
+
+def run_job(job, requeue_on_failure=True):
+    """
+    Run a claimed job through its handler and record the outcome.
+
+    Jobs that are not running (not claimed, or already finished) are left untouched. A failed
+    attempt is put back on the queue with a backoff while attempts remain, unless
+    requeue_on_failure is False.
+    """
+    if job.status != JobStatus.RUNNING:
+        current_app.logger.warning(f"Job {job.id} ({job.type}) is {job.status}, not running it")
+        return job
+
+    handler = JOB_HANDLERS.get(job.type)
+    job_id = job.id
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job type: {job.type}")
+
+        result = handler(job, job.get_payload())
+
+        job.status = JobStatus.SUCCEEDED
+        job.result = json.dumps(result) if result is not None else None
+        job.error = None
+        job.finished_date = datetime.utcnow()
+        job.locked_by = None
+        job.locked_until = None
+        db.session.commit()
+        current_app.logger.info(f"Job {job_id} ({job.type}) succeeded after {job.attempts} attempt(s)")
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        error_message = str(e)[:1000]
+        current_app.logger.error(f"Job {job_id} ({job.type}) failed on attempt {job.attempts}: {error_message}")
+
+        if requeue_on_failure and job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.error = error_message
+            job.run_after = datetime.utcnow() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+            job.locked_by = None
+            job.locked_until = None
+            db.session.commit()
+        else:
+            _mark_failed(job, error_message)
+
+    return job
+
+
+def retry(job):
+    """
+    Put a failed job back on the queue. Jobs that are not failed are left untouched,
+    so retrying is idempotent.
+    """
+    if job.status == JobStatus.FAILED:
+        job.status = JobStatus.QUEUED
+        job.attempts = 0
+        job.run_after = None
+        job.finished_date = None
+        job.progress_done = 0
+        db.session.commit()
+    return job
+
+
+def update_progress(job, done, total):
+    """
+    Persist handler progress so it can be polled while the job runs.
+
+    This commits the current session, including any pending changes of the handler.
+    """
+    Job.query.filter(Job.id == job.id).update({
+        Job.progress_done: done,
+        Job.progress_total: total
+    }, synchronize_session=False)
+    db.session.commit()
+    job.progress_done = done
+    job.progress_total = total
+
+
+def run_worker(poll_interval=2.0, lease_seconds=DEFAULT_LEASE_SECONDS, once=False):
+    """
+    Process jobs until interrupted. With once=True, drain runnable jobs and return.
+
+    Returns:
+    int: Number of jobs processed.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    current_app.logger.info(f"Job worker {worker_id} started")
+    processed = 0
+    while True:
+        job = claim_next(worker_id, lease_seconds=lease_seconds)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+
+def _mark_failed(job, error_message):
+    job.status = JobStatus.FAILED
+    job.error = error_message
+    job.finished_date = datetime.utcnow()
+    job.locked_by = None
+    job.locked_until = None
+    db.session.commit()
@@ -0,0 +1,138 @@
+import json
+import time
+
+from flask import jsonify, abort, current_app, request, Response, stream_with_context, url_for
+from flask_login import login_required, current_user
+
+from . import jobs
+from .queue import retry, run_inline
+from .. import db
+from ..models import Job, Question
+
+
+def get_owned_job_or_404(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        abort(403)
+    return job
+
+
+@jobs.route('/<job_id>')
+@login_required
+def status(job_id):
+    job = get_owned_job_or_404(job_id)
+    return jsonify(job.to_dict())
+
+
+@jobs.route('/<job_id>/progress')
+@login_required
+def progress(job_id):
+    job = get_owned_job_or_404(job_id)
+    return jsonify({
+        'id': job.id,
+        'status': job.status,
+        'done': job.progress_done,
+        'total': job.progress_total,
+        'percentage': job.progress_percentage,
+        'finished': job.is_finished,
+        'error': job.error
+    })
+
+
+@jobs.route('/<job_id>/retry', methods=['POST'])
+@login_required
+def retry_job(job_id):
+    job = get_owned_job_or_404(job_id)
+    retry(job)
+    if current_app.config['RUN_JOBS_INLINE']:
+        job = run_inline(job)
+    return jsonify(job.to_dict())
+
+
+@jobs.route('/<job_id>/events')
+@login_required
+def events(job_id):
+    """
+    Server-Sent Events stream of a job until it finishes.
+
+    Sends a progress event whenever the progress changes, a question event for every question
+    of the job's quiz as soon as it is committed, and a final done event. Question events carry
+    the question position as event id, so a reconnecting EventSource resumes after the last
+    question it received (Last-Event-ID); ?after=<position> skips questions already on the page.
+    """
+    job = get_owned_job_or_404(job_id)
+    after = request.headers.get('Last-Event-ID', type=int)
+    if after is None:
+        after = request.args.get('after', 0, type=int)
+    return Response(stream_with_context(job_events(job.id, job.quiz_id, after)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def job_events(job_id, quiz_id, after):
+    """Poll the job and its quiz questions, yielding SSE messages (see events)."""
+    config = current_app.config
+    poll_interval = config.get('JOB_EVENTS_POLL_INTERVAL', 1.0)
+    keepalive_seconds = config.get('JOB_EVENTS_KEEPALIVE_SECONDS', 15)
+    max_seconds = config.get('JOB_EVENTS_MAX_SECONDS', 300)
+
+    started = last_sent = time.monotonic()
+    last_progress = None
+    while True:
+        # Read the job first: every question committed before it finished is then visible below
+        job = db.session.get(Job, job_id)
+        if job is None:
+            yield sse_message('done', {'id': job_id, 'status': None, 'error': 'Job not found'})
+            return
+        progress = {
+            'id': job.id,
+            'status': job.status,
+            'done': job.progress_done,
+            'total': job.progress_total,
+            'percentage': job.progress_percentage
+        }
+        finished = job.is_finished
+        final = {'id': job.id, 'status': job.status, 'error': job.error, 'result': job.get_result()}
+
+        messages = []
+        if quiz_id is not None:
+            new_questions = Question.query.filter(Question.quiz_id == quiz_id, Question.position > after) \
+                .order_by(Question.position).all()
+            for question in new_questions:
+                after = question.position
+                messages.append(sse_message('question', {
+                    'id': question.id,
+                    'position': question.position,
+                    'question_text': question.question_text,
+                    'answer': question.answer,
+                    'difficulty_level': question.difficulty_level,
+                    'page_scan_id': question.page_scan_id,
+                    'edit_url': url_for('quiz.edit_question', quiz_id=quiz_id, question_id=question.id)
+                }, event_id=question.position))
+        if progress != last_progress:
+            last_progress = progress
+            messages.append(sse_message('progress', progress))
+
+        # End the read transaction and give the connection back while waiting
+        db.session.remove()
+
+        if messages:
+            last_sent = time.monotonic()
+            yield ''.join(messages)
+        if finished:
+            yield sse_message('done', final)
+            return
+        if time.monotonic() - started >= max_seconds:
+            # The browser reconnects with Last-Event-ID, this just frees the worker now and then
+            return
+        if time.monotonic() - last_sent >= keepalive_seconds:
+            last_sent = time.monotonic()
+            yield ': keep-alive\n\n'
+        time.sleep(poll_interval)
+
+
+def sse_message(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
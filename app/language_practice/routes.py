@@ -1,7 +1,11 @@
+import asyncio
 import html
+import json
 import os
 import re
-from google_ai.evaluate_language_audio_ssml import evaluate_language_audio_ssml
+from concurrent.futures import ThreadPoolExecutor
+from google_ai.evaluate_language_audio_ssml import evaluate_language_audio_ssml, evaluate_language_audio_ssml_stream
+from google_ai.ssml_segmenter import SSMLSegmenter
 from google_ai.tts import generate_speech_from_ssml
 from flask import current_app, jsonify, Response, stream_with_context, session, abort, send_file
 from flask import make_response
@@ -12,13 +16,18 @@ from flask_login import login_required
 from werkzeug.exceptions import NotFound
 
 from google_ai.evaluate_language_audio import evaluate_language_audio
+from google_ai.async_evaluation import evaluate_language_audio_async
+from google_ai.audio_preprocessing import empty_answer_feedback
+from google_ai.stream_parser import FeedbackStreamParser, JsonFieldStreamParser
+from google_ai.structured_output import LANGUAGE_SCORE_FIELDS, evaluation_from_value, parse_evaluation, \
+    structured_evaluation_enabled
 from . import language_practice
 from .. import db
 from ..language_utils import get_language_from_headers
 from ..models import Question, PrepSession, Answer
 from ..models import Quiz
-from ..quiz_session.routes import store_answer, extract_feedback_and_scores, validate_input, process_audio_file
-from ..utils import filter_feedback_stream
+from ..quiz_session.routes import store_answer, extract_feedback_and_scores, validate_input, process_audio_file, \
+    get_completion_report, evaluation_parser
 
 
 # from google_ai import evaluate_text_answer, evaluate_audio_answer
@@ -154,15 +163,12 @@ def complete(session_id):
         prep_session.status = 'completed'
         db.session.commit()
 
-    # Fetch all answers with their related questions, ordered by question position
-    answers = Answer.query.join(Question) \
-        .filter(Answer.prep_session_id == prep_session.id) \
-        .order_by(Question.position, Answer.id) \
-        .all()
+    report = get_completion_report(prep_session)
 
     response = make_response(render_template('language_practice/complete.html',
                                              session=prep_session,
-                                             answers=answers,
+                                             answers=report['answers'],
+                                             report=report,
                                              answered_questions_count=answered_questions_count,
                                              total_questions_count=total_questions_count))
     return response
@@ -185,16 +191,23 @@ def generate_evaluation(question, audio_file_path,  user_language, target_langua
 
 
 def generate_audio_evaluation(question, audio_file_path, prep_session):
-    full_response = ""
+    """
+    Streams the feedback part of the evaluation and stores the answer once the stream is done.
+    """
+    parser = evaluation_parser()
     quiz = Quiz.query.get(prep_session.quiz_id)
 
     try:
-        for chunk in generate_evaluation(question, audio_file_path, user_language=quiz.lng,
-                                         target_language=quiz.target_lng):
-            full_response += chunk
-            yield chunk
+        # A silent recording gets the "please repeat" feedback without a model call and is not stored
+        repeat_message = empty_answer_feedback(audio_file_path, quiz.lng)
+        if repeat_message:
+            yield html.escape(repeat_message)
+            return
+
+        yield from parser.parse(generate_evaluation(question, audio_file_path, user_language=quiz.lng,
+                                                    target_language=quiz.target_lng))
 
-        feedback, pronunciation, grammar, content = extract_lng_scores(full_response)
+        feedback, pronunciation, grammar, content = lng_scores_from_parser(parser)
         store_answer(prep_session.user_id, question.id, prep_session.id, os.path.basename(audio_file_path),
                      feedback,  pronunciation=pronunciation, grammar=grammar, content=content)
 
@@ -208,6 +221,32 @@ def generate_audio_evaluation(question, audio_file_path, prep_session):
                 current_app.logger.warning(f"Failed to delete audio file {audio_file_path}: {str(e)}")
 
 
+async def generate_audio_evaluation_async(question, quiz, audio_file_path, prep_session):
+    """
+    Async counterpart of generate_audio_evaluation, used by the ASGI entry point (app/asgi.py).
+
+    The caller loads the prep session's quiz, so the stream only uses the database to store the answer.
+    """
+    if not os.path.exists(audio_file_path):
+        yield html.escape(f"Error: Audio file not found: {audio_file_path}")
+        return
+
+    repeat_message = await asyncio.to_thread(empty_answer_feedback, audio_file_path, quiz.lng)
+    if repeat_message:
+        yield html.escape(repeat_message)
+        return
+
+    parser = evaluation_parser()
+    async for text in parser.parse_async(evaluate_language_audio_async(quiz.lng, quiz.target_lng,
+                                                                       question.question_text, audio_file_path)):
+        yield text
+
+    feedback, pronunciation, grammar, content = lng_scores_from_parser(parser)
+    await asyncio.to_thread(store_answer, prep_session.user_id, question.id, prep_session.id,
+                            os.path.basename(audio_file_path), feedback,
+                            pronunciation=pronunciation, grammar=grammar, content=content)
+
+
 @language_practice.route('/evaluate_audio', methods=['POST'])
 @login_required
 def evaluate_audio():
@@ -223,8 +262,7 @@ def evaluate_audio():
         current_app.logger.info(f"Audio file processed: {audio_file_path}")
 
         eval_gen = generate_audio_evaluation(question, audio_file_path, prep_session)
-        filtered_gen = filter_feedback_stream(eval_gen)
-        return Response(stream_with_context(filtered_gen), content_type='text/plain')
+        return Response(stream_with_context(eval_gen), content_type='text/plain')
 
     except Exception as e:
         error_message = f"Error in evaluate_audio: {str(e)}"
@@ -260,20 +298,31 @@ def evaluate_audio_server():
         current_app.logger.info(f"Audio file processed: {audio_file_path}")
 
         quiz = Quiz.query.get(prep_session.quiz_id)
+        structured = structured_evaluation_enabled()
 
         ssml = evaluate_language_audio_ssml(
             user_language=quiz.lng,
             target_language=quiz.target_lng,
             prompt=question.question_text,
-            audio_file=audio_file_path
+            audio_file=audio_file_path,
+            structured=structured
         )
-        print(ssml)
 
-        # Strip SSML tags for plain text
-        plain_text = strip_ssml(ssml)
+        if structured:
+            # The SSML holds only the feedback, the scores are separate fields
+            evaluation = parse_evaluation(ssml, LANGUAGE_SCORE_FIELDS, feedback_field='ssml')
+            ssml = evaluation.feedback
+            plain_text = feedback = strip_ssml(ssml)
+            pronunciation, grammar, content = (evaluation.scores[field] for field in LANGUAGE_SCORE_FIELDS)
+        else:
+            # Strip SSML tags for plain text
+            plain_text = strip_ssml(ssml)
+
+            # Extract feedback and scores from plain text
+            feedback, pronunciation, grammar, content = extract_lng_scores(plain_text)
 
-        # Extract feedback and scores from plain text
-        feedback, pronunciation, grammar, content = extract_lng_scores(plain_text)
+            # Clean the SSML before generating speech
+            ssml = remove_scoring_from_ssml(ssml)
 
         store_answer(
             user_id=current_user.id,
@@ -286,9 +335,7 @@ def evaluate_audio_server():
             content=content
         )
 
-        # Clean the SSML before generating speech
-        cleaned_ssml = remove_scoring_from_ssml(ssml)
-        mp3_file_path = generate_speech_from_ssml(cleaned_ssml)
+        mp3_file_path = generate_speech_from_ssml(ssml)
 
         return jsonify({
             'audio_file': mp3_file_path,
@@ -312,13 +359,103 @@ def evaluate_audio_server():
     #             current_app.logger.warning(f"Failed to delete audio file {audio_file_path}: {str(e)}")
 
 
+def generate_server_tts_evaluation(question, audio_file_path, prep_session, user_id):
+    """
+    Streams the SSML evaluation through text-to-speech as NDJSON lines.
+
+    The SSML is split into segments while it is generated, segments are synthesized
+    concurrently and emitted in order as {"type": "segment"} lines, followed by a single
+    {"type": "result"} line once the answer is stored.
+    """
+    app = current_app._get_current_object()
+    quiz = Quiz.query.get(prep_session.quiz_id)
+    structured = structured_evaluation_enabled()
+    parser = JsonFieldStreamParser('ssml') if structured else FeedbackStreamParser('###')
+    segmenter = SSMLSegmenter()
+    pending = []
+    next_index = 0
+
+    def synthesize(ssml):
+        with app.app_context():
+            return generate_speech_from_ssml(ssml)
+
+    def segment_line(index, ssml, mp3_file_path):
+        return json.dumps({'type': 'segment', 'index': index, 'audio_file': mp3_file_path,
+                           'text': strip_ssml(ssml)}) + '\n'
+
+    executor = ThreadPoolExecutor(max_workers=app.config.get('TTS_MAX_CONCURRENCY', 4))
+    try:
+        stream = evaluate_language_audio_ssml_stream(quiz.lng, quiz.target_lng, question.question_text,
+                                                     audio_file_path, structured=structured)
+        for text in parser.parse(stream):
+            for ssml in segmenter.feed(text):
+                pending.append((ssml, executor.submit(synthesize, ssml)))
+            # Emit finished segments without waiting on the ones behind them
+            while pending and pending[0][1].done():
+                ssml, future = pending.pop(0)
+                yield segment_line(next_index, ssml, future.result())
+                next_index += 1
+
+        for ssml in segmenter.finish():
+            pending.append((ssml, executor.submit(synthesize, ssml)))
+        for ssml, future in pending:
+            yield segment_line(next_index, ssml, future.result())
+            next_index += 1
+        pending = []
+
+        ssml, pronunciation, grammar, content = lng_scores_from_parser(parser)
+        feedback = strip_ssml(ssml)
+        store_answer(user_id, question.id, prep_session.id, os.path.basename(audio_file_path),
+                     feedback, pronunciation=pronunciation, grammar=grammar, content=content)
+
+        yield json.dumps({'type': 'result', 'feedback': feedback, 'pronunciation': pronunciation,
+                          'grammar': grammar, 'content': content}) + '\n'
+
+    except Exception as e:
+        error_message = f"Error in generate_server_tts_evaluation: {str(e)}"
+        current_app.logger.exception(error_message)
+        yield json.dumps({'type': 'error', 'error': error_message}) + '\n'
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+@language_practice.route('/evaluate_audio_server_stream', methods=['POST'])
+@login_required
+def evaluate_audio_server_stream():
+    try:
+        audio_file = request.files.get('audio')
+        question_id = request.form.get('question_id')
+        session_id = request.form.get('session_id')
+
+        question, prep_session = validate_input(audio_file, question_id, session_id, current_user.id)
+
+        audio_file_path = process_audio_file(audio_file)
+        current_app.logger.info(f"Audio file processed: {audio_file_path}")
+
+        eval_gen = generate_server_tts_evaluation(question, audio_file_path, prep_session, current_user.id)
+        return Response(stream_with_context(eval_gen), content_type='application/x-ndjson')
+
+    except Exception as e:
+        error_message = f"Error in evaluate_audio_server_stream: {str(e)}"
+        current_app.logger.exception(error_message)
+        return jsonify({'error': error_message}), 500
+
+
 def extract_lng_scores(plain_text):
     # Split the text into feedback and scores
     parts = plain_text.split('###')
     feedback = parts[0].strip()
 
-    # Extract scores using regex
     score_text = parts[1] if len(parts) > 1 else ""
+    pronunciation, grammar, content = parse_lng_scores(score_text)
+
+    return feedback, pronunciation, grammar, content
+
+
+def parse_lng_scores(score_text):
+    # Extract scores using regex
     pronunciation = grammar = content = 0
 
     pronunciation_match = re.search(r'Pronunciation:\s*(\d+)', score_text)
@@ -333,7 +470,23 @@ def extract_lng_scores(plain_text):
     if content_match:
         content = int(content_match.group(1))
 
-    return feedback, pronunciation, grammar, content
+    return pronunciation, grammar, content
+
+
+def lng_scores_from_parser(parser):
+    """
+    Same result as extract_lng_scores, taken from a parser that consumed the stream.
+
+    For a structured response scores the model did not give are None rather than 0.
+    """
+    if isinstance(parser, JsonFieldStreamParser):
+        evaluation = evaluation_from_value(parser.value, LANGUAGE_SCORE_FIELDS, parser.field, feedback=parser.feedback)
+        return (evaluation.feedback,) + tuple(evaluation.scores[field] for field in LANGUAGE_SCORE_FIELDS)
+
+    pronunciation, grammar, content = parse_lng_scores(parser.scores)
+    return parser.feedback.strip(), pronunciation, grammar, content
+
+
 @language_practice.route('/play-audio')
 def play_audio():
     audio_file = request.args.get('file')
@@ -1,4 +1,7 @@
 from .user import User
-from .models import Quiz, Question, Answer, PageScan, PrepSession
+from .models import Quiz, Question, Answer, AnsweredQuestion, PageScan, PrepSession
+from .job import Job, JobStatus
+from .cache import EvaluationCacheEntry, QuestionCacheEntry
 
-__all__ = ['User', 'Quiz', 'Question', 'Answer', 'PageScan', 'PrepSession']
\ No newline at end of file
+__all__ = ['User', 'Quiz', 'Question', 'Answer', 'AnsweredQuestion', 'PageScan', 'PrepSession', 'Job', 'JobStatus',
+           'EvaluationCacheEntry', 'QuestionCacheEntry']
\ No newline at end of file
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index, func
+
+from ..extensions import db
+
+
+class EvaluationCacheEntry(db.Model):
+    __tablename__ = 'evaluation_cache'
+
+    key = Column(String(64), primary_key=True)
+    value = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_date = Column(DateTime, default=func.now())
+    last_used_date = Column(DateTime, default=func.now(), index=True)
+    expires_date = Column(DateTime)
+
+class QuestionCacheEntry(db.Model):
+    """Questions generated for one page image, reused when the same page is uploaded again."""
+    __tablename__ = 'question_cache'
+
+    # SHA-256 of (prompt version, model name, image content SHA-256)
+    key = Column(String(64), primary_key=True)
+    content_sha256 = Column(String(64), nullable=False)
+    perceptual_hash = Column(String(16))
+    prompt_version = Column(String(32), nullable=False)
+    model_name = Column(String(100), nullable=False)
+    questions = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_date = Column(DateTime, default=func.now())
+    last_used_date = Column(DateTime, default=func.now(), index=True)
+
+    __table_args__ = (
+        Index('ix_question_cache_prompt_version_model_name', 'prompt_version', 'model_name'),
+    )
@@ -0,0 +1,73 @@
+import json
+import uuid
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, func
+
+from ..extensions import db
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(db.Model):
+    __tablename__ = 'job'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default=JobStatus.QUEUED)
+    payload = Column(Text)
+    result = Column(Text)
+    error = Column(String(1000))
+    user_id = Column(String(36), ForeignKey('user.id'))
+    quiz_id = Column(String(36), ForeignKey('quiz.id'))
+    idempotency_key = Column(String(255), unique=True)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime)
+    locked_by = Column(String(255))
+    locked_until = Column(DateTime)
+    created_date = Column(DateTime, default=func.now())
+    started_date = Column(DateTime)
+    finished_date = Column(DateTime)
+
+    def get_payload(self):
+        return json.loads(self.payload) if self.payload else {}
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    @property
+    def progress_percentage(self):
+        if not self.progress_total:
+            return 100 if self.status == JobStatus.SUCCEEDED else 0
+        return round(self.progress_done / self.progress_total * 100)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'quiz_id': self.quiz_id,
+            'progress': {
+                'done': self.progress_done,
+                'total': self.progress_total,
+                'percentage': self.progress_percentage
+            },
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'result': self.get_result(),
+            'created_date': self.created_date.isoformat() if self.created_date else None,
+            'started_date': self.started_date.isoformat() if self.started_date else None,
+            'finished_date': self.finished_date.isoformat() if self.finished_date else None
+        }
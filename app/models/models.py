@@ -1,7 +1,9 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, func, Integer, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, String, DateTime, ForeignKey, func, Integer, Index, select, update, insert, \
+    Enum as SQLAlchemyEnum
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import relationship
 
 from ..extensions import db
@@ -25,6 +27,8 @@ class Quiz(db.Model):
     lng = Column(String(50))
     target_lng = Column(String(50))  # New field for target language
     type = Column(String(20), nullable=False, default='QUESTIONS')
+    # Denormalized number of questions, NULL means unknown (see `flask repair-counters`)
+    question_count = Column(Integer, default=0)
 
     owner = relationship("User", back_populates="quizzes")
     questions = relationship("Question", back_populates="quiz")
@@ -38,6 +42,19 @@ class Quiz(db.Model):
         self.target_lng = target_lng
         self.type = type
 
+    @staticmethod
+    def adjust_question_count(quiz_id, delta):
+        """Add delta to the stored question count in the current transaction."""
+        db.session.execute(
+            update(Quiz).where(Quiz.id == quiz_id).values(question_count=Quiz.question_count + delta)
+        )
+
+    @staticmethod
+    def repair_question_counts():
+        """Recompute the stored question count of every quiz."""
+        live_count = select(func.count(Question.id)).where(Question.quiz_id == Quiz.id).scalar_subquery()
+        return db.session.execute(update(Quiz).values(question_count=live_count)).rowcount
+
 class Question(db.Model):
     __tablename__ = 'question'
 
@@ -52,6 +69,47 @@ class Question(db.Model):
     page_scan = relationship("PageScan", back_populates="questions")
     answers = relationship("Answer", back_populates="question")
 
+    __table_args__ = (
+        # Next-question lookup: quiz_id = ? ORDER BY position, id
+        Index('ix_question_quiz_id_position_id', 'quiz_id', 'position', 'id'),
+    )
+
+    @staticmethod
+    def bulk_create(quiz_id, questions):
+        """
+        Append questions to a quiz with a single executemany insert in the current transaction.
+
+        Ids and positions are assigned up front, so no ORM objects are created or flushed;
+        positions continue after the last positioned question of the quiz, in input order.
+        The stored question count of the quiz is adjusted in the same transaction.
+
+        Args:
+            quiz_id (str): The quiz the questions belong to.
+            questions (list): Dicts with question_text, answer, difficulty_level and page_scan_id.
+
+        Returns:
+            list: The ids of the inserted questions, in input order.
+        """
+        if not questions:
+            return []
+
+        last_position = db.session.execute(
+            select(func.max(Question.position)).where(Question.quiz_id == quiz_id)
+        ).scalar()
+        first_position = 1 if last_position is None else last_position + 1
+        rows = [{
+            'id': str(uuid.uuid4()),
+            'quiz_id': quiz_id,
+            'page_scan_id': question.get('page_scan_id'),
+            'question_text': question['question_text'],
+            'answer': question['answer'],
+            'difficulty_level': question.get('difficulty_level') or DifficultyLevel.MEDIUM.value,
+            'position': first_position + offset
+        } for offset, question in enumerate(questions)]
+        db.session.execute(Question.__table__.insert(), rows)
+        Quiz.adjust_question_count(quiz_id, len(rows))
+        return [row['id'] for row in rows]
+
 class Answer(db.Model):
     __tablename__ = 'answer'
 
@@ -75,6 +133,22 @@ class Answer(db.Model):
     question = db.relationship("Question", back_populates="answers")
     prep_session = db.relationship("PrepSession", back_populates="answers")
 
+    __table_args__ = (
+        # Answered questions of a session, also covers the distinct question count
+        Index('ix_answer_prep_session_id_question_id', 'prep_session_id', 'question_id'),
+    )
+
+class AnsweredQuestion(db.Model):
+    """
+    The questions of a prep session that have at least one answer. Unlike answer, which keeps
+    every attempt, (prep_session_id, question_id) is the primary key, so concurrent first answers
+    to a question cannot both be counted.
+    """
+    __tablename__ = 'answered_question'
+
+    prep_session_id = Column(String(36), ForeignKey('prep_session.id', ondelete='CASCADE'), primary_key=True)
+    question_id = Column(String(36), ForeignKey('question.id', ondelete='CASCADE'), primary_key=True)
+
 class PrepSession(db.Model):
     __tablename__ = 'prep_session'
 
@@ -86,29 +160,109 @@ class PrepSession(db.Model):
     status = db.Column(db.String(20))
     score = db.Column(db.Float)
     lng = db.Column(db.String(50))
-
+    # Denormalized number of distinct answered questions, NULL means unknown
+    answered_count = db.Column(db.Integer, default=0)
 
     user = db.relationship("User", back_populates="prep_sessions")
     quiz = db.relationship("Quiz", back_populates="prep_sessions")
     answers = db.relationship("Answer", back_populates="prep_session")
 
+    __table_args__ = (
+        # Resuming an in-progress session for a user and quiz
+        Index('ix_prep_session_user_id_quiz_id_status', 'user_id', 'quiz_id', 'status'),
+        # My sessions page, keyset pagination on (start_time, id)
+        Index('ix_prep_session_user_id_start_time_id', 'user_id', 'start_time', 'id'),
+    )
+
     def get_ordered_answers(self):
         return Answer.query.filter(Answer.prep_session_id == self.id).order_by(Answer.date).all()
 
+    def get_report_rows(self, offset=0, limit=None):
+        """
+        Answers of the session in the order of get_ordered_answers, joined to their question text.
+        Returns lightweight rows instead of ORM entities, so rendering never lazy-loads a Question.
+        """
+        query = db.session.query(
+            Answer.id,
+            Answer.question_id,
+            Question.question_text,
+            Answer.answer_text,
+            Answer.feedback,
+            Answer.correctness,
+            Answer.completeness,
+            Answer.pronunciation_score,
+            Answer.grammar_score,
+            Answer.content_score,
+            Answer.date
+        ).outerjoin(Question, Question.id == Answer.question_id) \
+            .filter(Answer.prep_session_id == self.id) \
+            .order_by(Answer.date, Answer.id) \
+            .offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
     def get_current_question(self):
-        answered_question_ids = [answer.question_id for answer in self.answers]
+        # Anti-join on ix_answer_prep_session_id_question_id, no Answer rows are loaded
+        answered = db.session.query(Answer.id).filter(
+            Answer.prep_session_id == self.id,
+            Answer.question_id == Question.id
+        ).exists()
         next_question = Question.query.filter(
             Question.quiz_id == self.quiz_id,
-            ~Question.id.in_(answered_question_ids)
+            ~answered
         ).order_by(Question.position, Question.id).first()
         return next_question
 
     def get_distinct_answered_questions_count(self):
+        if self.answered_count is not None:
+            return self.answered_count
         return db.session.query(func.count(func.distinct(Answer.question_id))).filter(Answer.prep_session_id == self.id).scalar()
 
     def get_total_quiz_questions_count(self):
+        if self.quiz is not None and self.quiz.question_count is not None:
+            return self.quiz.question_count
         return Question.query.filter_by(quiz_id=self.quiz_id).count()
 
+    @staticmethod
+    def record_answered_question(prep_session_id, question_id):
+        """
+        Count question_id as answered in the current transaction. Repeated answers to the same
+        question are not counted again: the answered_question row is inserted in a savepoint and
+        the counter only moves when that insert succeeds.
+
+        Returns:
+        bool: True if this is the first answer to the question in the session.
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.add(AnsweredQuestion(prep_session_id=prep_session_id, question_id=question_id))
+        except IntegrityError:
+            return False
+        db.session.execute(
+            update(PrepSession).where(PrepSession.id == prep_session_id)
+            .values(answered_count=PrepSession.answered_count + 1)
+        )
+        return True
+
+    @staticmethod
+    def repair_answered_counts():
+        """
+        Recompute the stored answered count of every prep session, after adding the
+        answered_question rows missing for answers stored without record_answered_question.
+        """
+        missing = select(Answer.prep_session_id, Answer.question_id).distinct() \
+            .join(PrepSession, PrepSession.id == Answer.prep_session_id) \
+            .join(Question, Question.id == Answer.question_id) \
+            .where(~select(AnsweredQuestion.prep_session_id).where(
+                AnsweredQuestion.prep_session_id == Answer.prep_session_id,
+                AnsweredQuestion.question_id == Answer.question_id
+            ).exists())
+        db.session.execute(insert(AnsweredQuestion).from_select(['prep_session_id', 'question_id'], missing))
+        live_count = select(func.count(func.distinct(Answer.question_id))) \
+            .where(Answer.prep_session_id == PrepSession.id).scalar_subquery()
+        return db.session.execute(update(PrepSession).values(answered_count=live_count)).rowcount
+
 class PageScan(db.Model):
     __tablename__ = 'page_scan'
 
@@ -116,6 +270,9 @@ class PageScan(db.Model):
     quiz_id = Column(String(36), ForeignKey('quiz.id'))
     page_position = Column(db.Integer)
     file_name = Column(String(255))
+    # Upload size of the page as received and after image preprocessing, in bytes
+    original_bytes = Column(db.Integer)
+    processed_bytes = Column(db.Integer)
     created_date = Column(DateTime, default=func.now())
 
     quiz = relationship("Quiz", back_populates="page_scans")
@@ -6,6 +6,7 @@ from sqlalchemy import Column, String
 from sqlalchemy.orm import relationship
 
 from ..extensions import db
+from ..utils.user_cache import invalidate_cached_user
 
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
@@ -45,6 +46,7 @@ class User(UserMixin, db.Model):
             user = User.create(email, first_name, last_name, picture)
         else:
             user.update(first_name, last_name, picture)
+        invalidate_cached_user(user.id)
         return user
 
     def update(self, first_name=None, last_name=None, picture=None):
@@ -55,6 +57,7 @@ class User(UserMixin, db.Model):
         if picture is not None:
             self.picture = picture
         db.session.commit()
+        invalidate_cached_user(self.id)
         logging.info(f"Updated user information for email: {self.email}")
 
     def to_dict(self):
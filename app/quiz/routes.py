@@ -1,13 +1,22 @@
 from flask import render_template, redirect, url_for, flash, request, abort, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+from sqlalchemy import and_, func, or_, select
+from datetime import datetime
 import os
+import uuid
 
 from . import quiz
 from .forms import CreateQuizForm, EditQuizForm, QuestionForm
 from .. import db
-from ..models import Quiz, Question, PageScan, PrepSession
-from google_ai import generate_questions , generate_quiz_title # Updated import statement
+from ..models import Quiz, Question, PageScan, PrepSession, Job, Answer
+from ..jobs.handlers import enqueue_question_generation
+from ..jobs.queue import run_inline
+from ..utils.question_cache import fingerprint_page, get_question_cache
+from google_ai import generate_questions_timed
+from google_ai.config import DEFAULT_PRO_MODEL
+from google_ai.question_generator import PROMPT_VERSION as QUESTION_PROMPT_VERSION
+from google_ai.image_preprocessing import preprocess_page_images
 from flask import jsonify
 
 
@@ -45,25 +54,53 @@ def dispatch(quiz_id):
 
 
 
+MY_SESSIONS_PAGE_SIZE = 50
+
+
 @quiz.route('/my-sessions')
 @login_required
 def my_sessions():
-    # Fetch all prep sessions for the current user
-    prep_sessions = PrepSession.query.filter_by(user_id=current_user.id).order_by(PrepSession.start_time.desc()).all()
+    # One query for the page: sessions joined to quiz titles with their progress counters.
+    # Pagination is keyset based on (start_time, id), passed as ?before=<cursor>
+    answered = func.coalesce(
+        PrepSession.answered_count,
+        select(func.count(func.distinct(Answer.question_id)))
+        .where(Answer.prep_session_id == PrepSession.id).scalar_subquery()
+    )
+    total = func.coalesce(
+        Quiz.question_count,
+        select(func.count(Question.id)).where(Question.quiz_id == Quiz.id).scalar_subquery()
+    )
+    query = db.session.query(
+        PrepSession.id, PrepSession.quiz_id, PrepSession.start_time, PrepSession.status,
+        Quiz.title, answered.label('answered'), total.label('total')
+    ).join(Quiz, Quiz.id == PrepSession.quiz_id) \
+        .filter(PrepSession.user_id == current_user.id)
+
+    cursor = parse_session_cursor(request.args.get('before'))
+    if cursor:
+        start_time, session_id = cursor
+        query = query.filter(or_(PrepSession.start_time < start_time,
+                                 and_(PrepSession.start_time == start_time, PrepSession.id < session_id)))
+
+    rows = query.order_by(PrepSession.start_time.desc(), PrepSession.id.desc()) \
+        .limit(MY_SESSIONS_PAGE_SIZE + 1).all()
+    has_more = len(rows) > MY_SESSIONS_PAGE_SIZE
+    rows = rows[:MY_SESSIONS_PAGE_SIZE]
 
     # Prepare data for the template
     sessions_data = []
-    for session in prep_sessions:
-        total_questions = session.get_total_quiz_questions_count()
-        answered_questions = session.get_distinct_answered_questions_count()
+    for row in rows:
+        total_questions = row.total or 0
+        answered_questions = row.answered or 0
         progress_percentage = (answered_questions / total_questions) * 100 if total_questions > 0 else 0
 
         sessions_data.append({
-            'id': session.id,
-            'quiz_title': session.quiz.title,
-            'quiz_id': session.quiz_id,  # Add this line
-            'start_time': session.start_time,
-            'status': session.status,
+            'id': row.id,
+            'quiz_title': row.title,
+            'quiz_id': row.quiz_id,
+            'start_time': row.start_time,
+            'status': row.status,
             'progress': {
                 'answered': answered_questions,
                 'total': total_questions,
@@ -71,7 +108,24 @@ def my_sessions():
             }
         })
 
-    return render_template('quiz/my_sessions.html', sessions=sessions_data)
+    next_cursor = make_session_cursor(rows[-1]) if has_more else None
+    return render_template('quiz/my_sessions.html', sessions=sessions_data, next_cursor=next_cursor,
+                           is_first_page=cursor is None)
+
+
+def make_session_cursor(row):
+    return f"{row.start_time.isoformat()}|{row.id}"
+
+
+def parse_session_cursor(cursor):
+    """Parse a my_sessions cursor into (start_time, session_id), None if missing or malformed."""
+    if not cursor or '|' not in cursor:
+        return None
+    start_time, session_id = cursor.split('|', 1)
+    try:
+        return datetime.fromisoformat(start_time), session_id
+    except ValueError:
+        return None
 
 
 @quiz.route('/create', methods=['GET', 'POST'])
@@ -82,14 +136,18 @@ def create():
         try:
             quiz = save_quiz(form.title.data, form.lng.data, form.type.data, form.target_lng.data)
             uploaded_images = process_uploaded_images(form.images.data, quiz.id)
-            generate_and_save_questions(uploaded_images, quiz.id)
-            if not form.title.data:
-                generated_title = generate_quiz_title(quiz.questions)
-                quiz.title = generated_title
-
+            job = None
+            if uploaded_images:
+                job = enqueue_question_generation(quiz.id, uploaded_images, current_user.id,
+                                                  generate_title=not form.title.data)
             db.session.commit()
-            flash('Quiz created successfully!', 'success')
-            return redirect(url_for('quiz.edit', quiz_id=quiz.id))
+
+            if job and current_app.config['RUN_JOBS_INLINE']:
+                run_inline(job)
+
+            flash('Quiz created successfully! Questions are being generated.' if job
+                  else 'Quiz created successfully!', 'success')
+            return redirect(url_for('quiz.edit', quiz_id=quiz.id, job_id=job.id if job else None))
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error creating quiz: {str(e)}")
@@ -121,36 +179,25 @@ def edit(quiz_id):
         quiz.type = form.type.data
         quiz.target_lng = form.target_lng.data
 
-        uploaded_images = []
-        for image in form.images.data:
-            if image:
-                filename = secure_filename(image.filename)
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                image.save(filepath)
-                page_scan = PageScan(quiz_id=quiz.id, file_name=filename)
-                db.session.add(page_scan)
-                uploaded_images.append(filepath)
-
+        uploaded_images = process_uploaded_images(form.images.data, quiz.id)
+        job = None
+        if uploaded_images:
+            # Generate questions for new images
+            job = enqueue_question_generation(quiz.id, uploaded_images, current_user.id)
         db.session.commit()
 
-        # Generate questions for new images
-        if uploaded_images:
-            questions = generate_questions(uploaded_images)
-            for q in questions:
-                question = Question(
-                    quiz_id=quiz.id,
-                    question_text=q['question'],
-                    answer=q['answer'],
-                    difficulty_level=q['difficulty_level']
-                )
-                db.session.add(question)
-            db.session.commit()
+        if job and current_app.config['RUN_JOBS_INLINE']:
+            run_inline(job)
 
         flash('Quiz updated successfully!', 'success')
-        return redirect(url_for('quiz.edit', quiz_id=quiz.id))
+        return redirect(url_for('quiz.edit', quiz_id=quiz.id, job_id=job.id if job else None))
 
     questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.position, Question.id).all()
-    return render_template('quiz/edit.html', form=form, quiz=quiz, questions=questions)
+    job = None
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = Job.query.filter_by(id=job_id, quiz_id=quiz.id).first()
+    return render_template('quiz/edit.html', form=form, quiz=quiz, questions=questions, job=job)
 
 
 @quiz.route('/<quiz_id>/add_empty_question', methods=['POST'])
@@ -167,6 +214,7 @@ def add_empty_question(quiz_id):
         difficulty_level="medium"  # Default difficulty
     )
     db.session.add(new_question)
+    Quiz.adjust_question_count(quiz.id, 1)
     db.session.commit()
 
     return jsonify({'success': True, 'question_id': new_question.id})
@@ -193,7 +241,9 @@ def process_uploaded_images(images, quiz_id):
 
         for image in images:
             if image:
-                filename = secure_filename(image.filename)
+                # Unique per upload: a queued job reads the file later, when another upload of a
+                # page with the same name must not have replaced it
+                filename = f"{uuid.uuid4().hex[:12]}-{secure_filename(image.filename)}"
                 filepath = os.path.join(upload_folder, filename)
                 image.save(filepath)
 
@@ -206,33 +256,143 @@ def process_uploaded_images(images, quiz_id):
     except Exception as e:
         current_app.logger.error(f"Error processing uploaded images: {str(e)}")
         raise
-def generate_and_save_questions(uploaded_images, quiz_id):
+def generate_and_save_questions(uploaded_images, quiz_id, on_page_done=None, on_questions_saved=None):
     """
-    Generate questions from uploaded images and save them to the database.
+    Generate questions from uploaded images and insert them in the current transaction.
+
+    Cached pages are inserted first. Generated questions are inserted while the model output
+    streams in, a group at a time, so a caller that commits from on_questions_saved makes them
+    visible long before the last page is done.
 
     Args:
         uploaded_images (list): List of file paths for the uploaded images.
         quiz_id (str): The ID of the quiz these questions belong to.
+        on_page_done (callable, optional): Progress callback receiving (pages_done, pages_total).
+        on_questions_saved (callable, optional): Called with the ids of each inserted group of questions.
+
+    Returns:
+        int: The number of questions added.
 
     Raises:
         Exception: If there's an error generating questions or saving to the database.
     """
     try:
-        if uploaded_images:
-            questions = generate_questions(uploaded_images)
-            for q in questions:
-                question = Question(
-                    quiz_id=quiz_id,
-                    question_text=q['question'],
-                    answer=q['answer'],
-                    difficulty_level=q['difficulty_level']
-                )
-                db.session.add(question)
+        if not uploaded_images:
+            return 0
+
+        page_scans = page_scans_for(uploaded_images, quiz_id)
+        page_questions, fingerprints = cached_page_questions(uploaded_images)
+        missing = [index for index, questions in enumerate(page_questions) if questions is None]
+        created = 0
+
+        def save(page_scan_ids, questions):
+            nonlocal created
+            ids = Question.bulk_create(quiz_id, [{
+                'question_text': q['question'],
+                'answer': q['answer'],
+                'difficulty_level': q['difficulty_level'],
+                'page_scan_id': page_scan_id
+            } for page_scan_id, q in zip(page_scan_ids, questions)])
+            created += len(ids)
+            if on_questions_saved and ids:
+                on_questions_saved(ids)
+
+        def page_index(question):
+            # page_nr is the 1-based position of the source page in the generated subset
+            page_nr = question.get('page_nr')
+            return missing[page_nr - 1] if isinstance(page_nr, int) and 1 <= page_nr <= len(missing) else None
+
+        def page_scan_id(index):
+            page_scan = page_scans[index] if index is not None else None
+            return page_scan.id if page_scan else None
+
+        cached_pages = len(uploaded_images) - len(missing)
+        if cached_pages:
+            current_app.logger.info(f"Reusing cached questions for {cached_pages}/{len(uploaded_images)} "
+                                    f"pages of quiz {quiz_id}")
+            cached = [(page_scan_id(index), q) for index, questions in enumerate(page_questions)
+                      for q in questions or []]
+            save([scan_id for scan_id, _ in cached], [q for _, q in cached])
+            if on_page_done:
+                on_page_done(cached_pages, len(uploaded_images))
+
+        if missing:
+            page_images = prepare_page_images([uploaded_images[index] for index in missing],
+                                              [page_scans[index] for index in missing], quiz_id)
+            progress = (lambda done, total: on_page_done(cached_pages + done, len(uploaded_images))) \
+                if on_page_done else None
+            generated, _ = generate_questions_timed(
+                page_images, model_name=DEFAULT_PRO_MODEL, on_page_done=progress,
+                on_questions=lambda questions: save([page_scan_id(page_index(q)) for q in questions], questions)
+            )
+
+            question_cache = get_question_cache()
+            if question_cache is not None:
+                by_page = {}
+                for q in generated or []:
+                    by_page.setdefault(page_index(q), []).append(q)
+                for index in missing:
+                    if by_page.get(index):
+                        question_cache.set(fingerprints[index], DEFAULT_PRO_MODEL, QUESTION_PROMPT_VERSION,
+                                           by_page[index])
+
+        return created
     except Exception as e:
         current_app.logger.error(f"Error generating and saving questions: {str(e)}")
         raise
 
 
+def cached_page_questions(uploaded_images):
+    """
+    Look up each page in the generated question cache.
+
+    Returns:
+        tuple: The cached questions of each page (None for a miss) and the page fingerprints
+            (None when the cache is disabled).
+    """
+    question_cache = get_question_cache()
+    if question_cache is None:
+        return [None] * len(uploaded_images), None
+
+    fingerprints = [fingerprint_page(path, question_cache.perceptual) for path in uploaded_images]
+    page_questions = [question_cache.get(fingerprint, DEFAULT_PRO_MODEL, QUESTION_PROMPT_VERSION)
+                      for fingerprint in fingerprints]
+    return page_questions, fingerprints
+
+
+def page_scans_for(uploaded_images, quiz_id):
+    """
+    The PageScan row of each uploaded image, in the same order (None where there is no row).
+    """
+    file_names = [os.path.basename(path) for path in uploaded_images]
+    by_file_name = {page_scan.file_name: page_scan for page_scan in PageScan.query.filter(
+        PageScan.quiz_id == quiz_id, PageScan.file_name.in_(file_names))}
+    return [by_file_name.get(file_name) for file_name in file_names]
+
+
+def prepare_page_images(uploaded_images, page_scans, quiz_id):
+    """
+    Preprocess the page images for the model and record their before/after sizes on PageScan.
+
+    Returns:
+        list: The paths to send to the model, in the same order as uploaded_images.
+    """
+    if not current_app.config.get('PAGE_IMAGE_PREPROCESSING', True):
+        return uploaded_images
+
+    prepared_images = preprocess_page_images(uploaded_images)
+    for page_scan, image in zip(page_scans, prepared_images):
+        if page_scan is not None:
+            page_scan.original_bytes = image.original_size
+            page_scan.processed_bytes = image.size
+
+    original_total = sum(image.original_size for image in prepared_images)
+    processed_total = sum(image.size for image in prepared_images)
+    current_app.logger.info(f"Preprocessed {len(prepared_images)} page images for quiz {quiz_id}: "
+                            f"{original_total} -> {processed_total} bytes")
+    return [image.path for image in prepared_images]
+
+
 @quiz.route('/<quiz_id>/delete_question/<question_id>', methods=['POST'])
 @login_required
 def delete_question(quiz_id, question_id):
@@ -245,6 +405,7 @@ def delete_question(quiz_id, question_id):
         abort(400)
 
     db.session.delete(question)
+    Quiz.adjust_question_count(quiz.id, -1)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Question deleted successfully!'})
@@ -1,6 +1,6 @@
+import asyncio
 import html
 import os
-from datetime import datetime
 from typing import Optional
 
 from flask import current_app, jsonify, Response, stream_with_context, session
@@ -10,15 +10,22 @@ from flask import request
 from flask_login import current_user
 from flask_login import login_required
 from werkzeug.exceptions import NotFound
-from werkzeug.utils import secure_filename
 
-from google_ai import evaluate_text_answer, evaluate_audio_answer
+from google_ai import evaluate_text_answer, evaluate_audio_answer, DEFAULT_MODEL
+from google_ai.text_answer_evaluator import PROMPT_VERSION as TEXT_EVALUATION_PROMPT_VERSION
+from google_ai.text_answer_evaluator import STRUCTURED_PROMPT_VERSION as STRUCTURED_TEXT_EVALUATION_PROMPT_VERSION
+from google_ai.async_evaluation import evaluate_audio_answer_async
+from google_ai.audio_preprocessing import empty_answer_feedback
+from google_ai.stream_parser import FeedbackStreamParser, JsonFieldStreamParser
+from google_ai.structured_output import (TEXT_SCORE_FIELDS, Evaluation, evaluation_from_value, parse_evaluation,
+                                         structured_evaluation_enabled)
 from . import quiz_session
 from .. import db
 from ..language_utils import get_language_from_headers, get_language_code
 from ..models import Question, PrepSession, Answer
 from ..models import Quiz
-from ..utils import filter_feedback_stream
+from ..utils.audio_ingest import ingest_audio, DEFAULT_MAX_AUDIO_BYTES
+from ..utils.evaluation_cache import get_evaluation_cache, make_evaluation_key
 
 
 @quiz_session.route('/set-language', methods=['POST'])
@@ -140,29 +147,72 @@ def complete(session_id):
         prep_session.status = 'completed'
         db.session.commit()
 
-    # Fetch all answers with their related questions, ordered by question position
-    answers = Answer.query.join(Question) \
-        .filter(Answer.prep_session_id == prep_session.id) \
-        .order_by(Question.position, Answer.id) \
-        .all()
+    report = get_completion_report(prep_session)
 
     response = make_response(render_template('quiz_session/complete.html',
                                              session=prep_session,
-                                             answers=answers,
+                                             answers=report['answers'],
+                                             report=report,
                                              answered_questions_count=answered_questions_count,
                                              total_questions_count=total_questions_count))
     return response
 
 
+REPORT_PAGE_SIZE = 100
+REPORT_MAX_PAGE_SIZE = 500
+
+
+def get_completion_report(prep_session):
+    """
+    One page of the completion report, taken from the ?page= and ?per_page= request arguments.
+    Answer rows come from a single joined projection query (PrepSession.get_report_rows).
+    """
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', REPORT_PAGE_SIZE, type=int), 1), REPORT_MAX_PAGE_SIZE)
+    offset = (page - 1) * per_page
+
+    # Fetch one extra row to know whether there is a next page without a count query
+    rows = prep_session.get_report_rows(offset=offset, limit=per_page + 1)
+    return {
+        'answers': rows[:per_page],
+        'page': page,
+        'per_page': per_page,
+        'offset': offset,
+        'next_page': page + 1 if len(rows) > per_page else None,
+        'prev_page': page - 1 if page > 1 else None
+    }
+
+
+@quiz_session.route('/complete/<session_id>/report')
+@login_required
+def complete_report(session_id):
+    """JSON variant of the completion report, lets the client render large sessions page by page."""
+    prep_session = PrepSession.query.get_or_404(session_id)
+    if prep_session.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    report = get_completion_report(prep_session)
+    answers = []
+    for row in report['answers']:
+        answer = row._asdict()
+        answer['date'] = row.date.isoformat() if row.date else None
+        answers.append(answer)
+
+    return jsonify({
+        'session_id': prep_session.id,
+        'status': prep_session.status,
+        'answers': answers,
+        'page': report['page'],
+        'per_page': report['per_page'],
+        'next_page': report['next_page']
+    })
+
+
 def validate_input(audio_file, question_id, session_id, current_user_id):
     if not audio_file or not question_id or not session_id:
         raise RuntimeError("Missing required data: audio file, question ID, or session ID")
 
-    if len(audio_file.read()) == 0:
-        audio_file.seek(0)  # Reset file pointer
-        raise RuntimeError("Audio data is empty")
-
-    audio_file.seek(0)  # Reset file pointer
+    # Emptiness and size are checked while the upload is streamed to disk (process_audio_file)
 
     question = Question.query.get(question_id)
     if not question:
@@ -179,30 +229,18 @@ def validate_input(audio_file, question_id, session_id, current_user_id):
 
 
 def process_audio_file(audio_data):
-    original_filename = secure_filename(audio_data.filename)
-    # Get the file extension from the original filename
-    _, file_extension = os.path.splitext(original_filename)
-
-    # Create a timestamp with milliseconds
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-
-    # Create a new filename
-    new_filename = f"audio_{timestamp}{file_extension}"
-
-    # Get the UPLOAD_FOLDER from the app config
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-
-    # Ensure the upload folder exists
-    os.makedirs(upload_folder, exist_ok=True)
-
-    # Create the full path for the new file
-    audio_file_path = os.path.join(upload_folder, new_filename)
+    """
+    Stream the uploaded audio to UPLOAD_FOLDER in bounded chunks and return the stored path.
 
-    # Write the audio data to the file
-    audio_data.save(audio_file_path)
+    Raises:
+    AudioIngestError: If the upload is empty or exceeds MAX_AUDIO_UPLOAD_BYTES.
+    """
+    audio = ingest_audio(audio_data, current_app.config['UPLOAD_FOLDER'],
+                         max_bytes=current_app.config.get('MAX_AUDIO_UPLOAD_BYTES', DEFAULT_MAX_AUDIO_BYTES))
 
-    current_app.logger.info(f"Audio file created: {audio_file_path}")
-    return audio_file_path
+    current_app.logger.info(f"Audio file created: {audio.path} ({audio.size} bytes, "
+                            f"{audio.mime_type or 'unknown format'}, sha256 {audio.sha256[:12]})")
+    return audio.path
 
 
 def generate_evaluation(question, audio_file_path):
@@ -244,13 +282,24 @@ def extract_feedback_and_scores(full_response: str) -> tuple[str, float, float]:
         current_app.logger.warning("Response does not contain expected '####' separator")
         return "", 0.0, 0.0
 
-    feedback = parts[0].strip()
-    scores_part = parts[1].strip()
+    correctness, completeness = parse_scores(parts[1])
+    return parts[0].strip(), correctness, completeness
 
+
+def parse_scores(scores_part: str) -> tuple[float, float]:
+    """
+    Parses the correctness and completeness scores that follow the '####' separator.
+
+    Args:
+    scores_part (str): The response text after the separator.
+
+    Returns:
+    tuple: Contains correctness score (float) and completeness score (float).
+    """
     correctness = 0.0
     completeness = 0.0
 
-    for score in scores_part.split():
+    for score in scores_part.strip().split():
         key, _, value = score.lower().partition(':')
         if key == 'correctness':
             correctness = parse_score(value) or 0.0
@@ -259,18 +308,58 @@ def extract_feedback_and_scores(full_response: str) -> tuple[str, float, float]:
         else:
             current_app.logger.warning(f"Unknown score type: {key}")
 
-    return feedback, correctness, completeness
+    return correctness, completeness
+
+
+def evaluation_parser():
+    """The stream parser for the evaluator output, JSON in structured mode (STRUCTURED_EVALUATION)."""
+    if structured_evaluation_enabled():
+        return JsonFieldStreamParser('feedback')
+    return FeedbackStreamParser('###')
+
+
+def feedback_and_scores_from_parser(parser) -> tuple[str, Optional[float], Optional[float]]:
+    """
+    Same result as extract_feedback_and_scores, taken from a parser that consumed the stream.
+
+    For a structured response scores the model did not give are None rather than 0.
+    """
+    if isinstance(parser, JsonFieldStreamParser):
+        evaluation = evaluation_from_value(parser.value, TEXT_SCORE_FIELDS, feedback=parser.feedback)
+        return evaluation.feedback, evaluation.scores['correctness'], evaluation.scores['completeness']
+
+    if not parser.found:
+        current_app.logger.warning("Response does not contain expected '####' separator")
+        return "", 0.0, 0.0
+
+    # The model separates with '####', the parser splits on the first '###'
+    correctness, completeness = parse_scores(parser.scores.lstrip('#'))
+    return parser.feedback.strip(), correctness, completeness
+
+
+def format_text_evaluation(evaluation: Evaluation) -> str:
+    """A structured evaluation in the "<feedback>####<scores>" text shown by the text answer page."""
+    scores = '\n'.join(f"{field.capitalize()}:{'-' if score is None else f'{score:g}'}"
+                       for field, score in evaluation.scores.items())
+    return f"{evaluation.feedback}\n####\n{scores}"
 
 
 def generate_audio_evaluation(question, audio_file_path, user_id, prep_session_id):
-    full_response = ""
+    """
+    Streams the feedback part of the evaluation and stores the answer once the stream is done.
+    """
+    parser = evaluation_parser()
 
     try:
-        for chunk in generate_evaluation(question, audio_file_path):
-            full_response += chunk
-            yield chunk
+        # A silent recording gets the "please repeat" feedback without a model call and is not stored
+        repeat_message = empty_answer_feedback(audio_file_path, question.quiz.lng)
+        if repeat_message:
+            yield html.escape(repeat_message)
+            return
 
-        feedback, correctness, completeness = extract_feedback_and_scores(full_response)
+        yield from parser.parse(generate_evaluation(question, audio_file_path))
+
+        feedback, correctness, completeness = feedback_and_scores_from_parser(parser)
         store_answer(user_id, question.id, prep_session_id, os.path.basename(audio_file_path),
                      feedback, correctness, completeness)
 
@@ -284,6 +373,36 @@ def generate_audio_evaluation(question, audio_file_path, user_id, prep_session_i
                 current_app.logger.warning(f"Failed to delete audio file {audio_file_path}: {str(e)}")
 
 
+async def generate_audio_evaluation_async(question, quiz, audio_file_path, user_id, prep_session_id):
+    """
+    Async counterpart of generate_audio_evaluation, used by the ASGI entry point (app/asgi.py).
+
+    The caller loads the question's quiz, so the stream only uses the database to store the answer.
+    """
+    if not os.path.exists(audio_file_path):
+        yield html.escape(f"Error: Audio file not found: {audio_file_path}")
+        return
+
+    repeat_message = await asyncio.to_thread(empty_answer_feedback, audio_file_path, quiz.lng)
+    if repeat_message:
+        yield html.escape(repeat_message)
+        return
+
+    parser = evaluation_parser()
+    try:
+        async for text in parser.parse_async(
+                evaluate_audio_answer_async(question.question_text, question.answer, audio_file_path)):
+            yield text
+    except Exception as e:
+        error_message = html.escape(f"Error in generate_evaluation: {str(e)}")
+        current_app.logger.error(error_message)
+        yield error_message
+
+    feedback, correctness, completeness = feedback_and_scores_from_parser(parser)
+    await asyncio.to_thread(store_answer, user_id, question.id, prep_session_id,
+                            os.path.basename(audio_file_path), feedback, correctness, completeness)
+
+
 @quiz_session.route('/evaluate_audio', methods=['POST'])
 @login_required
 def evaluate_audio():
@@ -299,8 +418,7 @@ def evaluate_audio():
         current_app.logger.info(f"Audio file processed: {audio_file_path}")
 
         evaluation_gen = generate_audio_evaluation(question, audio_file_path, current_user.id, prep_session.id)
-        filtered_stream = filter_feedback_stream(evaluation_gen)
-        return Response(stream_with_context(filtered_stream), content_type='text/plain')
+        return Response(stream_with_context(evaluation_gen), content_type='text/plain')
 
     except Exception as e:
         error_message = f"Error in evaluate_audio: {str(e)}"
@@ -334,10 +452,26 @@ def evaluate_text():
         if not prep_session or prep_session.user_id != current_user.id:
             return jsonify({'error': 'Invalid session'}), 403
 
-        evaluation_result = evaluate_text_answer(question.question_text, question.answer, text)
+        structured = structured_evaluation_enabled()
+        prompt_version = STRUCTURED_TEXT_EVALUATION_PROMPT_VERSION if structured else TEXT_EVALUATION_PROMPT_VERSION
+
+        # Evaluations are deterministic (temperature 0), so identical answers can share a result
+        cache_key = make_evaluation_key(question.question_text, question.answer, text,
+                                        DEFAULT_MODEL, prompt_version)
+        evaluation_result = get_evaluation_cache().get_or_compute(
+            cache_key,
+            lambda: evaluate_text_answer(question.question_text, question.answer, text, model_name=DEFAULT_MODEL,
+                                         structured=structured)
+        )
 
         # Extract feedback and scores
-        feedback, correctness, completeness = extract_feedback_and_scores(evaluation_result)
+        if structured:
+            evaluation = parse_evaluation(evaluation_result, TEXT_SCORE_FIELDS)
+            feedback, correctness, completeness = (evaluation.feedback, evaluation.scores['correctness'],
+                                                   evaluation.scores['completeness'])
+            evaluation_result = format_text_evaluation(evaluation)
+        else:
+            feedback, correctness, completeness = extract_feedback_and_scores(evaluation_result)
 
         # Store the answer using the existing store_answer function
         store_answer(
@@ -381,6 +515,7 @@ def store_answer(user_id, question_id, prep_session_id, audio_file_name,
         content_score=content
 
     )
+    PrepSession.record_answered_question(prep_session_id, question_id)
     db.session.add(answer)
     db.session.commit()
     current_app.logger.info(f"Answer stored in database for user {user_id}, question {question_id}")
@@ -193,15 +193,11 @@ class AudioRecorder {
                     });
                 }
                 console.log("fetched");
-                if (this.useServerTTS) {
-                    return response.json();  // Expect JSON with MP3 file URL
-                } else {
-                    return response.body.getReader();  // For local TTS
-                }
+                return response.body.getReader();
             })
             .then(result => {
                 if (this.useServerTTS) {
-                    this.handleServerTTSResponse(result);
+                    return this.processServerTTSStream(result);  // NDJSON with MP3 segments
                 } else {
                     this.ttsStreamProcessor.processStreamResponse(result);
                 }
@@ -220,7 +216,68 @@ class AudioRecorder {
         ;
     }
 
-    handleServerTTSResponse(result) {
+    async processServerTTSStream(reader) {
+        const decoder = new TextDecoder();
+        let buffer = '';
+        this.audioQueue = [];
+        this.isPlayingSegment = false;
+        this.resultText.innerHTML = '';
+
+        while (true) {
+            const {done, value} = await reader.read();
+            if (value) {
+                buffer += decoder.decode(value, {stream: true});
+            }
+            let newline;
+            while ((newline = buffer.indexOf('\n')) !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    this.handleServerTTSMessage(JSON.parse(line));
+                }
+            }
+            if (done) {
+                break;
+            }
+        }
+        if (buffer.trim()) {
+            this.handleServerTTSMessage(JSON.parse(buffer));
+        }
+    }
+
+    handleServerTTSMessage(message) {
+        if (message.type === 'segment') {
+            this.processingFeedback.style.display = 'none';
+            // Model output: add it as text, never as markup
+            const segment = document.createElement('span');
+            segment.textContent = `${message.text} `;
+            this.resultText.appendChild(segment);
+            this.audioQueue.push('/play-audio?file=' + encodeURIComponent(message.audio_file));
+            if (!this.isPlayingSegment) {
+                this.playNextSegment();
+            }
+        } else if (message.type === 'result') {
+            this.handleServerTTSResponse(message, false);
+        } else if (message.type === 'error') {
+            this.handleServerTTSResponse(message);
+        }
+    }
+
+    playNextSegment() {
+        const audioPlayer = document.getElementById('audioPlayer');
+        const nextUrl = this.audioQueue.shift();
+        if (!nextUrl) {
+            this.isPlayingSegment = false;
+            return;
+        }
+        this.isPlayingSegment = true;
+        if (audioPlayer) {
+            audioPlayer.onended = () => this.playNextSegment();
+        }
+        this.playMp3(nextUrl);
+    }
+
+    handleServerTTSResponse(result, playAudio = true) {
         this.processingFeedback.style.display = 'none';
         this.log("got result:" + result)
         this.showNextQuestionButton();
@@ -243,8 +300,10 @@ class AudioRecorder {
                 </div>
             `;
             this.resultText.innerHTML += scoresHtml;
-            const mp3Url = '/play-audio?file=' + encodeURIComponent(result.audio_file);
-            this.playMp3(mp3Url);
+            if (playAudio) {
+                const mp3Url = '/play-audio?file=' + encodeURIComponent(result.audio_file);
+                this.playMp3(mp3Url);
+            }
         }
         this.recordButton.disabled = false;
     }
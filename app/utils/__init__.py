@@ -1,5 +1,5 @@
-from .feedback_filter import filter_feedback_stream
+from .feedback_filter import filter_feedback_stream, filter_feedback_stream_async
 from .init_auth import init_oauth, oauth
 
 
-__all__ = ['filter_feedback_stream', 'init_auth', 'oauth']
\ No newline at end of file
+__all__ = ['filter_feedback_stream', 'filter_feedback_stream_async', 'init_auth', 'oauth']
\ No newline at end of file
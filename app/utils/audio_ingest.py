@@ -0,0 +1,87 @@
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from werkzeug.utils import secure_filename
+
+from google_ai.audio_formats import SNIFF_BYTES, extension_for_mime, sniff_audio_mime
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
+
+class AudioIngestError(RuntimeError):
+    pass
+
+
+class IngestedAudio(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+    mime_type: Optional[str]
+
+
+def ingest_audio(file_storage, upload_folder: str, max_bytes: int = DEFAULT_MAX_AUDIO_BYTES,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> IngestedAudio:
+    """
+    Stream an uploaded audio file to upload_folder in a single pass.
+
+    The upload is copied in chunk_size pieces while its SHA-256, byte count and container
+    format are computed, so memory use stays at one chunk regardless of the upload size.
+
+    Args:
+    file_storage: The werkzeug FileStorage of the upload.
+    upload_folder (str): Directory to store the file in.
+    max_bytes (int): Uploads larger than this are rejected.
+    chunk_size (int): Read buffer size.
+
+    Returns:
+    IngestedAudio: Path, size, SHA-256 hex digest and sniffed MIME type (None if unknown).
+
+    Raises:
+    AudioIngestError: If the upload is empty or larger than max_bytes.
+    """
+    declared_length = file_storage.content_length
+    if declared_length and declared_length > max_bytes:
+        raise AudioIngestError(f"Audio file too large: {declared_length} bytes (limit {max_bytes})")
+
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    header = b''
+    size = 0
+
+    fd, part_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            stream = file_storage.stream
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AudioIngestError(f"Audio file too large: more than {max_bytes} bytes")
+                if len(header) < SNIFF_BYTES:
+                    header += chunk[:SNIFF_BYTES - len(header)]
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise AudioIngestError("Audio data is empty")
+
+        mime_type = sniff_audio_mime(header)
+        _, extension = os.path.splitext(secure_filename(file_storage.filename or ''))
+        # Create a timestamp with milliseconds
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        sha256 = digest.hexdigest()
+        new_filename = f"audio_{timestamp}_{sha256[:8]}{extension or extension_for_mime(mime_type)}"
+        path = os.path.join(upload_folder, new_filename)
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return IngestedAudio(path=path, size=size, sha256=sha256, mime_type=mime_type)
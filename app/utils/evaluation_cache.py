@@ -0,0 +1,237 @@
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+
+
+def normalize_answer(text: str) -> str:
+    """Normalize free text so trivially different answers share a cache entry."""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ' '.join(text.split())
+
+
+def make_evaluation_key(question: str, correct_answer: str, student_answer: str,
+                        model_name: str, prompt_version: str) -> str:
+    """
+    Build a content-addressed key for an answer evaluation.
+
+    Returns:
+    str: SHA-256 hex digest of the normalized inputs, model name and prompt version.
+    """
+    payload = json.dumps([
+        prompt_version,
+        model_name,
+        normalize_answer(question),
+        normalize_answer(correct_answer),
+        normalize_answer(student_answer)
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class EvaluationCache(ABC):
+    """
+    Base class for evaluation caches. Subclasses implement _get, _set and clear.
+
+    Values are strings (the raw model response). Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        self._set(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                'backend': type(self).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, value: str):
+        pass
+
+
+class NullEvaluationCache(EvaluationCache):
+    """Cache that never stores anything, used when caching is disabled."""
+
+    def clear(self):
+        pass
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+
+class MemoryEvaluationCache(EvaluationCache):
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600, max_size: int = 10000):
+        super().__init__(ttl_seconds, max_size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class SQLEvaluationCache(EvaluationCache):
+    """
+    Cache stored in the evaluation_cache table, shared by all workers.
+
+    Reads and writes use their own short transactions on the engine, independent of the
+    request's ORM session. Least recently used rows are evicted once the table grows past
+    max_size (checked every prune_interval writes).
+    """
+
+    def __init__(self, engine, ttl_seconds: int = 7 * 24 * 3600, max_size: int = 10000, prune_interval: int = 100):
+        super().__init__(ttl_seconds, max_size)
+        from ..models import EvaluationCacheEntry
+        self.engine = engine
+        self.table = EvaluationCacheEntry.__table__
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table))
+
+    def _get(self, key):
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            row = connection.execute(
+                select(self.table.c.value, self.table.c.expires_date).where(self.table.c.key == key)
+            ).first()
+            if row is None:
+                return None
+            if row.expires_date is not None and row.expires_date < now:
+                connection.execute(delete(self.table).where(self.table.c.key == key))
+                return None
+            connection.execute(update(self.table).where(self.table.c.key == key).values(
+                last_used_date=now, hit_count=self.table.c.hit_count + 1))
+            return row.value
+
+    def _set(self, key, value):
+        now = datetime.utcnow()
+        values = {
+            'value': value,
+            'last_used_date': now,
+            'expires_date': now + timedelta(seconds=self.ttl_seconds)
+        }
+        try:
+            with self.engine.begin() as connection:
+                updated = connection.execute(update(self.table).where(self.table.c.key == key).values(**values))
+                if not updated.rowcount:
+                    connection.execute(self.table.insert().values(key=key, created_date=now, hit_count=0, **values))
+        except IntegrityError:
+            # Another worker stored the same evaluation concurrently
+            pass
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_interval == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Remove expired rows and evict least recently used rows above max_size."""
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.expires_date < now))
+            count = connection.execute(select(func.count()).select_from(self.table)).scalar()
+            excess = count - self.max_size
+            if excess > 0:
+                oldest = select(self.table.c.key).order_by(self.table.c.last_used_date).limit(excess)
+                keys = [row.key for row in connection.execute(oldest)]
+                connection.execute(delete(self.table).where(self.table.c.key.in_(keys)))
+
+
+def init_evaluation_cache(app):
+    """Create the evaluation cache configured by EVALUATION_CACHE_BACKEND ('memory', 'sql' or 'none')."""
+    backend = app.config.get('EVALUATION_CACHE_BACKEND', 'memory')
+    ttl_seconds = app.config.get('EVALUATION_CACHE_TTL', 7 * 24 * 3600)
+    max_size = app.config.get('EVALUATION_CACHE_MAX_SIZE', 10000)
+
+    if backend == 'sql':
+        from ..extensions import db
+        with app.app_context():
+            engine = db.engine
+        cache = SQLEvaluationCache(engine, ttl_seconds=ttl_seconds, max_size=max_size)
+    elif backend == 'memory':
+        cache = MemoryEvaluationCache(ttl_seconds=ttl_seconds, max_size=max_size)
+    else:
+        cache = NullEvaluationCache()
+
+    app.extensions['evaluation_cache'] = cache
+    return cache
+
+
+def get_evaluation_cache() -> EvaluationCache:
+    return current_app.extensions['evaluation_cache']
@@ -1,4 +1,6 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+
+from google_ai.stream_parser import FeedbackStreamParser
 
 
 def filter_feedback_stream(stream: Generator[str, None, None]) -> Generator[str, None, None]:
@@ -12,25 +14,19 @@ def filter_feedback_stream(stream: Generator[str, None, None]) -> Generator[str,
     Yields:
     str: Filtered chunks of feedback.
     """
-    buffer = ""
-    for chunk in stream:
-        buffer += chunk
-        while buffer:
-            if '###' in buffer:
-                separator_index = buffer.index('###')
-                yield buffer[:separator_index]
-                # Consume the rest of the stream without yielding
-                for _ in stream:
-                    pass
-                return
-            elif buffer.endswith('#') or buffer.endswith('##'):
-                # Potential start of separator, keep in buffer
-                break
-            else:
-                # No potential separator, yield entire buffer
-                yield buffer
-                buffer = ""
-
-    # If we've reached here, '###' was never found
-    if buffer:
-        yield buffer
\ No newline at end of file
+    # The parser keeps consuming the stream after the separator without yielding
+    yield from FeedbackStreamParser('###').parse(stream)
+
+
+async def filter_feedback_stream_async(stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    """
+    Async counterpart of filter_feedback_stream.
+
+    Args:
+    stream (AsyncGenerator[str, None]): The original stream of feedback chunks.
+
+    Yields:
+    str: Filtered chunks of feedback.
+    """
+    async for chunk in FeedbackStreamParser('###').parse_async(stream):
+        yield chunk
\ No newline at end of file
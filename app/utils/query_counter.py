@@ -0,0 +1,149 @@
+"""
+Per-request SQL statement counting hooked into SQLAlchemy engine events.
+
+Every statement executed while a collector is active is counted, timed and grouped by its
+shape (the SQL text with whitespace and expanded IN lists collapsed). A shape that repeats
+many times within one request is the usual signature of an N+1 query pattern.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+_listeners_installed = False
+_install_lock = threading.Lock()
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so repeated executions with different parameters compare equal."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return _IN_LIST.sub('(?)', statement)
+
+
+class QueryStats:
+    """Statements executed while this collector was active."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: List[str] = []
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements.append(statement)
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def _collectors() -> List[QueryStats]:
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    return _local.collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors():
+        conn.info.setdefault('query_counter_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors()
+    if not collectors:
+        return
+    starts = conn.info.get('query_counter_start')
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+def install_listeners():
+    """Attach the counting listeners to every engine (idempotent)."""
+    global _listeners_installed
+    with _install_lock:
+        if not _listeners_installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listeners_installed = True
+
+
+@contextmanager
+def count_queries():
+    """Count the statements executed in this thread inside the block."""
+    install_listeners()
+    stats = QueryStats()
+    _collectors().append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors().remove(stats)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Fail with the offending statements when the block executes more than max_queries statements.
+
+    Usage in tests:
+        with assert_max_queries(5):
+            client.get('/quiz/my-sessions')
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = '\n'.join(f"  {i + 1}. {statement_shape(s)}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{listing}")
+
+
+def init_query_counter(app):
+    """
+    Count queries per request when QUERY_COUNTER_ENABLED is set.
+
+    Adds X-Query-Count and X-Query-Time-Ms response headers and logs a warning when a statement
+    shape repeats at least QUERY_COUNTER_N_PLUS_ONE_THRESHOLD times in one request.
+    """
+    if not app.config.get('QUERY_COUNTER_ENABLED'):
+        return
+    install_listeners()
+
+    @app.before_request
+    def start_query_counter():
+        stats = QueryStats()
+        _collectors().append(stats)
+        request.environ['query_counter.stats'] = stats
+
+    @app.after_request
+    def report_query_counter(response):
+        stats = request.environ.get('query_counter.stats')
+        if stats is None:
+            return response
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['X-Query-Time-Ms'] = f"{stats.duration * 1000:.1f}"
+
+        threshold = current_app.config.get('QUERY_COUNTER_N_PLUS_ONE_THRESHOLD', 5)
+        for shape, n in stats.repeated_shapes(threshold):
+            current_app.logger.warning(f"Possible N+1 in {request.method} {request.path}: "
+                                       f"statement executed {n} times: {shape}")
+        current_app.logger.debug(f"{request.method} {request.path}: {stats.count} queries "
+                                 f"in {stats.duration * 1000:.1f} ms")
+        return response
+
+    @app.teardown_request
+    def stop_query_counter(exc):
+        stats = request.environ.pop('query_counter.stats', None)
+        if stats is not None and stats in _collectors():
+            _collectors().remove(stats)
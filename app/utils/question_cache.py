@@ -0,0 +1,187 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from google_ai.image_preprocessing import hamming_distance, perceptual_hash
+from google_ai.uploads import file_sha256
+
+# Question fields that describe the question itself; page_nr depends on the upload
+CACHED_QUESTION_FIELDS = ('question', 'answer', 'difficulty_level')
+
+
+class PageFingerprint(NamedTuple):
+    sha256: str
+    perceptual_hash: Optional[str]
+
+
+def fingerprint_page(path: str, perceptual: bool = True) -> PageFingerprint:
+    """Content SHA-256 and, if requested, perceptual hash of a page image (None if it cannot be decoded)."""
+    phash = None
+    if perceptual:
+        try:
+            phash = perceptual_hash(path)
+        except (OSError, ValueError) as e:
+            current_app.logger.warning(f"Could not compute perceptual hash of {path}: {str(e)}")
+    return PageFingerprint(file_sha256(path), phash)
+
+
+def make_question_cache_key(content_sha256: str, model_name: str, prompt_version: str) -> str:
+    payload = json.dumps([prompt_version, model_name, content_sha256])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class QuestionCache:
+    """
+    Generated questions per page image, stored in the question_cache table and shared by all workers.
+
+    Entries are keyed by the image content SHA-256, the question prompt version and the model.
+    When there is no exact match, the entry with the nearest perceptual hash within
+    max_distance bits is used, so a re-photographed copy of a page also hits; the new image is
+    then stored as an exact alias of that entry. Perceptual candidates are compared in Python,
+    which is fine for the table sizes max_size allows. A negative max_distance disables
+    perceptual matching. Least recently used rows are evicted above max_size.
+    """
+
+    def __init__(self, engine, max_size: int = 20000, max_distance: int = 10, prune_interval: int = 100):
+        from ..models import QuestionCacheEntry
+        self.engine = engine
+        self.table = QuestionCacheEntry.__table__
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.prune_interval = prune_interval
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def perceptual(self) -> bool:
+        return self.max_distance >= 0
+
+    def get(self, fingerprint: PageFingerprint, model_name: str,
+            prompt_version: str) -> Optional[List[Dict[str, Any]]]:
+        """The cached questions of a page, or None on a miss. A cache error counts as a miss."""
+        key = make_question_cache_key(fingerprint.sha256, model_name, prompt_version)
+        now = datetime.utcnow()
+        try:
+            with self.engine.begin() as connection:
+                row = connection.execute(select(self.table.c.questions).where(self.table.c.key == key)).first()
+                matched_key = key if row is not None else None
+
+                if row is None and self.perceptual and fingerprint.perceptual_hash:
+                    matched_key, row = self._nearest(connection, fingerprint.perceptual_hash, model_name,
+                                                     prompt_version)
+
+                if row is not None:
+                    connection.execute(update(self.table).where(self.table.c.key == matched_key).values(
+                        last_used_date=now, hit_count=self.table.c.hit_count + 1))
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"Question cache lookup failed: {str(e)}")
+            row = None
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if matched_key != key:
+                self.perceptual_hits += 1
+        questions = json.loads(row.questions)
+        if matched_key != key:
+            self.set(fingerprint, model_name, prompt_version, questions)
+        return questions
+
+    def _nearest(self, connection, phash: str, model_name: str, prompt_version: str):
+        candidates = connection.execute(
+            select(self.table.c.key, self.table.c.perceptual_hash).where(
+                self.table.c.prompt_version == prompt_version,
+                self.table.c.model_name == model_name,
+                self.table.c.perceptual_hash.is_not(None))
+        ).all()
+        best_key, best_distance = None, None
+        for candidate in candidates:
+            distance = hamming_distance(phash, candidate.perceptual_hash)
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best_key, best_distance = candidate.key, distance
+        if best_key is None:
+            return None, None
+        row = connection.execute(select(self.table.c.questions).where(self.table.c.key == best_key)).first()
+        return best_key, row
+
+    def set(self, fingerprint: PageFingerprint, model_name: str, prompt_version: str,
+            questions: List[Dict[str, Any]]):
+        key = make_question_cache_key(fingerprint.sha256, model_name, prompt_version)
+        now = datetime.utcnow()
+        value = json.dumps([{field: question.get(field) for field in CACHED_QUESTION_FIELDS}
+                            for question in questions], ensure_ascii=False)
+        try:
+            with self.engine.begin() as connection:
+                updated = connection.execute(update(self.table).where(self.table.c.key == key).values(
+                    questions=value, last_used_date=now))
+                if not updated.rowcount:
+                    connection.execute(self.table.insert().values(
+                        key=key, content_sha256=fingerprint.sha256, perceptual_hash=fingerprint.perceptual_hash,
+                        prompt_version=prompt_version, model_name=model_name, questions=value, hit_count=0,
+                        created_date=now, last_used_date=now))
+        except IntegrityError:
+            # Another worker stored the same page concurrently
+            pass
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"Question cache write failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_interval == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Evict least recently used rows above max_size."""
+        with self.engine.begin() as connection:
+            count = connection.execute(select(func.count()).select_from(self.table)).scalar()
+            excess = count - self.max_size
+            if excess > 0:
+                oldest = select(self.table.c.key).order_by(self.table.c.last_used_date).limit(excess)
+                keys = [row.key for row in connection.execute(oldest)]
+                connection.execute(delete(self.table).where(self.table.c.key.in_(keys)))
+
+    def clear(self):
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'perceptual_hits': self.perceptual_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+def init_question_cache(app):
+    """Create the generated question cache, QUESTION_CACHE_ENABLED = false disables it."""
+    cache = None
+    if app.config.get('QUESTION_CACHE_ENABLED', True):
+        from ..extensions import db
+        with app.app_context():
+            engine = db.engine
+        cache = QuestionCache(engine, max_size=app.config.get('QUESTION_CACHE_MAX_SIZE', 20000),
+                              max_distance=app.config.get('QUESTION_CACHE_MAX_DISTANCE', 10))
+    app.extensions['question_cache'] = cache
+    return cache
+
+
+def get_question_cache() -> Optional[QuestionCache]:
+    return current_app.extensions.get('question_cache')
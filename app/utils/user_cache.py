@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from flask import current_app, has_app_context
+
+
+class UserIdentityCache:
+    """
+    Short-lived per-process cache of user identities for the Flask-Login user loader.
+
+    Stores plain to_dict() snapshots, never ORM instances, so entries are safe to share
+    between requests and threads. Entries are invalidated locally by User.update and
+    User.get_or_create; other worker processes see changes once the TTL expires.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_size: int = 10000):
+        self._cache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._cache.get(user_id)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def set(self, user_id: str, data: Dict[str, Any]):
+        with self._lock:
+            self._cache[user_id] = data
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+def init_user_cache(app):
+    """Create the user identity cache, USER_CACHE_TTL = 0 disables it."""
+    ttl_seconds = app.config.get('USER_CACHE_TTL', 60)
+    cache = UserIdentityCache(ttl_seconds=ttl_seconds, max_size=app.config.get('USER_CACHE_MAX_SIZE', 10000)) \
+        if ttl_seconds > 0 else None
+    app.extensions['user_cache'] = cache
+    return cache
+
+
+def get_user_cache() -> Optional[UserIdentityCache]:
+    return current_app.extensions.get('user_cache')
+
+
+def invalidate_cached_user(user_id: str):
+    if has_app_context():
+        cache = get_user_cache()
+        if cache is not None:
+            cache.invalidate(user_id)
@@ -0,0 +1,4 @@
+from app.asgi import create_asgi_app
+
+# Serve with an ASGI worker, e.g. gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+application = create_asgi_app()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Upload size and preprocessing time of recorded answers before and after normalization.
+
+Runs prepare_audio over every recording in a directory (tests/files/audio by default, real
+browser recordings: WebM/Opus despite their .wav names) and over synthetic 48 kHz stereo 16-bit
+WAV answers of several lengths. The real recordings are decoded, trimmed and re-encoded with
+ffmpeg (installed in the Docker image); without it they are reported unchanged.
+
+Usage:
+    python -m benchmarks.bench_audio_normalization [--dir tests/files/audio] [--seconds 5 15 60]
+        [--normalization auto|wav|opus]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from google_ai.audio_preprocessing import ffmpeg_available, prepare_audio
+
+
+def write_stereo_wav(path, seconds, sample_rate=48000):
+    """A speech-band test signal recorded as 48 kHz stereo 16-bit PCM."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 1800 * t)
+    pcm = (np.stack([signal, signal], axis=1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def measure(path, normalization):
+    start = time.perf_counter()
+    prepared = prepare_audio(path, normalization=normalization)
+    elapsed = time.perf_counter() - start
+    return prepared, elapsed
+
+
+def report(name, prepared, elapsed):
+    ratio = prepared.size / prepared.original_size
+    print(f"{name:<32} {prepared.mime_type:<11} {prepared.original_size:>10} {prepared.size:>10} "
+          f"{ratio:>7.1%} {elapsed * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join('tests', 'files', 'audio'))
+    parser.add_argument('--seconds', type=float, nargs='+', default=[5, 15, 60])
+    parser.add_argument('--normalization', default='auto', choices=['auto', 'wav', 'opus'])
+    args = parser.parse_args()
+
+    print(f"ffmpeg available: {ffmpeg_available()}, normalization: {args.normalization}")
+    print(f"{'recording':<32} {'mime':<11} {'original':>10} {'upload':>10} {'ratio':>7} {'prep ms':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_total = upload_total = 0
+        for filename in sorted(os.listdir(args.dir)):
+            path = os.path.join(tmp_dir, filename)
+            shutil.copy(os.path.join(args.dir, filename), path)
+            prepared, elapsed = measure(path, args.normalization)
+            report(filename, prepared, elapsed)
+            original_total += prepared.original_size
+            upload_total += prepared.size
+        print(f"{'all recordings':<32} {'':<11} {original_total:>10} {upload_total:>10} "
+              f"{upload_total / original_total:>7.1%}")
+
+        for seconds in args.seconds:
+            path = os.path.join(tmp_dir, f'synthetic_{seconds:g}s.wav')
+            write_stereo_wav(path, seconds=seconds)
+            report(f'synthetic {seconds:g}s 48k stereo', *measure(path, args.normalization))
+
+
+if __name__ == '__main__':
+    main()
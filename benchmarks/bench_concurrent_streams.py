@@ -0,0 +1,193 @@
+"""
+Compare concurrent feedback-stream capacity of POST /quiz-session/evaluate_audio served by Flask
+(WSGI) and by StreamingEvaluationApp (ASGI, app/asgi.py).
+
+Both runs go through the real route: login from the session cookie, multipart parsing, input
+validation, the upload written to UPLOAD_FOLDER, feedback parsing and the answer stored in the
+database (a SQLite file). Only Gemini is replaced, by a stream that emits CHUNKS chunks with a
+fixed delay between them, and the voice activity check is skipped, so the numbers show how many
+streams one process can hold rather than model latency. The WSGI server is modelled as a pool of
+blocking workers (gunicorn sync/gthread workers), the ASGI server as one event loop.
+
+Usage:
+    python -m benchmarks.bench_concurrent_streams [--streams 200] [--workers 4] [--chunks 20] [--delay 0.05]
+"""
+import argparse
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+from app import create_app, db
+from app.asgi import StreamingEvaluationApp
+from app.models import Answer, PrepSession, Question, Quiz, User
+from config import TestingConfig
+
+ROUTE = '/quiz-session/evaluate_audio'
+BOUNDARY = 'benchmark'
+FEEDBACK_CHUNK = "Your answer mentions light and water, which is good. "
+SCORES = "\n####\nCorrectness:7\nCompleteness:6"
+
+
+class ConcurrencyGauge:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def fake_model_stream(gauge, chunks, delay):
+    def evaluate_audio_answer(*args, **kwargs):
+        with gauge:
+            for _ in range(chunks):
+                time.sleep(delay)
+                yield FEEDBACK_CHUNK
+            yield SCORES
+    return evaluate_audio_answer
+
+
+def fake_model_stream_async(gauge, chunks, delay):
+    async def evaluate_audio_answer_async(*args, **kwargs):
+        with gauge:
+            for _ in range(chunks):
+                await asyncio.sleep(delay)
+                yield FEEDBACK_CHUNK
+            yield SCORES
+    return evaluate_audio_answer_async
+
+
+def setup_app(tmp_dir):
+    # The engine is created in create_app, and the in-memory default shares one connection between threads
+    with mock.patch.object(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"):
+        flask_app = create_app('testing')
+    flask_app.config.update(UPLOAD_FOLDER=tmp_dir, EVALUATION_CACHE_BACKEND='none')
+    with flask_app.app_context():
+        db.create_all()
+        user = User.create('learner@example.com', first_name='Ana')
+        quiz = Quiz('German', user.id, lng='en', target_lng='de', type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.flush()
+        question = Question(quiz_id=quiz.id, question_text='Wie geht es dir?', answer='Gut',
+                            difficulty_level='medium')
+        prep_session = PrepSession(user_id=user.id, quiz_id=quiz.id, status='in_progress')
+        db.session.add_all([question, prep_session])
+        db.session.commit()
+
+        serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        cookie = f"{flask_app.config['SESSION_COOKIE_NAME']}=" + serializer.dumps(
+            {'_user_id': user.id, '_fresh': True, 'user': user.to_dict()})
+        form = {'question_id': question.id, 'session_id': prep_session.id}
+    return flask_app, cookie, form
+
+
+def request_body(form):
+    _, body = encode_multipart(dict(form, audio=FileStorage(io.BytesIO(os.urandom(4096)), 'answer.webm')),
+                               boundary=BOUNDARY)
+    return body
+
+
+def run_wsgi(flask_app, cookie, form, streams, workers, chunks, delay):
+    gauge = ConcurrencyGauge()
+
+    def handle_request():
+        client = flask_app.test_client()
+        client.set_cookie(*cookie.split('=', 1))
+        response = client.post(ROUTE, data=request_body(form),
+                               content_type=f'multipart/form-data; boundary={BOUNDARY}')
+        return response.status_code, response.get_data()
+
+    start = time.perf_counter()
+    with mock.patch('app.quiz_session.routes.evaluate_audio_answer', fake_model_stream(gauge, chunks, delay)), \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda _: handle_request(), range(streams)))
+    return time.perf_counter() - start, gauge.peak, results
+
+
+def run_asgi(flask_app, cookie, form, streams, chunks, delay):
+    gauge = ConcurrencyGauge()
+    app = StreamingEvaluationApp(flask_app)
+
+    async def handle_request():
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': ROUTE, 'query_string': b'', 'root_path': '',
+            'http_version': '1.1', 'scheme': 'http', 'server': ('bench', 80), 'client': ('127.0.0.1', 1234),
+            'headers': [(b'content-type', f'multipart/form-data; boundary={BOUNDARY}'.encode()),
+                        (b'cookie', cookie.encode())]
+        }
+        messages = [{'type': 'http.request', 'body': request_body(form), 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+    async def main():
+        return await asyncio.gather(*(handle_request() for _ in range(streams)))
+
+    start = time.perf_counter()
+    with mock.patch('app.quiz_session.routes.evaluate_audio_answer_async',
+                    fake_model_stream_async(gauge, chunks, delay)):
+        results = asyncio.run(main())
+    return time.perf_counter() - start, gauge.peak, results
+
+
+def stored_answers(flask_app):
+    with flask_app.app_context():
+        count = Answer.query.count()
+        Answer.query.delete()
+        db.session.commit()
+    return count
+
+
+def report(name, seconds, peak, results, answers):
+    failed = sum(1 for status, _ in results if status != 200)
+    print(f"{name}: {seconds:7.2f}s total, peak concurrent streams {peak:>4}, "
+          f"{answers} answers stored, {failed} failed requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4, help='Blocking workers for the WSGI server')
+    parser.add_argument('--chunks', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.05, help='Seconds between model chunks')
+    args = parser.parse_args()
+
+    print(f"{args.streams} streams, {args.chunks} chunks each, {args.chunks * args.delay:.2f}s per stream")
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            mock.patch('app.quiz_session.routes.empty_answer_feedback', return_value=None):
+        flask_app, cookie, form = setup_app(tmp_dir)
+
+        wsgi_time, wsgi_peak, results = run_wsgi(flask_app, cookie, form, args.streams, args.workers,
+                                                 args.chunks, args.delay)
+        report(f"WSGI ({args.workers} workers)", wsgi_time, wsgi_peak, results, stored_answers(flask_app))
+
+        asgi_time, asgi_peak, results = run_asgi(flask_app, cookie, form, args.streams, args.chunks, args.delay)
+        report("ASGI (1 event loop)", asgi_time, asgi_peak, results, stored_answers(flask_app))
+
+    print(f"speedup: {wsgi_time / asgi_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency of PrepSession.get_current_question as the number of answers in a session grows.
+
+The previous implementation lazy-loaded every Answer of the session and sent their question
+ids back as a NOT IN (...) list. The current one is a single NOT EXISTS anti-join that never
+hydrates Answer rows.
+
+Requires the usual environment variables for the testing config (GOOGLE_CLIENT_ID,
+GOOGLE_CLIENT_SECRET, GEMINI_API_KEY, DB_URL); an in-memory SQLite database is used.
+
+Usage:
+    python -m benchmarks.bench_current_question [--answers 10 100 1000 5000] [--repeat 20]
+"""
+import argparse
+import time
+import uuid
+
+from app import create_app, db
+from app.models import Answer, PrepSession, Question, Quiz, User
+
+
+def legacy_current_question(prep_session):
+    answered_question_ids = [answer.question_id for answer in prep_session.answers]
+    return Question.query.filter(
+        Question.quiz_id == prep_session.quiz_id,
+        ~Question.id.in_(answered_question_ids)
+    ).order_by(Question.position, Question.id).first()
+
+
+def seed_session(user_id, answers):
+    """A quiz with answers + 10 questions and a session that answered the first `answers` of them."""
+    quiz = Quiz(f'Quiz {answers}', user_id, type='QUESTIONS')
+    db.session.add(quiz)
+    db.session.flush()
+
+    question_rows = [{'id': str(uuid.uuid4()), 'quiz_id': quiz.id, 'position': position,
+                      'question_text': f'Question {position}', 'answer': 'Answer', 'difficulty_level': 'medium'}
+                     for position in range(answers + 10)]
+    prep_session = PrepSession(user_id=user_id, quiz_id=quiz.id, status='in_progress')
+    db.session.add(prep_session)
+    db.session.flush()
+
+    db.session.execute(Question.__table__.insert(), question_rows)
+    db.session.execute(Answer.__table__.insert(), [
+        {'id': str(uuid.uuid4()), 'user_id': user_id, 'prep_session_id': prep_session.id,
+         'question_id': row['id'], 'answer_text': 'text'}
+        for row in question_rows[:answers]
+    ])
+    db.session.commit()
+    return prep_session.id
+
+
+def time_lookup(func, session_id, repeat):
+    total = 0.0
+    func(db.session.get(PrepSession, session_id))  # warm up the statement cache
+    for _ in range(repeat):
+        # Start from a clean identity map, like a new request would
+        db.session.expunge_all()
+        prep_session = db.session.get(PrepSession, session_id)
+        start = time.perf_counter()
+        func(prep_session)
+        total += time.perf_counter() - start
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--answers', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        print(f"{'answers':>8} {'legacy (ms)':>12} {'anti-join (ms)':>15} {'speedup':>8}")
+        for answers in args.answers:
+            session_id = seed_session(user_id, answers)
+            legacy = time_lookup(legacy_current_question, session_id, args.repeat)
+            new = time_lookup(PrepSession.get_current_question, session_id, args.repeat)
+            print(f"{answers:>8} {legacy:>12.2f} {new:>15.2f} {legacy / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
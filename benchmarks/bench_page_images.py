@@ -0,0 +1,74 @@
+"""
+Upload size, estimated image tokens and preprocessing time of page scans before and after
+google_ai.image_preprocessing.
+
+Tokens are estimated the way Gemini bills images (see estimate_image_tokens). Pages are processed
+inline, with the default pool threshold (PAGE_IMAGE_POOL_MIN_PIXELS, which keeps small uploads
+inline while the pool is not running), and twice forced through the process pool (the first pool
+run includes worker start-up).
+
+Usage:
+    python -m benchmarks.bench_page_images [--dir tests/files/images] [--max-side 1536] [--workers 4] \
+        [--pool-min-pixels 80000000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from google_ai.image_preprocessing import (DEFAULT_POOL_MIN_PIXELS, estimate_image_tokens, image_pixels,
+                                           preprocess_page_images)
+
+
+def run(paths, max_side, workers, pool_min_pixels=0):
+    start = time.perf_counter()
+    prepared = preprocess_page_images(paths, max_side=max_side, max_workers=workers,
+                                      pool_min_pixels=pool_min_pixels)
+    return prepared, time.perf_counter() - start
+
+
+def remove_processed(prepared):
+    for image in prepared:
+        if image.path != image.source_path:
+            os.remove(image.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join('tests', 'files', 'images'))
+    parser.add_argument('--max-side', type=int, default=1536)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--pool-min-pixels', type=int, default=DEFAULT_POOL_MIN_PIXELS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for filename in sorted(os.listdir(args.dir)):
+            paths.append(os.path.join(tmp_dir, filename))
+            shutil.copy(os.path.join(args.dir, filename), paths[-1])
+
+        prepared, inline_seconds = run(paths, args.max_side, 1)
+        print(f"{'page':<28} {'original':>10} {'upload':>10} {'ratio':>7} {'tokens':>7} {'after':>7}")
+        for image in prepared:
+            print(f"{os.path.basename(image.source_path):<28} {image.original_size:>10} {image.size:>10} "
+                  f"{image.size / image.original_size:>7.1%} {estimate_image_tokens(image.source_path):>7} "
+                  f"{estimate_image_tokens(image.path):>7}")
+
+        remove_processed(prepared)
+        timings = {}
+        for name, pool_min_pixels in (('default', args.pool_min_pixels), ('pool cold', 0), ('pool warm', 0)):
+            prepared, timings[name] = run(paths, args.max_side, args.workers, pool_min_pixels)
+            remove_processed(prepared)
+        megapixels = sum(image_pixels(path) for path in paths) / 1e6
+
+    print(f"\n{len(paths)} pages, {megapixels:.0f} MP: inline {inline_seconds:.2f}s, "
+          f"default (pool from {args.pool_min_pixels / 1e6:.0f} MP) {timings['default']:.2f}s, "
+          f"pool ({args.workers} workers, {os.cpu_count()} CPUs) cold {timings['pool cold']:.2f}s / "
+          f"warm {timings['pool warm']:.2f}s")
+    if (os.cpu_count() or 1) <= 1:
+        print("Only one CPU: the pool is never used, every run is inline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Calls, estimated input tokens and wall time of question generation, per page vs. batched.
+
+The model is simulated: each call sleeps for a fixed overhead plus a time per 1000 input tokens
+and returns one question per page, so the benchmark runs without an API key. Input tokens
+are estimated as in plan_batches: the instruction prompt plus the image tiles of every page.
+The fixture pages are preprocessed first, as they are before real question generation.
+
+Requires the usual environment variables for the testing config (GOOGLE_CLIENT_ID,
+GOOGLE_CLIENT_SECRET, GEMINI_API_KEY, DB_URL).
+
+Usage:
+    python -m benchmarks.bench_question_batching [--pages 2 6 20] [--batch-pages 5] [--call-overhead 1.0]
+        [--seconds-per-1k-tokens 0.05] [--time-scale 0.1]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from app import create_app
+from google_ai.image_preprocessing import estimate_image_tokens, preprocess_page_images
+from google_ai.question_generator import generate_questions_timed
+
+IMAGES_DIR = os.path.join('tests', 'files', 'images')
+
+
+class SimulatedModel:
+
+    def __init__(self, call_overhead, seconds_per_1k_tokens, time_scale):
+        self.call_overhead = call_overhead
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.time_scale = time_scale
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.tokens = 0
+
+    def __call__(self, prompt, file_paths, mime_type, model_name):
+        paths = file_paths if isinstance(file_paths, list) else [file_paths]
+        tokens = len(prompt) // 4 + sum(estimate_image_tokens(path) for path in paths)
+        with self.lock:
+            self.calls += 1
+            self.tokens += tokens
+        time.sleep((self.call_overhead + tokens / 1000 * self.seconds_per_1k_tokens) * self.time_scale)
+        return json.dumps([{'page_nr': position, 'question': f'Q{position}?', 'answer': 'A.',
+                            'difficulty_level': 'easy'} for position in range(1, len(paths) + 1)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[2, 6, 20])
+    parser.add_argument('--batch-pages', type=int, default=5)
+    parser.add_argument('--call-overhead', type=float, default=1.0, help='Seconds per call')
+    parser.add_argument('--seconds-per-1k-tokens', type=float, default=0.05)
+    parser.add_argument('--time-scale', type=float, default=0.1, help='Multiply simulated latency to run faster')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context(), tempfile.TemporaryDirectory() as tmp_dir:
+        sources = []
+        for filename in sorted(os.listdir(IMAGES_DIR)):
+            sources.append(os.path.join(tmp_dir, filename))
+            shutil.copy(os.path.join(IMAGES_DIR, filename), sources[-1])
+        pages = [image.path for image in preprocess_page_images(sources, max_workers=1)]
+
+        print(f"GEMINI_MAX_CONCURRENCY={app.config['GEMINI_MAX_CONCURRENCY']}, "
+              f"{estimate_image_tokens(pages[0])} image tokens per page")
+        print(f"{'pages':>5} {'mode':<10} {'calls':>6} {'input tokens':>13} {'simulated s':>12}")
+        for page_count in args.pages:
+            paths = [pages[index % len(pages)] for index in range(page_count)]
+            for mode, batch_pages in (('per page', 1), ('batched', args.batch_pages)):
+                model = SimulatedModel(args.call_overhead, args.seconds_per_1k_tokens, args.time_scale)
+                with mock.patch('google_ai.question_generator.execute_genai_operation', side_effect=model):
+                    start = time.perf_counter()
+                    generate_questions_timed(paths, max_pages_per_call=batch_pages)
+                    elapsed = (time.perf_counter() - start) / args.time_scale
+                print(f"{page_count:>5} {mode:<10} {model.calls:>6} {model.tokens:>13} {elapsed:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Time to store generated questions, one ORM Question per db.session.add vs. Question.bulk_create.
+
+The ORM path is what generate_and_save_questions did before: add one Question at a time,
+adjust the quiz question count and commit. The bulk path assigns ids and positions up front
+and writes all rows with a single executemany insert in the same transaction.
+
+Requires the usual environment variables for the testing config (GOOGLE_CLIENT_ID,
+GOOGLE_CLIENT_SECRET, GEMINI_API_KEY, DB_URL); rows are written to the DB_URL database,
+e.g. sqlite:// for in-memory SQLite.
+
+Usage:
+    python -m benchmarks.bench_question_insert [--questions 10 100 1000] [--repeat 5]
+"""
+import argparse
+import time
+
+from app import create_app, db
+from app.models import Question, Quiz, User
+
+
+def generated_questions(count):
+    return [{'question_text': f'Question {i}?', 'answer': f'Answer {i}', 'difficulty_level': 'medium'}
+            for i in range(count)]
+
+
+def orm_insert(quiz_id, rows):
+    for row in rows:
+        db.session.add(Question(quiz_id=quiz_id, **row))
+    Quiz.adjust_question_count(quiz_id, len(rows))
+    db.session.commit()
+
+
+def bulk_insert(quiz_id, rows):
+    Question.bulk_create(quiz_id, rows)
+    db.session.commit()
+
+
+def time_insert(insert, user_id, count, repeat):
+    total = 0.0
+    for _ in range(repeat):
+        quiz = Quiz(f'Quiz {count}', user_id, type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.commit()
+        quiz_id = quiz.id
+        rows = generated_questions(count)
+        db.session.expunge_all()
+
+        start = time.perf_counter()
+        insert(quiz_id, rows)
+        total += time.perf_counter() - start
+        db.session.expunge_all()
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        print(f"{'questions':>9} {'ORM add (ms)':>13} {'bulk (ms)':>10} {'speedup':>8}")
+        for count in args.questions:
+            orm = time_insert(orm_insert, user_id, count, args.repeat)
+            bulk = time_insert(bulk_insert, user_id, count, args.repeat)
+            print(f"{count:>9} {orm:>13.2f} {bulk:>10.2f} {orm / bulk:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Time to the first stored question and parser memory, whole responses vs. streamed question generation.
+
+The model is simulated: each call waits a fixed time to the first token, then produces its
+JSON answer at a fixed rate of output characters per second, so the benchmark runs without an
+API key. Without streaming a question is only available once the whole response of its batch
+has arrived; with on_questions it is handed over as soon as its object is complete.
+
+The second table compares peak memory (tracemalloc) of json.loads on a whole response with
+JsonArrayStreamParser fed the same response in 40 character chunks.
+
+Requires the usual environment variables for the testing config (GOOGLE_CLIENT_ID,
+GOOGLE_CLIENT_SECRET, GEMINI_API_KEY, DB_URL).
+
+Usage:
+    python -m benchmarks.bench_question_streaming [--pages 1 6] [--questions-per-page 8]
+        [--first-token 2.0] [--chars-per-second 400] [--time-scale 0.1] [--response-questions 1000 10000]
+"""
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+from unittest import mock
+
+from app import create_app
+from google_ai.stream_parser import JsonArrayStreamParser
+from google_ai.question_generator import generate_questions_timed
+
+CHUNK_SIZE = 40
+
+
+def response_text(pages, questions_per_page):
+    return json.dumps([{'page_nr': page, 'question': f'Question {number} about page {page}?',
+                        'answer': 'An answer of a typical length, one or two sentences long.',
+                        'difficulty_level': 'medium'}
+                       for page in range(1, pages + 1) for number in range(questions_per_page)])
+
+
+class SimulatedModel:
+
+    def __init__(self, questions_per_page, first_token, chars_per_second, time_scale):
+        self.questions_per_page = questions_per_page
+        self.first_token = first_token
+        self.chars_per_second = chars_per_second
+        self.time_scale = time_scale
+
+    def chunks(self, file_paths):
+        text = response_text(len(file_paths) if isinstance(file_paths, list) else 1, self.questions_per_page)
+        time.sleep(self.first_token * self.time_scale)
+        for start in range(0, len(text), CHUNK_SIZE):
+            time.sleep(CHUNK_SIZE / self.chars_per_second * self.time_scale)
+            yield text[start:start + CHUNK_SIZE]
+
+    def execute(self, prompt, file_paths, mime_type, model_name):
+        return ''.join(self.chunks(file_paths))
+
+    def stream(self, prompt, file_paths, mime_type, model_name):
+        yield from self.chunks(file_paths)
+
+
+def first_question_seconds(paths, model, streaming, time_scale):
+    first = {}
+    lock = threading.Lock()
+
+    def record(*_):
+        with lock:
+            first.setdefault('seconds', time.perf_counter() - start)
+
+    with mock.patch('google_ai.question_generator.execute_genai_operation', side_effect=model.execute), \
+            mock.patch('google_ai.question_generator.stream_genai_operation', side_effect=model.stream):
+        start = time.perf_counter()
+        if streaming:
+            generate_questions_timed(paths, on_questions=record)
+        else:
+            generate_questions_timed(paths, on_page_done=record)
+        total = time.perf_counter() - start
+    return first['seconds'] / time_scale, total / time_scale
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 6])
+    parser.add_argument('--questions-per-page', type=int, default=8)
+    parser.add_argument('--first-token', type=float, default=2.0, help='Seconds to the first output token')
+    parser.add_argument('--chars-per-second', type=float, default=400)
+    parser.add_argument('--time-scale', type=float, default=0.1, help='Multiply simulated latency to run faster')
+    parser.add_argument('--response-questions', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    model = SimulatedModel(args.questions_per_page, args.first_token, args.chars_per_second, args.time_scale)
+    with app.app_context():
+        print(f"{'pages':>5} {'mode':<9} {'first question s':>17} {'all s':>7}")
+        for page_count in args.pages:
+            paths = [f'page_{index}.jpg' for index in range(page_count)]
+            for mode, streaming in (('whole', False), ('streamed', True)):
+                first, total = first_question_seconds(paths, model, streaming, args.time_scale)
+                print(f"{page_count:>5} {mode:<9} {first:>17.2f} {total:>7.2f}")
+
+    print(f"\n{'questions':>9} {'response KB':>12} {'json.loads peak KB':>19} {'parser peak KB':>15}")
+    for count in args.response_questions:
+        text = response_text(1, count)
+        chunks = [text[start:start + CHUNK_SIZE] for start in range(0, len(text), CHUNK_SIZE)]
+        whole = peak_memory(lambda: len(json.loads(''.join(chunks))))
+        # Each question is consumed (stored) as it completes, as generate_and_save_questions does
+        streamed = peak_memory(lambda: sum(1 for _ in JsonArrayStreamParser().parse(iter(chunks))))
+        print(f"{count:>9} {len(text) / 1024:>12.0f} {whole / 1024:>19.0f} {streamed / 1024:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Time the session hot-path queries against a seeded SQLite database with and without the
+composite indexes from migration c41e7a9f2d68.
+
+Queries:
+    answered count  - count(distinct question_id) of a session's answers
+    next question   - first unanswered question of a quiz ordered by position, id
+    resume session  - in-progress session for (user_id, quiz_id)
+
+Usage:
+    python -m benchmarks.bench_session_indexes [--quizzes 200] [--questions 50] [--sessions 4000]
+                                               [--lookups 300] [--db /tmp/bench.sqlite]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, distinct, func, select
+
+from app.extensions import db
+from app.models import Answer, PrepSession, Question, Quiz, User
+
+INDEXES = [
+    index
+    for model in (Answer, Question, PrepSession)
+    for index in model.__table__.indexes
+    if len(index.columns) > 1
+]
+
+
+def seed(engine, quizzes, questions_per_quiz, sessions):
+    rng = random.Random(42)
+    users = [{'id': str(uuid.uuid4()), 'email': f'user{i}@example.com', 'first_name': f'User {i}'} for i in range(100)]
+    quiz_rows = [{'id': str(uuid.uuid4()), 'title': f'Quiz {i}', 'user_owner_id': users[i % len(users)]['id'],
+                  'type': 'QUESTIONS'} for i in range(quizzes)]
+    question_rows = []
+    questions_by_quiz = {}
+    for quiz in quiz_rows:
+        ids = []
+        for position in range(questions_per_quiz):
+            question_id = str(uuid.uuid4())
+            ids.append(question_id)
+            question_rows.append({'id': question_id, 'quiz_id': quiz['id'], 'position': position,
+                                  'question_text': f'Question {position}', 'answer': 'Answer',
+                                  'difficulty_level': 'medium'})
+        questions_by_quiz[quiz['id']] = ids
+
+    session_rows = []
+    answer_rows = []
+    for i in range(sessions):
+        quiz = rng.choice(quiz_rows)
+        session_id = str(uuid.uuid4())
+        session_rows.append({'id': session_id, 'user_id': rng.choice(users)['id'], 'quiz_id': quiz['id'],
+                             'status': rng.choice(['in_progress', 'completed'])})
+        answered = questions_by_quiz[quiz['id']][:rng.randint(0, questions_per_quiz)]
+        for question_id in answered:
+            answer_rows.append({'id': str(uuid.uuid4()), 'prep_session_id': session_id,
+                                'question_id': question_id, 'answer_text': 'text'})
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), users)
+        conn.execute(Quiz.__table__.insert(), quiz_rows)
+        conn.execute(Question.__table__.insert(), question_rows)
+        conn.execute(PrepSession.__table__.insert(), session_rows)
+        conn.execute(Answer.__table__.insert(), answer_rows)
+    return session_rows, len(question_rows), len(answer_rows)
+
+
+def hot_path_queries(session):
+    answered = select(Answer.question_id).where(Answer.prep_session_id == session['id'])
+    return {
+        'answered count': select(func.count(distinct(Answer.question_id)))
+        .where(Answer.prep_session_id == session['id']),
+        'next question': select(Question.id)
+        .where(Question.quiz_id == session['quiz_id'], Question.id.not_in(answered))
+        .order_by(Question.position, Question.id).limit(1),
+        'resume session': select(PrepSession.id)
+        .where(PrepSession.user_id == session['user_id'], PrepSession.quiz_id == session['quiz_id'],
+               PrepSession.status == 'in_progress').limit(1),
+    }
+
+
+def time_queries(engine, sessions):
+    totals = {}
+    with engine.connect() as conn:
+        for session in sessions:
+            for name, query in hot_path_queries(session).items():
+                start = time.perf_counter()
+                conn.execute(query).all()
+                totals[name] = totals.get(name, 0.0) + time.perf_counter() - start
+    return {name: total / len(sessions) * 1000 for name, total in totals.items()}
+
+
+def query_plans(engine, session):
+    plans = {}
+    with engine.connect() as conn:
+        for name, query in hot_path_queries(session).items():
+            compiled = query.compile(engine, compile_kwargs={'literal_binds': True})
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+            plans[name] = [row[-1] for row in rows]
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quizzes', type=int, default=200)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--sessions', type=int, default=4000)
+    parser.add_argument('--lookups', type=int, default=300)
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_session_indexes.sqlite')
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    for index in INDEXES:
+        index.drop(engine)
+
+    start = time.perf_counter()
+    sessions, question_count, answer_count = seed(engine, args.quizzes, args.questions, args.sessions)
+    print(f"Seeded {len(sessions)} sessions, {question_count} questions, {answer_count} answers "
+          f"in {time.perf_counter() - start:.1f}s ({path})")
+
+    lookups = random.Random(7).sample(sessions, min(args.lookups, len(sessions)))
+    before = time_queries(engine, lookups)
+    plans_before = query_plans(engine, lookups[0])
+
+    for index in INDEXES:
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    after = time_queries(engine, lookups)
+    plans_after = query_plans(engine, lookups[0])
+
+    print(f"\n{'query':<16} {'no index (ms)':>14} {'indexed (ms)':>13} {'speedup':>8}")
+    for name in before:
+        print(f"{name:<16} {before[name]:>14.3f} {after[name]:>13.3f} {before[name] / after[name]:>7.1f}x")
+
+    print("\nQuery plans (before -> after):")
+    for name in plans_before:
+        print(f"  {name}:")
+        print(f"    - {' | '.join(plans_before[name])}")
+        print(f"    + {' | '.join(plans_after[name])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Cost of the local voice activity check and how much audio it trims before upload.
+
+Runs analyze_speech over every recording in a directory (tests/files/audio by default) and over
+synthetic 16 kHz answers: pure silence, background noise, and speech-like audio surrounded by
+silence. The browser fixtures are WebM/Opus and are decoded with ffmpeg, which the Docker image
+installs; without it they are reported as not checked and would go to the model unchecked.
+
+Usage:
+    python -m benchmarks.bench_silence_detection [--dir tests/files/audio] [--repeat 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from google_ai.audio_preprocessing import analyze_speech, ffmpeg_available, write_wav
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_recordings(tmp_dir):
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE
+    voiced = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    silence = np.zeros(2 * SAMPLE_RATE)
+    recordings = {
+        'synthetic silence 10s': np.zeros(10 * SAMPLE_RATE),
+        'synthetic noise 10s': rng.normal(0, 0.003, 10 * SAMPLE_RATE),
+        'synthetic 2s+3s speech+2s': np.concatenate([silence, voiced, silence]) + rng.normal(0, 0.001, 7 * SAMPLE_RATE),
+    }
+    for name, samples in recordings.items():
+        path = os.path.join(tmp_dir, name.replace(' ', '_') + '.wav')
+        write_wav(path, samples.astype(np.float32), SAMPLE_RATE)
+        yield name, path
+
+
+def measure(path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        activity = analyze_speech(path)
+    return activity, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join('tests', 'files', 'audio'))
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"ffmpeg available: {ffmpeg_available()}")
+    print(f"{'recording':<30} {'duration':>9} {'speech':>8} {'kept':>7} {'verdict':>12} {'check ms':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        recordings = [(filename, os.path.join(args.dir, filename)) for filename in sorted(os.listdir(args.dir))]
+        recordings += list(synthetic_recordings(tmp_dir))
+
+        for name, path in recordings:
+            activity, elapsed = measure(path, args.repeat)
+            if activity is None:
+                print(f"{name:<30} {'-':>9} {'-':>8} {'-':>7} {'not checked':>12} {elapsed * 1000:>9.2f}")
+                continue
+            kept = (activity.end - activity.start) / activity.duration if activity.duration else 0.0
+            verdict = 'speech' if activity.has_speech() else 'local reply'
+            print(f"{name:<30} {activity.duration:>8.2f}s {activity.speech_seconds:>7.2f}s {kept:>7.1%} "
+                  f"{verdict:>12} {elapsed * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the streaming evaluation parser against the previous implementation.
+
+The previous pipeline accumulated the whole response with `full_response += chunk` and the
+feedback filter re-concatenated and re-scanned its buffer on every chunk. FeedbackStreamParser
+does a single pass and only re-checks the last two characters across chunk boundaries.
+
+Usage:
+    python -m benchmarks.bench_stream_parser [--chunks 2000 8000 20000] [--repeat 3]
+"""
+import argparse
+import time
+
+from google_ai.stream_parser import FeedbackStreamParser
+
+SCORES = "####\nCorrectness:7\nCompleteness:6"
+
+
+def legacy_pipeline(chunks):
+    """The generate_audio_evaluation + filter_feedback_stream code path before the parser."""
+    full_response = ""
+
+    def evaluation():
+        nonlocal full_response
+        for chunk in chunks:
+            full_response += chunk
+            yield chunk
+
+    stream = evaluation()
+    emitted = []
+    buffer = ""
+    for chunk in stream:
+        buffer += chunk
+        while buffer:
+            if '###' in buffer:
+                emitted.append(buffer[:buffer.index('###')])
+                for _ in stream:
+                    pass
+                buffer = ""
+                break
+            elif buffer.endswith('#') or buffer.endswith('##'):
+                break
+            else:
+                emitted.append(buffer)
+                buffer = ""
+    if buffer:
+        emitted.append(buffer)
+    return len(emitted), full_response.split('####')[1]
+
+
+def parser_pipeline(chunks):
+    parser = FeedbackStreamParser('###')
+    emitted = sum(1 for _ in parser.parse(chunks))
+    return emitted, parser.scores
+
+
+def synthetic_stream(count, ending):
+    return [f"word{i % 97} and some more text{ending}" for i in range(count)] + [SCORES]
+
+
+def best_of(func, chunks, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[2000, 8000, 20000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Plain prose, and markdown-like chunks ending in '#' which force the filter to hold its buffer
+    for label, ending in (("prose", " "), ("trailing #", " #")):
+        print(f"-- {label} chunks --")
+        print(f"{'chunks':>8} {'legacy (ms)':>12} {'parser (ms)':>12} {'speedup':>8}")
+        for count in args.chunks:
+            chunks = synthetic_stream(count, ending)
+            legacy = best_of(legacy_pipeline, chunks, args.repeat)
+            new = best_of(parser_pipeline, chunks, args.repeat)
+            print(f"{count:>8} {legacy * 1000:>12.1f} {new * 1000:>12.1f} {legacy / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,55 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'audio_uploads'
     GEMINI_API_KEY = get_required_env_var('GEMINI_API_KEY')
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', 4))
+    # Run background jobs inside the web request. Set to false only where a `flask run-worker` process
+    # is deployed next to the web server; the Docker image / Cloud Run service runs none
+    RUN_JOBS_INLINE = os.environ.get('RUN_JOBS_INLINE', 'true').lower() == 'true'
+    # Server-Sent Events of a job: poll interval, keep-alive comment interval and stream lifetime in seconds
+    JOB_EVENTS_POLL_INTERVAL = float(os.environ.get('JOB_EVENTS_POLL_INTERVAL', 1.0))
+    JOB_EVENTS_KEEPALIVE_SECONDS = int(os.environ.get('JOB_EVENTS_KEEPALIVE_SECONDS', 15))
+    JOB_EVENTS_MAX_SECONDS = int(os.environ.get('JOB_EVENTS_MAX_SECONDS', 300))
+    # Cache for text answer evaluations: 'memory', 'sql' or 'none'
+    EVALUATION_CACHE_BACKEND = os.environ.get('EVALUATION_CACHE_BACKEND', 'memory')
+    EVALUATION_CACHE_TTL = int(os.environ.get('EVALUATION_CACHE_TTL', 7 * 24 * 3600))
+    EVALUATION_CACHE_MAX_SIZE = int(os.environ.get('EVALUATION_CACHE_MAX_SIZE', 10000))
+    # Evaluators answer with schema-constrained JSON (typed feedback and scores) instead of '####' separated text
+    STRUCTURED_EVALUATION = os.environ.get('STRUCTURED_EVALUATION', 'false').lower() == 'true'
+    # Recorded answers larger than this are rejected while they are streamed to disk
+    MAX_AUDIO_UPLOAD_BYTES = int(os.environ.get('MAX_AUDIO_UPLOAD_BYTES', 25 * 1024 * 1024))
+    # Audio sent to Gemini: 'auto' (WAV stays mono 16-bit PCM, compressed recordings become Ogg/Opus),
+    # 'wav', 'opus' or 'none'. Decoding browser (WebM) recordings and encoding Opus need ffmpeg
+    AUDIO_NORMALIZATION = os.environ.get('AUDIO_NORMALIZATION', 'auto')
+    AUDIO_TARGET_SAMPLE_RATE = int(os.environ.get('AUDIO_TARGET_SAMPLE_RATE', 16000))
+    # Voice activity check: trim silence before upload, answer recordings with less speech than the minimum locally
+    AUDIO_TRIM_SILENCE = os.environ.get('AUDIO_TRIM_SILENCE', 'true').lower() == 'true'
+    AUDIO_MIN_SPEECH_SECONDS = float(os.environ.get('AUDIO_MIN_SPEECH_SECONDS', 0.3))
+    # Page scans are oriented, cropped, downsampled and re-encoded before question generation
+    PAGE_IMAGE_PREPROCESSING = os.environ.get('PAGE_IMAGE_PREPROCESSING', 'true').lower() == 'true'
+    PAGE_IMAGE_MAX_SIDE = int(os.environ.get('PAGE_IMAGE_MAX_SIDE', 1536))
+    PAGE_IMAGE_JPEG_QUALITY = int(os.environ.get('PAGE_IMAGE_JPEG_QUALITY', 80))
+    PAGE_IMAGE_WORKERS = int(os.environ.get('PAGE_IMAGE_WORKERS', 4))
+    # Total page pixels from which the process pool is started; smaller uploads are processed inline until it runs
+    PAGE_IMAGE_POOL_MIN_PIXELS = int(os.environ.get('PAGE_IMAGE_POOL_MIN_PIXELS', 80_000_000))
+    # Question generation packs consecutive pages into one request up to these budgets (1 page = per-page mode)
+    QUESTION_BATCH_MAX_PAGES = int(os.environ.get('QUESTION_BATCH_MAX_PAGES', 5))
+    QUESTION_BATCH_MAX_TOKENS = int(os.environ.get('QUESTION_BATCH_MAX_TOKENS', 12000))
+    # Generated questions are cached per page image; re-photographed pages match within this many of 64 dHash bits
+    QUESTION_CACHE_ENABLED = os.environ.get('QUESTION_CACHE_ENABLED', 'true').lower() == 'true'
+    QUESTION_CACHE_MAX_SIZE = int(os.environ.get('QUESTION_CACHE_MAX_SIZE', 20000))
+    QUESTION_CACHE_MAX_DISTANCE = int(os.environ.get('QUESTION_CACHE_MAX_DISTANCE', 10))
+    # Parallel text-to-speech requests per streamed language practice evaluation
+    TTS_MAX_CONCURRENCY = int(os.environ.get('TTS_MAX_CONCURRENCY', 4))
+    # Synthesized speech cache, least recently used files are removed above the size limit
+    TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR')
+    TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    # Per-request query counting: X-Query-Count/X-Query-Time-Ms headers and N+1 warnings
+    QUERY_COUNTER_ENABLED = os.environ.get('QUERY_COUNTER_ENABLED', 'false').lower() == 'true'
+    QUERY_COUNTER_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_COUNTER_N_PLUS_ONE_THRESHOLD', 5))
+    # Flask-Login user loader: identity cache TTL in seconds (0 disables), or trust session['user']
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', 10000))
+    USER_FROM_SESSION = os.environ.get('USER_FROM_SESSION', 'false').lower() == 'true'
     SQLALCHEMY_ECHO = False  # Default to False, enable per environment as needed
 
     @staticmethod
@@ -27,6 +76,7 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'dev.sqlite')
     SQLALCHEMY_ECHO = False  # Enable SQL query logging for development
+    QUERY_COUNTER_ENABLED = os.environ.get('QUERY_COUNTER_ENABLED', 'true').lower() == 'true'
 
 
 class TestingConfig(Config):
@@ -6,18 +6,22 @@ using Google's AI services.
 """
 
 from . import config
-from .question_generator import generate_questions
+from .model_registry import model_registry, get_model
+from .uploads import upload_file, upload_cache
+from .question_generator import generate_questions, generate_questions_timed
 from .transcription import transcribe_audio
 
 from .audio_answer_evaluator import evaluate_audio_answer
 from .text_answer_evaluator import evaluate_text_answer
 
 from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL
+from .generate_quiz_title import generate_quiz_title
 
 # Add the new function to __all__
-__all__ = ['transcribe_audio', 'generate_questions',
+__all__ = ['transcribe_audio', 'generate_questions', 'generate_questions_timed',
            'evaluate_audio_answer', 'evaluate_text_answer',
-           'evaluate_language_audio', 'config', 'generate_quiz_title']
+           'evaluate_language_audio', 'config', 'generate_quiz_title',
+           'model_registry', 'get_model', 'upload_file', 'upload_cache']
 
 # Update the version
 __version__ = "0.3.0"
@@ -0,0 +1,72 @@
+"""
+Async variants of the streaming audio evaluators.
+
+The blocking upload runs in a worker thread, the model response is consumed with the
+async genai API, so a single event loop can hold many concurrent feedback streams.
+"""
+import asyncio
+from typing import AsyncGenerator, Optional
+
+from flask import current_app
+
+from .audio_answer_evaluator import build_prompt, get_evaluation_model
+from .audio_preprocessing import upload_audio
+from .config import DEFAULT_MODEL
+from .evaluate_language_audio import build_evaluation_prompt, get_language_evaluation_model
+from .structured_output import structured_evaluation_enabled
+
+
+async def evaluate_audio_answer_async(
+        question: str,
+        correct_answer: str,
+        audio_path: str,
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
+) -> AsyncGenerator[str, None]:
+    """Async counterpart of evaluate_audio_answer. Errors are logged and re-raised."""
+    try:
+        model = get_evaluation_model(model_name, structured)
+        prompt = build_prompt(question, correct_answer)
+
+        file = await asyncio.to_thread(upload_audio, audio_path)
+
+        chat_session = model.start_chat(history=[{"role": "user", "parts": [file, prompt]}])
+        response_stream = await chat_session.send_message_async(prompt, stream=True)
+
+        async for chunk in response_stream:
+            if chunk.text:
+                yield chunk.text
+
+    except Exception as e:
+        current_app.logger.error(f"Error in evaluate_audio_answer_async: {str(e)}")
+        raise
+
+
+async def evaluate_language_audio_async(
+        user_language: str,
+        target_language: str,
+        prompt: str,
+        audio_file: str,
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
+) -> AsyncGenerator[str, None]:
+    """Async counterpart of evaluate_language_audio. Errors are yielded as text, like the sync version."""
+    try:
+        if structured is None:
+            structured = structured_evaluation_enabled()
+        model = get_language_evaluation_model(model_name, structured)
+        evaluation_prompt = build_evaluation_prompt(user_language, target_language, prompt, structured)
+
+        file = await asyncio.to_thread(upload_audio, audio_file)
+
+        chat_session = model.start_chat(history=[{"role": "user", "parts": [file]}])
+        response_stream = await chat_session.send_message_async(evaluation_prompt, stream=True)
+
+        async for chunk in response_stream:
+            if chunk.text:
+                yield chunk.text
+
+    except Exception as e:
+        error_msg = f"Error in evaluate_language_audio_async: {str(e)}"
+        current_app.logger.error(error_msg)
+        yield f"An error occurred: {error_msg}"
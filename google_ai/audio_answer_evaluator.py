@@ -1,15 +1,21 @@
 import google.generativeai as genai
 from flask import current_app
 from google.api_core import exceptions
-from typing import Generator
+from typing import Generator, Optional
+from .audio_preprocessing import upload_audio
 from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL
+from .model_registry import get_model
+from .structured_output import (TEXT_EVALUATION_FORMAT, TEXT_EVALUATION_SCHEMA, structured_evaluation_enabled,
+                                structured_generation_config)
 
-SYSTEM_PROMPT = """
+TASK_PROMPT = """
 You are a kind teacher AI that receives a Question, a correct-answer, and a student-answer as audio file uploaded in this chat. 
 Your task is to evaluate the student-answer based on the information from the correct-answer provided.
 If you think that the answer is empty, ask the user to repeat the answer and fix potential issues in recording.
 Analyze the language of correct-answer,  and provide response in that language.Your response should be in this language.
-You must provide feedback in a friendly and supportive tone. The output should be formatted as a text and should have following segments 
+You must provide feedback in a friendly and supportive tone. """
+
+TEXT_FORMAT = """The output should be formatted as a text and should have following segments 
 
 - first segment: A friendly and constructive explanation of what was wrong or missing in the student's answer, aimed at helping the student understand the errors and guiding them on how to improve.
 - separator: ####, feedback is finished by the separator ####, which indicates end of the student feedback, after this you will provide grade for correctness and completeness separatd by new line character
@@ -23,6 +29,9 @@ Correctness:6
 Completeness:5
 """
 
+SYSTEM_PROMPT = TASK_PROMPT + TEXT_FORMAT
+STRUCTURED_SYSTEM_PROMPT = TASK_PROMPT + TEXT_EVALUATION_FORMAT
+
 
 import logging
 import traceback
@@ -31,25 +40,34 @@ import logging
 import traceback
 from google.api_core import exceptions
 
+def build_prompt(question: str, correct_answer: str) -> str:
+    return f"Question: '{question}'\nCorrect Answer: '{correct_answer}'\n"
+
+
+def get_evaluation_model(model_name: str, structured: Optional[bool] = None):
+    """The model with the text or, in structured mode, the JSON schema constrained evaluation prompt."""
+    if structured is None:
+        structured = structured_evaluation_enabled()
+    if structured:
+        return get_model(model_name, system_instruction=STRUCTURED_SYSTEM_PROMPT,
+                         generation_config=structured_generation_config(TEXT_EVALUATION_SCHEMA))
+    return get_model(model_name, system_instruction=SYSTEM_PROMPT)
+
+
 def evaluate_audio_answer(
         question: str,
         correct_answer: str,
         audio_path: str,
-        model_name: str = DEFAULT_MODEL
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
 ) -> Generator[str, None, None]:
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS,
-            system_instruction=SYSTEM_PROMPT
-        )
+        model = get_evaluation_model(model_name, structured)
 
-        prompt = f"Question: '{question}'\nCorrect Answer: '{correct_answer}'\n"
+        prompt = build_prompt(question, correct_answer)
 
         parts = []
-        file = genai.upload_file(audio_path, mime_type="audio/wav")
+        file = upload_audio(audio_path)
         parts.append(file)
         parts.append(prompt)
 
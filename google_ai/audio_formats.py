@@ -0,0 +1,66 @@
+"""
+Recognize audio containers from their first bytes.
+
+Used both when a recording is stored (app.utils.audio_ingest) and when it is prepared for
+upload, so it depends on nothing but the standard library.
+"""
+from typing import Optional
+
+# (offset, magic bytes, MIME type, file extension)
+AUDIO_SIGNATURES = [
+    (0, b'\x1a\x45\xdf\xa3', 'audio/webm', '.webm'),
+    (0, b'OggS', 'audio/ogg', '.ogg'),
+    (0, b'fLaC', 'audio/flac', '.flac'),
+    (0, b'ID3', 'audio/mpeg', '.mp3'),
+    (4, b'ftyp', 'audio/mp4', '.m4a'),
+]
+SNIFF_BYTES = 16
+
+# Audio MIME types the Gemini API documents
+GEMINI_AUDIO_MIME_TYPES = {'audio/wav', 'audio/mp3', 'audio/aiff', 'audio/aac', 'audio/ogg', 'audio/flac'}
+# Sniffed types Gemini documents under another name
+GEMINI_MIME_ALIASES = {'audio/mpeg': 'audio/mp3'}
+# The label every recording was uploaded with before the container was sniffed
+DEFAULT_UPLOAD_MIME = 'audio/wav'
+
+
+def sniff_audio_mime(header: bytes) -> Optional[str]:
+    """Detect the audio container from the first bytes of a file, None if unknown."""
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'audio/wav'
+    for offset, magic, mime_type, _ in AUDIO_SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            return mime_type
+    # MPEG audio frame sync without an ID3 tag
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return 'audio/mpeg'
+    return None
+
+
+def sniff_audio_file(path: str) -> Optional[str]:
+    with open(path, 'rb') as f:
+        return sniff_audio_mime(f.read(SNIFF_BYTES))
+
+
+def extension_for_mime(mime_type: Optional[str]) -> str:
+    if mime_type == 'audio/wav':
+        return '.wav'
+    for _, _, known_mime, extension in AUDIO_SIGNATURES:
+        if known_mime == mime_type:
+            return extension
+    return ''
+
+
+def is_gemini_audio_mime(mime_type: Optional[str]) -> bool:
+    return GEMINI_MIME_ALIASES.get(mime_type, mime_type) in GEMINI_AUDIO_MIME_TYPES
+
+
+def gemini_audio_mime(mime_type: Optional[str]) -> str:
+    """
+    The MIME type to upload a recording with. Containers Gemini does not document (WebM,
+    MP4) are converted before upload; when that is not possible they keep DEFAULT_UPLOAD_MIME,
+    the label browser recordings have always been sent with.
+    """
+    if not is_gemini_audio_mime(mime_type):
+        return DEFAULT_UPLOAD_MIME
+    return GEMINI_MIME_ALIASES.get(mime_type, mime_type)
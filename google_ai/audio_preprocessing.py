@@ -0,0 +1,413 @@
+"""
+Normalize recorded answers before they are uploaded to Gemini.
+
+Browsers record WebM/Opus (at well over the bitrate speech needs) or 48 kHz stereo PCM.
+Every recording is decoded to mono, trimmed and resampled to 16 kHz: PCM WAV with the
+standard library, everything else with ffmpeg, which the Docker image installs. With the
+default AUDIO_NORMALIZATION = 'auto', WAV input is written back as 16-bit mono WAV and
+compressed input is encoded to Ogg/Opus; 'wav' and 'opus' force one output format.
+The MIME type sent to Gemini is taken from the file content. Containers Gemini does not
+document (WebM, MP4) are always converted, even when the result is larger, and only fall
+back to the old audio/wav label when they cannot be decoded.
+
+An energy based voice activity check trims leading and trailing silence and lets the
+blueprints answer silent recordings locally instead of asking the model to say so. The
+samples and speech activity from that check are kept for the upload that follows, so each
+answer is decoded (and run through ffmpeg) once.
+"""
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from flask import current_app, has_app_context
+
+from .audio_formats import gemini_audio_mime, is_gemini_audio_mime, sniff_audio_file
+from .uploads import upload_file
+
+DEFAULT_TARGET_SAMPLE_RATE = 16000
+NORMALIZATIONS = ('auto', 'wav', 'opus', 'none')
+DEFAULT_NORMALIZATION = 'auto'
+OPUS_BITRATE = '24k'
+
+# Voice activity detection
+VAD_FRAME_SECONDS = 0.02
+VAD_MIN_RUN_FRAMES = 3  # ignore clicks shorter than 60 ms
+VAD_ABSOLUTE_FLOOR_DB = -50.0
+VAD_NOISE_MARGIN_DB = 12.0
+VAD_PEAK_MARGIN_DB = 30.0
+VAD_PADDING_SECONDS = 0.2
+DEFAULT_MIN_SPEECH_SECONDS = 0.3
+# Recordings checked by empty_answer_feedback and waiting for upload_audio
+DECODED_AUDIO_KEEP = 8
+
+REPEAT_ANSWER_MESSAGES = {
+    'en': "I couldn't hear an answer in your recording. Please check your microphone and record your answer again.",
+    'de': "In deiner Aufnahme war keine Antwort zu hören. Bitte überprüfe dein Mikrofon und nimm deine Antwort "
+          "noch einmal auf.",
+    'fr': "Je n'ai entendu aucune réponse dans votre enregistrement. Veuillez vérifier votre micro et "
+          "enregistrer à nouveau votre réponse.",
+    'hr': "U snimci se ne čuje odgovor. Provjeri mikrofon i ponovno snimi svoj odgovor.",
+    'sr': "U snimku se ne čuje odgovor. Proveri mikrofon i ponovo snimi svoj odgovor.",
+}
+
+
+class SpeechActivity(NamedTuple):
+    duration: float
+    speech_seconds: float
+    start: float
+    end: float
+
+    def has_speech(self, min_seconds: float = DEFAULT_MIN_SPEECH_SECONDS) -> bool:
+        return self.speech_seconds >= min_seconds
+
+
+class DecodedAudio(NamedTuple):
+    samples: np.ndarray
+    sample_rate: int
+    activity: SpeechActivity
+
+
+class PreparedAudio(NamedTuple):
+    path: str
+    mime_type: str
+    original_size: int
+    size: int
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Decode a PCM WAV file.
+
+    Returns:
+    Tuple[np.ndarray, int]: float32 samples in [-1, 1] shaped (frames, channels) and the sample rate.
+    """
+    with wave.open(path, 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = bytes_[:, 0] | (bytes_[:, 1] << 8) | (bytes_[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        samples = values.astype(np.float32) / (1 << 23)
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / (1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    return samples.reshape(-1, channels), sample_rate
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int):
+    """Write mono float samples as 16-bit PCM WAV."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample mono audio by linear interpolation. When downsampling, a moving-average
+    low-pass over one output period is applied first to limit aliasing.
+    """
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    ratio = source_rate / target_rate
+    if ratio > 1:
+        width = int(round(ratio))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode='same')
+    target_length = int(len(samples) / ratio)
+    positions = np.arange(target_length) * ratio
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which('ffmpeg') is not None
+
+
+def encode_opus(samples: np.ndarray, sample_rate: int, target_path: str):
+    """Encode mono float samples to Ogg/Opus, piping 16-bit PCM into ffmpeg."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    subprocess.run(
+        ['ffmpeg', '-y', '-loglevel', 'error', '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', '-',
+         '-c:a', 'libopus', '-b:a', OPUS_BITRATE, target_path],
+        input=pcm.tobytes(), check=True, capture_output=True
+    )
+
+
+def decode_audio(path: str, sample_rate: int = DEFAULT_TARGET_SAMPLE_RATE) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode a recording to mono float samples. PCM WAV is read directly, everything else
+    (WebM/Opus from browsers, float WAV, ...) is decoded and resampled to sample_rate by ffmpeg.
+
+    Returns:
+    Optional[Tuple[np.ndarray, int]]: Samples and their sample rate, None if the format cannot be decoded here.
+    """
+    if sniff_audio_file(path) == 'audio/wav':
+        try:
+            samples, source_rate = read_wav(path)
+            return downmix(samples), source_rate
+        except (wave.Error, ValueError):
+            if not ffmpeg_available():
+                raise
+    if not ffmpeg_available():
+        return None
+    result = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-i', path, '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-'],
+        check=True, capture_output=True
+    )
+    return np.frombuffer(result.stdout, dtype='<i2').astype(np.float32) / 32768, sample_rate
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int) -> SpeechActivity:
+    """
+    Find speech in mono audio from short-time frame energy.
+
+    A frame counts as speech when its RMS level is above both an absolute floor and the
+    recording's own noise floor (10th percentile) plus a margin, capped relative to the peak
+    so that recordings without pauses are not rejected. Runs shorter than VAD_MIN_RUN_FRAMES
+    are treated as clicks.
+    """
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    frame_length = max(1, int(sample_rate * VAD_FRAME_SECONDS))
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return SpeechActivity(duration, 0.0, 0.0, 0.0)
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    levels = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+    noise_floor = np.percentile(levels, 10)
+    threshold = max(VAD_ABSOLUTE_FLOOR_DB,
+                    min(noise_floor + VAD_NOISE_MARGIN_DB, levels.max() - VAD_PEAK_MARGIN_DB))
+    active = levels > threshold
+
+    # Keep only runs of at least VAD_MIN_RUN_FRAMES active frames
+    run_starts = np.convolve(active.astype(np.int8), np.ones(VAD_MIN_RUN_FRAMES, dtype=np.int8),
+                             mode='valid') == VAD_MIN_RUN_FRAMES
+    speech = np.zeros(frame_count, dtype=bool)
+    for offset in range(VAD_MIN_RUN_FRAMES):
+        speech[offset:offset + len(run_starts)] |= run_starts
+
+    indexes = np.flatnonzero(speech)
+    if len(indexes) == 0:
+        return SpeechActivity(duration, 0.0, 0.0, 0.0)
+    start = max(0.0, indexes[0] * VAD_FRAME_SECONDS - VAD_PADDING_SECONDS)
+    end = min(duration, (indexes[-1] + 1) * VAD_FRAME_SECONDS + VAD_PADDING_SECONDS)
+    return SpeechActivity(duration, len(indexes) * VAD_FRAME_SECONDS, start, end)
+
+
+def target_sample_rate_config() -> int:
+    if has_app_context():
+        return current_app.config.get('AUDIO_TARGET_SAMPLE_RATE', DEFAULT_TARGET_SAMPLE_RATE)
+    return DEFAULT_TARGET_SAMPLE_RATE
+
+
+def decode_recording(path: str) -> Optional[DecodedAudio]:
+    """
+    Decode a recording at the configured target sample rate and detect its speech, None if it
+    cannot be decoded (compressed audio without ffmpeg). Logs instead of raising on decoding errors.
+    """
+    try:
+        decoded = decode_audio(path, target_sample_rate_config())
+    except (wave.Error, ValueError, EOFError, OSError, subprocess.CalledProcessError) as e:
+        if has_app_context():
+            current_app.logger.warning(f"Voice activity check failed for {path}: {str(e)}")
+        return None
+    if decoded is None:
+        if has_app_context():
+            current_app.logger.warning(f"Voice activity check skipped for {path}: decoding it needs ffmpeg")
+        return None
+    samples, sample_rate = decoded
+    return DecodedAudio(samples, sample_rate, detect_speech(samples, sample_rate))
+
+
+def analyze_speech(path: str) -> Optional[SpeechActivity]:
+    """Voice activity of a recording, None if it cannot be decoded (compressed audio without ffmpeg)."""
+    decoded = decode_recording(path)
+    return decoded.activity if decoded else None
+
+
+_decoded_audio: 'OrderedDict[str, Tuple[Tuple[int, int], DecodedAudio]]' = OrderedDict()
+_decoded_audio_lock = threading.Lock()
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def keep_decoded_audio(path: str, decoded: DecodedAudio):
+    """Remember a decoded recording for the upload_audio call that follows the silence check."""
+    version = _file_version(path)
+    with _decoded_audio_lock:
+        _decoded_audio[path] = (version, decoded)
+        _decoded_audio.move_to_end(path)
+        while len(_decoded_audio) > DECODED_AUDIO_KEEP:
+            _decoded_audio.popitem(last=False)
+
+
+def take_decoded_audio(path: str) -> Optional[DecodedAudio]:
+    """The decoded recording kept for path, None if there is none or the file changed since."""
+    with _decoded_audio_lock:
+        entry = _decoded_audio.pop(path, None)
+    if entry is None:
+        return None
+    version, decoded = entry
+    try:
+        return decoded if _file_version(path) == version else None
+    except OSError:
+        return None
+
+
+def empty_answer_feedback(path: str, language: Optional[str] = None) -> Optional[str]:
+    """
+    The "please repeat" feedback for a recording without speech, None if the recording has
+    speech or cannot be checked locally. Saves the upload and model round trip for silent answers.
+    Recordings with speech are kept decoded for upload_audio.
+    """
+    decoded = decode_recording(path)
+    if decoded is None:
+        return None
+    activity = decoded.activity
+    min_seconds = current_app.config.get('AUDIO_MIN_SPEECH_SECONDS', DEFAULT_MIN_SPEECH_SECONDS) \
+        if has_app_context() else DEFAULT_MIN_SPEECH_SECONDS
+    if activity.has_speech(min_seconds):
+        keep_decoded_audio(path, decoded)
+        return None
+    if has_app_context():
+        current_app.logger.info(f"No speech in {path} ({activity.speech_seconds:.2f}s of "
+                                f"{activity.duration:.2f}s), answering locally")
+    return REPEAT_ANSWER_MESSAGES.get((language or 'en')[:2].lower(), REPEAT_ANSWER_MESSAGES['en'])
+
+
+def prepare_audio(path: str, normalization: Optional[str] = None,
+                  target_sample_rate: Optional[int] = None, trim_silence: Optional[bool] = None,
+                  decoded: Optional[DecodedAudio] = None) -> PreparedAudio:
+    """
+    Produce the smallest suitable version of a recording for upload.
+
+    Args:
+    path (str): The stored recording.
+    normalization (Optional[str]): 'auto' (WAV stays 16-bit mono PCM, compressed input becomes
+        Ogg/Opus), 'wav', 'opus' or 'none'. Defaults to the AUDIO_NORMALIZATION config value.
+        Compressed input and Opus output need ffmpeg; without it Opus falls back to WAV and
+        compressed recordings are uploaded as they are.
+    target_sample_rate (Optional[int]): Defaults to AUDIO_TARGET_SAMPLE_RATE (16 kHz).
+    trim_silence (Optional[bool]): Cut leading and trailing silence. Defaults to AUDIO_TRIM_SILENCE.
+    decoded (Optional[DecodedAudio]): The recording as already decoded by decode_recording,
+        which saves decoding it and detecting its speech again.
+
+    Returns:
+    PreparedAudio: Path and MIME type to upload, plus original and prepared sizes in bytes.
+    """
+    if has_app_context():
+        normalization = normalization or current_app.config.get('AUDIO_NORMALIZATION', DEFAULT_NORMALIZATION)
+        target_sample_rate = target_sample_rate or current_app.config.get('AUDIO_TARGET_SAMPLE_RATE',
+                                                                          DEFAULT_TARGET_SAMPLE_RATE)
+        if trim_silence is None:
+            trim_silence = current_app.config.get('AUDIO_TRIM_SILENCE', True)
+    normalization = normalization or DEFAULT_NORMALIZATION
+    target_sample_rate = target_sample_rate or DEFAULT_TARGET_SAMPLE_RATE
+    trim_silence = True if trim_silence is None else trim_silence
+
+    original_size = os.path.getsize(path)
+    mime_type = sniff_audio_file(path) or 'audio/wav'
+    prepared = PreparedAudio(path, mime_type, original_size, original_size)
+    if normalization == 'none':
+        return prepared
+
+    output_format = normalization
+    if normalization == 'auto':
+        output_format = 'wav' if mime_type == 'audio/wav' else 'opus'
+    if output_format == 'opus' and not ffmpeg_available():
+        output_format = 'wav'
+
+    base, _ = os.path.splitext(path)
+    try:
+        if decoded is None:
+            samples = decode_audio(path, target_sample_rate)
+            if samples is None:
+                if has_app_context():
+                    current_app.logger.warning(f"Cannot decode {mime_type} recording {path} without ffmpeg, "
+                                               f"uploading it unchanged")
+                return prepared
+            mono, sample_rate = samples
+            activity = None
+        else:
+            mono, sample_rate, activity = decoded
+
+        if trim_silence:
+            activity = activity or detect_speech(mono, sample_rate)
+            if activity.speech_seconds > 0:
+                mono = mono[int(activity.start * sample_rate):int(activity.end * sample_rate)]
+        output_rate = min(sample_rate, target_sample_rate)
+        mono = resample(mono, sample_rate, output_rate)
+
+        if output_format == 'opus':
+            normalized_path = f"{base}.{output_rate // 1000}k.ogg"
+            encode_opus(mono, output_rate, normalized_path)
+            normalized_mime = 'audio/ogg'
+        else:
+            normalized_path = f"{base}.{output_rate // 1000}k.wav"
+            write_wav(normalized_path, mono, output_rate)
+            normalized_mime = 'audio/wav'
+        normalized = PreparedAudio(normalized_path, normalized_mime, original_size, os.path.getsize(normalized_path))
+        if is_gemini_audio_mime(mime_type):
+            prepared = _smaller(prepared, normalized, path)
+        else:
+            # Gemini does not document this container, upload the converted version even if it is larger
+            prepared = normalized
+    except (wave.Error, ValueError, EOFError, OSError, subprocess.CalledProcessError) as e:
+        # Fall back to the original recording, it is still a valid upload
+        if has_app_context():
+            current_app.logger.warning(f"Audio normalization failed for {path}: {str(e)}")
+
+    return prepared
+
+
+def _smaller(current: PreparedAudio, candidate: PreparedAudio, original_path: str) -> PreparedAudio:
+    """Keep whichever version is smaller and delete the other one unless it is the original."""
+    winner, loser = (candidate, current) if candidate.size < current.size else (current, candidate)
+    if loser.path != original_path and os.path.exists(loser.path):
+        os.remove(loser.path)
+    return winner
+
+
+def upload_audio(path: str):
+    """
+    Normalize a recording and upload it with a MIME type Gemini documents (see upload_file).
+    Reuses the samples decoded by empty_answer_feedback when the route checked the recording first.
+    """
+    audio = prepare_audio(path, decoded=take_decoded_audio(path))
+    mime_type = gemini_audio_mime(audio.mime_type)
+    if has_app_context():
+        if not is_gemini_audio_mime(audio.mime_type):
+            current_app.logger.warning(f"Could not convert {audio.mime_type} recording {audio.path}, "
+                                       f"uploading it as {mime_type}")
+        current_app.logger.info(f"Uploading {audio.path} as {mime_type}: "
+                                f"{audio.size} bytes (original {audio.original_size})")
+    try:
+        return upload_file(audio.path, mime_type=mime_type)
+    finally:
+        # The normalized copy is only needed for the upload
+        if audio.path != path and os.path.exists(audio.path):
+            os.remove(audio.path)
@@ -9,6 +9,9 @@ DEFAULT_MODEL = "gemini-1.5-pro"
 
 DEFAULT_PRO_MODEL = "gemini-1.5-pro-latest"
 
+# Maximum number of concurrent Gemini calls per API key (overridable via GEMINI_MAX_CONCURRENCY)
+DEFAULT_MAX_CONCURRENCY = 4
+
 # Generation configuration
 GENERATION_CONFIG = {
     "temperature": 0,
@@ -1,9 +1,13 @@
 import google.generativeai as genai
 from flask import current_app
-from typing import Generator
+from typing import Generator, Optional
 
 from app.language_utils import get_language_name
+from .audio_preprocessing import upload_audio
 from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL, SHARED_LANGUAGE_EVALUATION_PROMPT
+from .model_registry import get_model
+from .structured_output import (LANGUAGE_EVALUATION_FORMAT, LANGUAGE_EVALUATION_SCHEMA, structured_evaluation_enabled,
+                                structured_generation_config)
 
 TEXT_FORMATTING = """Format your response as follows:
 - Feedback in the user's native language
@@ -22,34 +26,48 @@ Content: 8
 """
 
 
+def build_evaluation_prompt(user_language: str, target_language: str, prompt: str, structured: bool = False) -> str:
+    display_user_lng = get_language_name(user_language)
+    display_target_lng = get_language_name(target_language)
+    formatting = LANGUAGE_EVALUATION_FORMAT if structured else TEXT_FORMATTING
+    return f"""
+        {SHARED_LANGUAGE_EVALUATION_PROMPT + formatting}
+        
+        User's native language: {display_user_lng}
+        Language being learned: {display_target_lng}
+        Speaking prompt: '{prompt}'
+
+        """
+
+
+def get_language_evaluation_model(model_name: str, structured: bool):
+    if structured:
+        return get_model(model_name, generation_config=structured_generation_config(LANGUAGE_EVALUATION_SCHEMA))
+    return get_model(model_name)
+
+
 def evaluate_language_audio(
         user_language: str,
         target_language: str,
         prompt: str,
         audio_file: str,
-        model_name: str = DEFAULT_MODEL
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
 ) -> Generator[str, None, None]:
+    """
+    Streams the evaluation as "<feedback>####<scores>" text, or in structured mode (the
+    STRUCTURED_EVALUATION setting unless structured is given) as a JSON object matching
+    LANGUAGE_EVALUATION_SCHEMA.
+    """
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS
-        )
-        display_user_lng = get_language_name(user_language)
-        display_target_lng = get_language_name(target_language)
-        evaluation_prompt = f"""
-        {SHARED_LANGUAGE_EVALUATION_PROMPT + TEXT_FORMATTING}
-        
-        User's native language: {display_user_lng}
-        Language being learned: {display_target_lng}
-        Speaking prompt: '{prompt}'
-
-        """
+        if structured is None:
+            structured = structured_evaluation_enabled()
+        model = get_language_evaluation_model(model_name, structured)
+        evaluation_prompt = build_evaluation_prompt(user_language, target_language, prompt, structured)
         # print(evaluation_prompt)
         # print(audio_file)
 
-        file = genai.upload_file(audio_file, mime_type="audio/wav")
+        file = upload_audio(audio_file)
 
         chat_session = model.start_chat(
             history=[
@@ -1,8 +1,13 @@
+from typing import Generator, Optional
+
 import google.generativeai as genai
 from flask import current_app
+from .audio_preprocessing import upload_audio
 from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL, SHARED_LANGUAGE_EVALUATION_PROMPT
+from .model_registry import get_model
+from .structured_output import SSML_EVALUATION_SCHEMA, structured_evaluation_enabled, structured_generation_config
 
-FORMATTING_PROMPT = """
+SSML_FORMAT = """
 
 Format your response as valid SSML (Speech Synthesis Markup Language) with the following structure:
 
@@ -31,7 +36,9 @@ Example SSML output:
     Grammar: 6,
     Content: 8
 </speak>
+"""
 
+VOICE_PROMPT = """
 It is crucial to switch to the target language voice for EVERY instance of the target language, even for single words. This ensures accurate pronunciation for the learner.
 
 Ensure that you use appropriate voice names for each language. Common voice names include:
@@ -45,31 +52,64 @@ Ensure that you use appropriate voice names for each language. Common voice name
 - Spanish: es-ES-Standard-A
 """
 
+FORMATTING_PROMPT = SSML_FORMAT + VOICE_PROMPT
+
+STRUCTURED_FORMATTING_PROMPT = """
+
+Respond with a JSON object with these fields, ssml first:
+- ssml: Your feedback as valid SSML (Speech Synthesis Markup Language) with the following structure, without any scores:
+
+<speak>
+  <voice name="[VOICE FOR USER'S NATIVE LANGUAGE]">
+    [Your constructive feedback in the user's native language. For EVERY word or phrase in the target language, regardless of length, switch to the target language voice, like this: <voice name="[VOICE FOR TARGET LANGUAGE]">target language word or phrase</voice>. This includes individual words, short phrases, and full sentences.]
+  </voice>
+</speak>
+
+- pronunciation: The pronunciation score as an integer
+- grammar: The grammar score as an integer
+- content: The content accuracy score as an integer
+""" + VOICE_PROMPT
+
+
+def build_ssml_evaluation_prompt(user_language: str, target_language: str, prompt: str,
+                                 structured: bool = False) -> str:
+    formatting = STRUCTURED_FORMATTING_PROMPT if structured else FORMATTING_PROMPT
+    return f"""
+        {SHARED_LANGUAGE_EVALUATION_PROMPT+formatting}
+
+        User's native language: {user_language}
+        Language being learned: {target_language}
+        Speaking prompt: '{prompt}'
+        """
+
+
+def get_ssml_evaluation_model(model_name: str, structured: bool):
+    if structured:
+        return get_model(model_name, generation_config=structured_generation_config(SSML_EVALUATION_SCHEMA))
+    return get_model(model_name)
+
 
 def evaluate_language_audio_ssml(
         user_language: str,
         target_language: str,
         prompt: str,
         audio_file: str,
-        model_name: str = DEFAULT_MODEL
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
 ) -> str:
+    """
+    Returns the SSML feedback with the scores inside it, or in structured mode (the
+    STRUCTURED_EVALUATION setting unless structured is given) a JSON object matching
+    SSML_EVALUATION_SCHEMA, with the SSML and the scores in separate fields.
+    """
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS
-        )
-
-        evaluation_prompt = f"""
-        {SHARED_LANGUAGE_EVALUATION_PROMPT+FORMATTING_PROMPT}
+        if structured is None:
+            structured = structured_evaluation_enabled()
+        model = get_ssml_evaluation_model(model_name, structured)
 
-        User's native language: {user_language}
-        Language being learned: {target_language}
-        Speaking prompt: '{prompt}'
-        """
+        evaluation_prompt = build_ssml_evaluation_prompt(user_language, target_language, prompt, structured)
 
-        file = genai.upload_file(audio_file, mime_type="audio/wav")
+        file = upload_audio(audio_file)
 
         chat_session = model.start_chat(
             history=[
@@ -88,4 +128,34 @@ def evaluate_language_audio_ssml(
     except Exception as e:
         error_msg = f"Error in evaluate_language_audio_ssml: {str(e)}"
         current_app.logger.error(error_msg)
-        raise  # Re-raise the exception instead of returning an error SSML
\ No newline at end of file
+        raise  # Re-raise the exception instead of returning an error SSML
+
+
+def evaluate_language_audio_ssml_stream(
+        user_language: str,
+        target_language: str,
+        prompt: str,
+        audio_file: str,
+        model_name: str = DEFAULT_MODEL,
+        structured: Optional[bool] = None
+) -> Generator[str, None, None]:
+    """Streaming counterpart of evaluate_language_audio_ssml, yields the response as it is generated."""
+    try:
+        if structured is None:
+            structured = structured_evaluation_enabled()
+        model = get_ssml_evaluation_model(model_name, structured)
+        evaluation_prompt = build_ssml_evaluation_prompt(user_language, target_language, prompt, structured)
+
+        file = upload_audio(audio_file)
+
+        chat_session = model.start_chat(history=[{"role": "user", "parts": [file]}])
+        response = chat_session.send_message(evaluation_prompt, stream=True)
+
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    except Exception as e:
+        error_msg = f"Error in evaluate_language_audio_ssml_stream: {str(e)}"
+        current_app.logger.error(error_msg)
+        raise
@@ -2,6 +2,7 @@ from flask import current_app
 from google import generativeai as genai
 
 from google_ai import DEFAULT_MODEL, GENERATION_CONFIG, SAFETY_SETTINGS
+from .model_registry import get_model
 
 
 def generate_quiz_title(questions, model_name=DEFAULT_MODEL):
@@ -16,12 +17,7 @@ def generate_quiz_title(questions, model_name=DEFAULT_MODEL):
     str: Generated quiz title.
     """
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS
-        )
+        model = get_model(model_name)
 
         # Prepare the prompt
         questions_text = "\n".join([f"- {q.question_text}" for q in questions])
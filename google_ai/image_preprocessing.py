@@ -0,0 +1,301 @@
+"""
+Prepare uploaded page scans before they are sent to Gemini for question generation.
+
+Phone photos of book pages are typically 3000-4000 px on the long side, rotated through EXIF
+only, and surrounded by table or scanner background. Each page is auto-oriented, cropped to its
+content, downsampled so the long side fits PAGE_IMAGE_MAX_SIDE, converted to grayscale when it
+carries no meaningful color, and re-encoded as JPEG. Gemini bills images by 768 px tiles, so the
+resolution cap bounds the tokens per page as well as the upload size.
+
+Decoding and resampling are CPU bound, so large uploads are processed in a process pool. Starting
+its workers takes seconds, so small uploads are processed inline until the pool is running.
+"""
+import math
+import mimetypes
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+from PIL import Image, ImageChops, ImageOps, ImageStat, UnidentifiedImageError
+
+DEFAULT_MAX_SIDE = 1536
+DEFAULT_JPEG_QUALITY = 80
+DEFAULT_MAX_WORKERS = 4
+# Total pixels from which starting the process pool pays off: spawning its workers takes about as
+# long as processing ten 8 megapixel phone photos inline
+DEFAULT_POOL_MIN_PIXELS = 80_000_000
+# Mean HSV saturation (0-255) below which a page is treated as black and white
+GRAYSCALE_SATURATION = 24
+# Pixels differing from the border color by less than this are background
+CROP_TOLERANCE = 32
+CROP_MARGIN = 0.01
+# Side of the difference hash grid, 8 gives a 64-bit hash
+PERCEPTUAL_HASH_SIZE = 8
+# Gemini bills an image as 258 tokens per 768 x 768 tile, or a single 258 token tile up to 384 x 384
+TOKENS_PER_TILE = 258
+
+IMAGE_SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+]
+# Formats Gemini accepts as they are; anything else is always re-encoded
+MODEL_IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/webp'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PreparedImage(NamedTuple):
+    source_path: str
+    path: str
+    mime_type: str
+    original_size: int
+    size: int
+
+
+def sniff_image_mime(path: str) -> Optional[str]:
+    """Detect the image format from the first bytes of a file, None if unknown."""
+    with open(path, 'rb') as f:
+        header = f.read(16)
+    for offset, magic, mime_type in IMAGE_SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            return mime_type
+    return None
+
+
+def image_mime_type(path: str) -> str:
+    """MIME type to upload an image with: sniffed from the content, else guessed from the file name."""
+    try:
+        mime_type = sniff_image_mime(path)
+    except OSError:
+        mime_type = None
+    return mime_type or mimetypes.guess_type(path)[0] or 'image/jpeg'
+
+
+def estimate_image_tokens(path: str) -> int:
+    """Input tokens Gemini will bill for an image, from its header only."""
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except (OSError, UnidentifiedImageError):
+        width = height = DEFAULT_MAX_SIDE
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_TILE
+    return math.ceil(width / 768) * math.ceil(height / 768) * TOKENS_PER_TILE
+
+
+def image_pixels(path: str) -> int:
+    """Pixel count of an image, from its header only (0 if it cannot be read)."""
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except (OSError, UnidentifiedImageError):
+        return 0
+    return width * height
+
+
+def perceptual_hash(path: str) -> str:
+    """
+    64-bit difference hash (dHash) of a page as 16 hex characters.
+
+    The page is oriented and cropped to its content first, so re-photographed or re-scanned
+    copies of the same page land within a few bits of each other (see hamming_distance),
+    while different pages of the same book typically differ in 20 or more bits.
+    """
+    size = PERCEPTUAL_HASH_SIZE
+    with Image.open(path) as image:
+        if image.format == 'JPEG':
+            image.draft('RGB', (256, 256))
+        image = crop_to_content(flatten(ImageOps.exif_transpose(image)))
+        pixels = list(image.convert('L').resize((size + 1, size), Image.BOX).getdata())
+    bits = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            right = pixels[row * (size + 1) + column + 1]
+            bits = (bits << 1) | (right > left)
+    return f"{bits:0{size * size // 4}x}"
+
+
+def hamming_distance(first_hash: str, second_hash: str) -> int:
+    return bin(int(first_hash, 16) ^ int(second_hash, 16)).count('1')
+
+
+def crop_to_content(image: Image.Image) -> Image.Image:
+    """Cut away a uniform border, using the color of the top-left corner as background."""
+    gray = image.convert('L')
+    background = Image.new('L', gray.size, gray.getpixel((0, 0)))
+    difference = ImageChops.difference(gray, background).point(lambda value: 255 if value > CROP_TOLERANCE else 0)
+    bbox = difference.getbbox()
+    if bbox is None:
+        return image
+    margin_x = int(image.width * CROP_MARGIN)
+    margin_y = int(image.height * CROP_MARGIN)
+    left, top, right, bottom = bbox
+    bbox = (max(0, left - margin_x), max(0, top - margin_y),
+            min(image.width, right + margin_x), min(image.height, bottom + margin_y))
+    if bbox == (0, 0, image.width, image.height):
+        return image
+    return image.crop(bbox)
+
+
+def is_grayscale(image: Image.Image) -> bool:
+    sample = image.copy()
+    sample.thumbnail((256, 256))
+    saturation = sample.convert('HSV').getchannel('S')
+    return ImageStat.Stat(saturation).mean[0] < GRAYSCALE_SATURATION
+
+
+def flatten(image: Image.Image) -> Image.Image:
+    """Convert any mode (palette, alpha, CMYK, 16-bit) to RGB, putting transparency on white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def preprocess_page_image(path: str, output_path: str, max_side: int = DEFAULT_MAX_SIDE,
+                          quality: int = DEFAULT_JPEG_QUALITY) -> PreparedImage:
+    """
+    Orient, crop, downsample and re-encode one page image as JPEG.
+
+    Runs in a worker process, so it only takes plain arguments and never touches the app.
+    The original is returned instead when it is already a model-supported format and the
+    re-encoded version would not be smaller.
+    """
+    original_size = os.path.getsize(path)
+    original_mime = sniff_image_mime(path)
+
+    with Image.open(path) as image:
+        if image.format == 'JPEG':
+            # Let libjpeg decode at a reduced scale, still at least max_side on both axes
+            image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image = flatten(image)
+        image = crop_to_content(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if is_grayscale(image):
+            image = image.convert('L')
+        image.save(output_path, 'JPEG', quality=quality, optimize=True)
+
+    size = os.path.getsize(output_path)
+    if original_mime in MODEL_IMAGE_TYPES and size >= original_size:
+        os.remove(output_path)
+        return PreparedImage(path, path, original_mime, original_size, original_size)
+    return PreparedImage(path, output_path, 'image/jpeg', original_size, size)
+
+
+def processed_path_for(path: str) -> str:
+    base, _ = os.path.splitext(path)
+    return f"{base}.page.jpg"
+
+
+def get_image_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool shared by all preprocessing calls in this process, created on first use.
+
+    Workers are spawned rather than forked so the pool is safe to start from a threaded
+    server or job worker.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def preprocess_page_images(paths: List[str], max_side: Optional[int] = None, quality: Optional[int] = None,
+                           max_workers: Optional[int] = None,
+                           pool_min_pixels: Optional[int] = None) -> List[PreparedImage]:
+    """
+    Preprocess page images, in parallel when it pays off (see use_image_pool), returning results
+    in input order.
+
+    A page that cannot be processed is passed through unchanged with its detected MIME type,
+    so question generation still sees every page.
+
+    Args:
+    paths (List[str]): Paths of the uploaded page images.
+    max_side (Optional[int]): Long side limit in pixels. Defaults to PAGE_IMAGE_MAX_SIDE.
+    quality (Optional[int]): JPEG quality. Defaults to PAGE_IMAGE_JPEG_QUALITY.
+    max_workers (Optional[int]): Process pool size. Defaults to PAGE_IMAGE_WORKERS.
+    pool_min_pixels (Optional[int]): Total pixels from which the pool is started. Defaults to
+        PAGE_IMAGE_POOL_MIN_PIXELS.
+
+    Returns:
+    List[PreparedImage]: One entry per input path.
+    """
+    if has_app_context():
+        config = current_app.config
+        max_side = max_side or config.get('PAGE_IMAGE_MAX_SIDE', DEFAULT_MAX_SIDE)
+        quality = quality or config.get('PAGE_IMAGE_JPEG_QUALITY', DEFAULT_JPEG_QUALITY)
+        max_workers = max_workers or config.get('PAGE_IMAGE_WORKERS', DEFAULT_MAX_WORKERS)
+        if pool_min_pixels is None:
+            pool_min_pixels = config.get('PAGE_IMAGE_POOL_MIN_PIXELS', DEFAULT_POOL_MIN_PIXELS)
+    max_side = max_side or DEFAULT_MAX_SIDE
+    quality = quality or DEFAULT_JPEG_QUALITY
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    if pool_min_pixels is None:
+        pool_min_pixels = DEFAULT_POOL_MIN_PIXELS
+
+    if not use_image_pool(paths, max_workers, pool_min_pixels):
+        return [_preprocess_or_passthrough(path, max_side, quality) for path in paths]
+
+    pool = get_image_pool(max_workers)
+    futures = [pool.submit(preprocess_page_image, path, processed_path_for(path), max_side, quality)
+               for path in paths]
+    results = []
+    for path, future in zip(paths, futures):
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time and finish inline
+            _reset_image_pool()
+            results.append(_preprocess_or_passthrough(path, max_side, quality))
+        except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+            results.append(_passthrough(path, e))
+    return results
+
+
+def use_image_pool(paths: List[str], max_workers: int, pool_min_pixels: int) -> bool:
+    """
+    Whether to process the pages in the process pool rather than inline.
+
+    A single page or a single CPU is not worth the round trip to a worker process. A running
+    pool is used for any other upload, but is only started for uploads of at least
+    pool_min_pixels in total: below that, spawning the workers takes longer than it saves.
+    """
+    if len(paths) == 1 or min(max_workers, os.cpu_count() or 1) <= 1:
+        return False
+    if _pool is not None:
+        return True
+    return sum(image_pixels(path) for path in paths) >= pool_min_pixels
+
+
+def _reset_image_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _preprocess_or_passthrough(path: str, max_side: int, quality: int) -> PreparedImage:
+    try:
+        return preprocess_page_image(path, processed_path_for(path), max_side, quality)
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        return _passthrough(path, e)
+
+
+def _passthrough(path: str, error: Exception) -> PreparedImage:
+    if has_app_context():
+        current_app.logger.warning(f"Page image preprocessing failed for {path}: {str(error)}")
+    size = os.path.getsize(path)
+    return PreparedImage(path, path, image_mime_type(path), size, size)
@@ -0,0 +1,124 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+from flask import current_app
+
+from .config import GENERATION_CONFIG, SAFETY_SETTINGS
+
+
+def _freeze(value: Any) -> Any:
+    """Convert nested dicts/lists into hashable tuples so they can be part of a cache key."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe registry of configured Gemini models.
+
+    genai.configure() is called once per API key and GenerativeModel instances are built once
+    per (model_name, system_instruction, generation_config, safety_settings) and then reused
+    across requests and threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Any, genai.GenerativeModel] = {}
+        self._configured_api_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.configure(app.config['GEMINI_API_KEY'])
+        app.extensions['genai_model_registry'] = self
+
+    def configure(self, api_key: str):
+        """Configure the genai client for the given API key, unless it already is."""
+        with self._lock:
+            self._configure_locked(api_key)
+
+    def ensure_configured(self):
+        """Make sure the genai client is configured for the current app's API key."""
+        self.configure(current_app.config['GEMINI_API_KEY'])
+
+    def get_model(
+            self,
+            model_name: str,
+            system_instruction: Optional[str] = None,
+            generation_config: Optional[Dict[str, Any]] = None,
+            safety_settings: Optional[List[Dict[str, str]]] = None
+    ) -> genai.GenerativeModel:
+        """
+        Return a cached GenerativeModel for the given settings, building it on first use.
+
+        Args:
+        model_name (str): Name of the Gemini model.
+        system_instruction (Optional[str]): System instruction for the model.
+        generation_config (Optional[Dict[str, Any]]): Defaults to GENERATION_CONFIG.
+        safety_settings (Optional[List[Dict[str, str]]]): Defaults to SAFETY_SETTINGS.
+
+        Returns:
+        genai.GenerativeModel: The shared model instance.
+        """
+        generation_config = GENERATION_CONFIG if generation_config is None else generation_config
+        safety_settings = SAFETY_SETTINGS if safety_settings is None else safety_settings
+        key = (model_name, system_instruction, _freeze(generation_config), _freeze(safety_settings))
+        api_key = current_app.config['GEMINI_API_KEY']
+
+        with self._lock:
+            self._configure_locked(api_key)
+            model = self._models.get(key)
+            if model is not None:
+                self.hits += 1
+                return model
+
+            self.misses += 1
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                system_instruction=system_instruction
+            )
+            self._models[key] = model
+            return model
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'models': len(self._models),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._configured_api_key = None
+            self.hits = 0
+            self.misses = 0
+
+    def _configure_locked(self, api_key: str):
+        if api_key != self._configured_api_key:
+            genai.configure(api_key=api_key)
+            # Models hold a client bound to the previous key
+            self._models.clear()
+            self._configured_api_key = api_key
+
+
+model_registry = ModelRegistry()
+
+
+def get_model(
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, str]]] = None
+) -> genai.GenerativeModel:
+    """Shortcut for model_registry.get_model()."""
+    return model_registry.get_model(model_name, system_instruction, generation_config, safety_settings)
@@ -1,8 +1,49 @@
+import hashlib
 import json
-from typing import List, Dict, Any, Optional
+import math
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
-from .config import DEFAULT_PRO_MODEL
-from .utils import execute_genai_operation
+from flask import current_app
+
+from .config import DEFAULT_PRO_MODEL, DEFAULT_MAX_CONCURRENCY
+from .image_preprocessing import estimate_image_tokens, image_mime_type
+from .utils import execute_genai_operation, get_api_key_semaphore, stream_genai_operation
+from .stream_parser import JsonArrayStreamParser
+
+PROMPT = """
+    * make sure that you analyze all the uploaded images
+    * for each image find the relevant topics
+    * for each topic come up with one or more relevant questions
+    * questions and answers MUST come from uploaded images ONLY!
+    * if you can not analyze provide information on that
+    * do not stop until you have analyzed all images
+    * provide your results as JSON
+    * each json element MUST have the following structure: page_nr, question, answer, difficulty_level
+    * difficulty_level should be one of: easy, medium, hard
+    * be very careful to provide VALID JSON!
+    """
+
+BATCH_PROMPT = PROMPT + """    * the images are {page_count} consecutive pages; page_nr is the position of the image in this
+      request, starting at 1, NOT the page number printed on the page
+    """
+
+# Identifies the prompts in cached generation results (see app.utils.question_cache)
+PROMPT_VERSION = hashlib.sha256((PROMPT + BATCH_PROMPT).encode('utf-8')).hexdigest()[:12]
+
+# Defaults for packing several pages into one request (overridable via QUESTION_BATCH_MAX_PAGES
+# and QUESTION_BATCH_MAX_TOKENS). The page limit also keeps the generated JSON well inside
+# the 8192 output tokens of GENERATION_CONFIG.
+DEFAULT_BATCH_MAX_PAGES = 5
+DEFAULT_BATCH_MAX_TOKENS = 12000
+# Rough size of text in tokens, used for the prompt part of the budget
+CHARS_PER_TOKEN = 4
+
+# Events passed from the batch workers to the calling thread
+_QUESTIONS_STREAMED = 'questions'
+_BATCH_FINISHED = 'batch'
 
 
 def generate_questions(image_paths: List[str], model_name: str = DEFAULT_PRO_MODEL) -> Optional[List[Dict[str, Any]]]:
@@ -16,30 +57,273 @@ def generate_questions(image_paths: List[str], model_name: str = DEFAULT_PRO_MOD
     Returns:
     Optional[List[Dict[str, Any]]]: List of generated questions with their details, or None if generation failed.
     """
-    prompt = """
-    * make sure that you analyze all the uploaded images 
-    * for each image find the relevant topics 
-    * for each topic come up with one or more relevant questions
-    * questions and answers MUST come from uploaded images ONLY!
-    * if you can not analyze provide information on that 
-    * do not stop until you have analyzed all images 
-    * provide your results as JSON
-    * each json element MUST have the following structure: page_nr, question, answer, difficulty_level
-    * difficulty_level should be one of: easy, medium, hard
-    * be very careful to provide VALID JSON!
+    result, _ = generate_questions_timed(image_paths, model_name=model_name)
+    return result
+
+
+def generate_questions_timed(
+        image_paths: List[str],
+        model_name: str = DEFAULT_PRO_MODEL,
+        max_workers: Optional[int] = None,
+        on_page_done: Optional[Callable[[int, int], None]] = None,
+        max_pages_per_call: Optional[int] = None,
+        max_tokens_per_call: Optional[int] = None,
+        on_questions: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], List[Dict[str, Any]]]:
     """
+    Generate questions for all pages, merging the results in page order.
+
+    Consecutive pages are packed into one request up to a page and input token budget (see
+    plan_batches), so the instruction prompt and the per-call overhead are paid once per batch
+    rather than once per page. Batches are only as large as needed to keep every worker busy.
+    Batches are prompted in parallel on a thread pool. The number of in-flight calls is capped by
+    the GEMINI_MAX_CONCURRENCY setting, shared by all callers using the same API key. A batch
+    whose response is not valid JSON is split in half and retried.
+
+    With on_questions, responses are streamed through an incremental JSON array parser and each
+    question is handed over as soon as it is complete, instead of after the whole response. If a
+    streamed response breaks off, the questions already delivered are kept and only the pages
+    without any delivered question are prompted again (see _delivered_pages).
+
+    Args:
+    image_paths (List[str]): List of paths to image files.
+    model_name (str): Name of the Gemini model to use.
+    max_workers (Optional[int]): Size of the thread pool. Defaults to GEMINI_MAX_CONCURRENCY.
+    on_page_done (Optional[Callable[[int, int], None]]): Called from the calling thread with
+        (pages_done, pages_total) each time a batch finishes.
+    max_pages_per_call (Optional[int]): Defaults to QUESTION_BATCH_MAX_PAGES, 1 prompts page by page.
+    max_tokens_per_call (Optional[int]): Defaults to QUESTION_BATCH_MAX_TOKENS.
+    on_questions (Optional[Callable[[List[Dict[str, Any]]], None]]): Called from the calling thread
+        with newly completed questions (page_nr already set) while the responses stream in.
+
+    Returns:
+    Tuple: The merged list of questions (or None if nothing was generated) and a list of
+        per-page timing dicts with image_path, seconds, question_count, batch and calls.
+        Each question's page_nr is the 1-based position of its page in image_paths.
+    """
+    if not image_paths:
+        return None, []
+
+    app = current_app._get_current_object()
+    limit = app.config.get('GEMINI_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)
+    semaphore = get_api_key_semaphore(app.config['GEMINI_API_KEY'], limit)
+    workers = max_workers or limit
+    max_pages = max_pages_per_call or app.config.get('QUESTION_BATCH_MAX_PAGES', DEFAULT_BATCH_MAX_PAGES)
+    # Only pack pages that would otherwise wait for a free worker, so batching never costs latency
+    max_pages = min(max_pages, math.ceil(len(image_paths) / workers))
+    batches = plan_batches(
+        image_paths, max_pages,
+        max_tokens_per_call or app.config.get('QUESTION_BATCH_MAX_TOKENS', DEFAULT_BATCH_MAX_TOKENS)
+    )
+    workers = min(workers, len(batches))
+
+    batch_results: List[Optional[List[Dict[str, Any]]]] = [None] * len(batches)
+    timings: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+
+    # Workers only put events on the queue; callbacks run in the calling thread, which owns the
+    # app context and database session of the caller
+    events = queue.Queue()
+    emit = (lambda questions: events.put((_QUESTIONS_STREAMED, questions))) if on_questions else None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate-questions") as executor:
+        for batch_index, batch in enumerate(batches):
+            future = executor.submit(_generate_batch_questions, app, semaphore, image_paths, batch, model_name, emit)
+            future.add_done_callback(lambda f, batch_index=batch_index: events.put((_BATCH_FINISHED, (batch_index, f))))
+
+        done = 0
+        finished_batches = 0
+        while finished_batches < len(batches):
+            pending = [events.get()]
+            while True:
+                try:
+                    pending.append(events.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Hand over everything that arrived meanwhile at once; a batch's questions always
+            # precede its finish event
+            streamed = [question for kind, payload in pending if kind == _QUESTIONS_STREAMED for question in payload]
+            if streamed:
+                on_questions(streamed)
+
+            for kind, payload in pending:
+                if kind != _BATCH_FINISHED:
+                    continue
+                batch_index, future = payload
+                batch = batches[batch_index]
+                questions, elapsed, calls = future.result()
+                batch_results[batch_index] = questions
+                finished_batches += 1
+                for index in batch:
+                    timings[index] = {
+                        'image_path': image_paths[index],
+                        'seconds': elapsed,
+                        'question_count': sum(1 for q in questions or [] if q.get('page_nr') == index + 1),
+                        'batch': batch_index,
+                        'calls': calls
+                    }
+                app.logger.info(f"Generated questions for pages {batch[0] + 1}-{batch[-1] + 1}/{len(image_paths)} "
+                                f"in {elapsed:.2f}s with {calls} call(s)")
+                done += len(batch)
+                if on_page_done:
+                    on_page_done(done, len(image_paths))
 
     result = None
-    for image_path in image_paths:
-        response = execute_genai_operation(prompt, file_paths=image_path, mime_type="image/jpeg", model_name=model_name)
-        if response:
-            try:
-                parsed_response = json.loads(response)
-                if result is None:
-                    result = parsed_response
-                else:
-                    result.extend(parsed_response)
-            except json.JSONDecodeError:
-                print(f"Failed to parse JSON for image: {image_path}")
+    for questions in batch_results:
+        if questions is None:
+            continue
+        if result is None:
+            result = list(questions)
+        else:
+            result.extend(questions)
 
-    return result
+    return result, timings
+
+
+def prompt_tokens(page_count: int) -> int:
+    prompt = PROMPT if page_count == 1 else BATCH_PROMPT.format(page_count=page_count)
+    return len(prompt) // CHARS_PER_TOKEN
+
+
+def plan_batches(image_paths: List[str], max_pages: int, max_tokens: int) -> List[List[int]]:
+    """
+    Pack consecutive pages into batches of page indexes.
+
+    A batch is closed when adding the next page would exceed max_pages, or push the estimated
+    input tokens (prompt plus image tiles) over max_tokens. A page that alone exceeds the token
+    budget still gets a batch of its own.
+    """
+    max_pages = max(1, max_pages)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    batch_tokens = 0
+    for index, image_path in enumerate(image_paths):
+        tokens = estimate_image_tokens(image_path)
+        if batch and (len(batch) == max_pages or batch_tokens + tokens + prompt_tokens(len(batch) + 1) > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(index)
+        batch_tokens += tokens
+    batches.append(batch)
+    return batches
+
+
+def parse_questions(response: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """The question list from a model response, None if it is missing or not a JSON list."""
+    if not response:
+        return None
+    try:
+        questions = json.loads(response)
+    except json.JSONDecodeError:
+        return None
+    return questions if isinstance(questions, list) else None
+
+
+def _generate_batch_questions(app, semaphore, image_paths: List[str], batch: List[int], model_name: str,
+                              emit: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+    """Prompt the model for one batch of pages, returning the questions, the elapsed time and the call count."""
+    with app.app_context():
+        start = time.perf_counter()
+        questions, calls = _prompt_pages(app, semaphore, image_paths, batch, model_name, emit)
+        return questions, time.perf_counter() - start, calls
+
+
+def _prompt_pages(app, semaphore, image_paths: List[str], batch: List[int], model_name: str, emit=None):
+    paths = [image_paths[index] for index in batch]
+    if len(paths) == 1:
+        prompt, file_paths, mime_type = PROMPT, paths[0], image_mime_type(paths[0])
+    else:
+        prompt = BATCH_PROMPT.format(page_count=len(paths))
+        file_paths, mime_type = paths, [image_mime_type(path) for path in paths]
+
+    if emit is None:
+        with semaphore:
+            response = execute_genai_operation(prompt, file_paths=file_paths, mime_type=mime_type,
+                                               model_name=model_name)
+        questions = parse_questions(response)
+        if questions is not None:
+            return _assign_pages(app, questions, batch), 1
+    else:
+        delivered, complete = _stream_questions(app, semaphore, batch, prompt, file_paths, mime_type,
+                                                model_name, emit)
+        if complete:
+            return delivered, 1
+
+        if delivered:
+            # Broke off after some complete questions, which have been handed over already
+            reached = _delivered_pages(delivered, batch)
+            remaining = [index for index in batch if index + 1 not in reached]
+            app.logger.warning(f"Response for pages {batch[0] + 1}-{batch[-1] + 1} broke off after "
+                               f"{len(delivered)} questions, prompting again for {len(remaining)} page(s)")
+            if not remaining:
+                return delivered, 1
+            more, calls = _prompt_pages(app, semaphore, image_paths, remaining, model_name, emit)
+            return delivered + (more or []), 1 + calls
+
+    if len(batch) == 1:
+        app.logger.warning(f"Failed to parse JSON for image: {paths[0]}")
+        return None, 1
+
+    # Usually a truncated or malformed response for a large batch; retry both halves
+    app.logger.warning(f"Failed to parse JSON for pages {batch[0] + 1}-{batch[-1] + 1}, splitting the batch")
+    middle = len(batch) // 2
+    first, first_calls = _prompt_pages(app, semaphore, image_paths, batch[:middle], model_name, emit)
+    second, second_calls = _prompt_pages(app, semaphore, image_paths, batch[middle:], model_name, emit)
+    if first is None and second is None:
+        return None, 1 + first_calls + second_calls
+    return (first or []) + (second or []), 1 + first_calls + second_calls
+
+
+def _stream_questions(app, semaphore, batch: List[int], prompt: str, file_paths, mime_type, model_name: str, emit):
+    """
+    Stream one response through a JsonArrayStreamParser, emitting each question as it completes.
+
+    Returns the emitted questions and whether the response held a complete JSON array.
+    """
+    parser = JsonArrayStreamParser()
+    questions = []
+    with semaphore:
+        for chunk in stream_genai_operation(prompt, file_paths=file_paths, mime_type=mime_type,
+                                            model_name=model_name):
+            items = [item for item in parser.feed(chunk) if isinstance(item, dict)]
+            if items:
+                questions.extend(_assign_pages(app, items, batch))
+                emit(items)
+            if parser.complete:
+                break
+    return questions, parser.complete
+
+
+def _delivered_pages(questions: List[Dict[str, Any]], batch: List[int]) -> set:
+    """
+    The page_nr of every page of the batch that streamed questions have been delivered for.
+
+    The response lists the pages in order, so a question that could not be linked to a page is
+    counted for the page of the question before it (the first page of the batch if there is none).
+    Prompting that page again would deliver its questions twice.
+    """
+    pages = set()
+    page_nr = batch[0] + 1
+    for question in questions:
+        page_nr = question['page_nr'] or page_nr
+        pages.add(page_nr)
+    return pages
+
+
+def _assign_pages(app, questions: List[Dict[str, Any]], batch: List[int]) -> List[Dict[str, Any]]:
+    """Rewrite page_nr from the position within the request to the position in the whole upload."""
+    for question in questions:
+        if len(batch) == 1:
+            question['page_nr'] = batch[0] + 1
+            continue
+        try:
+            position = int(question.get('page_nr'))
+        except (TypeError, ValueError):
+            position = None
+        if position is None or not 1 <= position <= len(batch):
+            app.logger.warning(f"Question with page_nr {question.get('page_nr')!r} outside of a "
+                               f"{len(batch)} page batch, linking it to no page")
+            question['page_nr'] = None
+        else:
+            question['page_nr'] = batch[position - 1] + 1
+    return questions
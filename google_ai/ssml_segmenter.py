@@ -0,0 +1,131 @@
+import re
+from typing import List, Optional
+
+SENTENCE_BOUNDARY = re.compile(r'[.!?](?=\s)')
+VISIBLE_TEXT = re.compile(r'[^\s]')
+
+
+class SSMLSegmenter:
+    """
+    Incrementally splits a streamed SSML document into small, independently valid SSML documents.
+
+    Segments are cut at sentence boundaries inside the outer <voice> element and when the outer
+    <voice> closes. Text inside nested <voice> elements (target-language words) is never split,
+    so every segment can be synthesized on its own and played back in order.
+    """
+
+    def __init__(self, min_chars: int = 60):
+        self.min_chars = min_chars
+        self._buffer = ''
+        self._parts: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        self._outer_voice: Optional[str] = None
+        self._last_char = ''
+
+    def feed(self, text: str) -> List[str]:
+        """Consume streamed SSML and return the segments completed by it."""
+        self._buffer += text
+        return self._process(final=False)
+
+    def finish(self) -> List[str]:
+        """Flush whatever is left at the end of the stream."""
+        segments = self._process(final=True)
+        self._flush(segments)
+        return segments
+
+    def _process(self, final: bool) -> List[str]:
+        segments: List[str] = []
+        while self._buffer:
+            if self._buffer[0] == '<':
+                end = self._buffer.find('>')
+                if end == -1:
+                    if final:
+                        # Truncated tag at the end of the stream, drop it
+                        self._buffer = ''
+                    break
+                tag = self._buffer[:end + 1]
+                self._buffer = self._buffer[end + 1:]
+                self._handle_tag(tag, segments)
+            else:
+                next_tag = self._buffer.find('<')
+                if next_tag == -1:
+                    # Keep trailing punctuation until we know whether whitespace follows it
+                    keep = 1 if not final and self._buffer[-1] in '.!?' else 0
+                    text = self._buffer[:len(self._buffer) - keep]
+                    self._buffer = self._buffer[len(text):]
+                else:
+                    text = self._buffer[:next_tag]
+                    self._buffer = self._buffer[next_tag:]
+                self._handle_text(text, segments)
+                if not text:
+                    break
+        return segments
+
+    def _handle_tag(self, tag: str, segments: List[str]):
+        name = tag.strip('</>').split()[0].lower() if tag.strip('</>') else ''
+        closing = tag.startswith('</')
+
+        if name == 'speak':
+            return
+
+        if name == 'voice' and not closing and not tag.endswith('/>'):
+            if not self._stack:
+                self._flush(segments)
+                self._outer_voice = tag
+            else:
+                self._append(tag)
+            self._stack.append(tag)
+            return
+
+        if name == 'voice' and closing:
+            if self._stack:
+                self._stack.pop()
+            if not self._stack:
+                self._flush(segments)
+                self._outer_voice = None
+            else:
+                self._append(tag)
+            return
+
+        self._append(tag)
+
+    def _handle_text(self, text: str, segments: List[str]):
+        if not text:
+            return
+        if len(self._stack) > 1:
+            self._append(text)
+            return
+
+        # Sentence boundaries are only safe outside nested voices
+        start = 0
+        search_text = self._last_char + text
+        for match in SENTENCE_BOUNDARY.finditer(search_text):
+            cut = match.end() - len(self._last_char)
+            if cut < start:
+                continue
+            if self._length + cut - start >= self.min_chars:
+                self._append(text[start:cut])
+                self._flush(segments)
+                start = cut
+        self._append(text[start:])
+
+    def _append(self, part: str):
+        if part:
+            self._parts.append(part)
+            self._length += len(part)
+            self._last_char = part[-1]
+
+    def _flush(self, segments: List[str]):
+        body = ''.join(self._parts).strip()
+        self._parts = []
+        self._length = 0
+        self._last_char = ''
+        if not VISIBLE_TEXT.search(re.sub(r'<[^>]*>', '', body)):
+            return
+
+        # Close nested voices left open by a truncated stream
+        body += '</voice>' * max(0, len(self._stack) - 1)
+        if self._outer_voice:
+            body = f"{self._outer_voice}{body}</voice>"
+        segments.append(f"<speak>{body}</speak>")
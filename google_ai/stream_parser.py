@@ -0,0 +1,351 @@
+import json
+import re
+from typing import Any, AsyncGenerator, Generator, Iterable, List, Optional
+
+
+class FeedbackStreamParser:
+    """
+    Single-pass splitter for streamed model output of the form "<feedback><separator><scores>".
+
+    Chunks are fed in as they arrive. Feedback text is released as soon as it can no longer be
+    the start of a separator, and everything after the separator is captured separately, so
+    neither the feedback nor the scores need to be re-joined or re-scanned per chunk. Only the
+    last len(separator) - 1 characters are searched again when the next chunk arrives.
+    """
+
+    def __init__(self, separator: str = '###'):
+        self.separator = separator
+        self.found = False
+        self._feedback: List[str] = []
+        self._scores: List[str] = []
+        self._held: List[str] = []
+        self._tail = ''
+        self._prefixes = [separator[:k] for k in range(1, len(separator))]
+
+    def feed(self, chunk: str) -> str:
+        """
+        Consume one chunk and return the feedback text that is safe to emit now (may be empty).
+        """
+        if self.found:
+            self._scores.append(chunk)
+            return ''
+
+        window = self._tail + chunk
+        index = window.find(self.separator)
+        if index != -1:
+            held = ''.join(self._held)
+            cut = index - len(self._tail)
+            if cut < 0:
+                # The separator started inside text we were holding back
+                emit = held[:len(held) + cut]
+                after = held[len(held) + cut:] + chunk
+            else:
+                emit = held + chunk[:cut]
+                after = chunk[cut:]
+            self._scores.append(after[len(self.separator):])
+            self._held = []
+            self._tail = ''
+            self.found = True
+            self._feedback.append(emit)
+            return emit
+
+        if any(window.endswith(prefix) for prefix in self._prefixes):
+            # Potential start of the separator, hold back until the next chunk
+            self._held.append(chunk)
+            self._tail = window[-(len(self.separator) - 1):]
+            return ''
+
+        emit = ''.join(self._held) + chunk
+        self._held = []
+        self._tail = ''
+        self._feedback.append(emit)
+        return emit
+
+    def finish(self) -> str:
+        """Signal the end of the stream and return any feedback text still held back."""
+        emit = ''.join(self._held)
+        self._held = []
+        self._tail = ''
+        if emit:
+            self._feedback.append(emit)
+        return emit
+
+    @property
+    def feedback(self) -> str:
+        return ''.join(self._feedback)
+
+    @property
+    def scores(self) -> str:
+        return ''.join(self._scores)
+
+    def parse(self, stream: Iterable[str]) -> Generator[str, None, None]:
+        """Feed a whole stream, yielding the feedback chunks. The scores are available afterwards."""
+        for chunk in stream:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.finish()
+        if text:
+            yield text
+
+    async def parse_async(self, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """Async counterpart of parse()."""
+        async for chunk in stream:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.finish()
+        if text:
+            yield text
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for streamed model output containing a JSON array of objects.
+
+    Chunks are fed in as they arrive and every top-level object of the array is returned as
+    soon as its closing brace has been seen. Only the characters of the object currently being
+    read are kept, so memory stays flat however long the response gets. Text before the
+    opening bracket (e.g. a ```json fence) and after the closing bracket is ignored, and an
+    element that is not valid JSON is skipped and counted in errors.
+    """
+
+    _SPECIAL = re.compile(r'[\[\]{}"\\]')
+
+    def __init__(self):
+        self.complete = False
+        self.errors = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape_pending = False
+        self._capturing = False
+        self._object: List[str] = []
+
+    @property
+    def started(self) -> bool:
+        return self._depth > 0 or self.complete
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume one chunk and return the array objects completed by it (may be empty)."""
+        items = []
+        if self.complete or not chunk:
+            return items
+
+        start = 0
+        skip = 0 if self._escape_pending else -1
+        self._escape_pending = False
+        for match in self._SPECIAL.finditer(chunk):
+            position = match.start()
+            if position == skip:
+                continue
+            char = chunk[position]
+
+            if self._in_string:
+                if char == '\\':
+                    if position + 1 < len(chunk):
+                        skip = position + 1
+                    else:
+                        self._escape_pending = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                # Outside the array only its opening bracket matters
+                if char == '[':
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+                if self._depth == 2 and char == '{':
+                    self._capturing = True
+                    self._object = []
+                    start = position
+            else:
+                self._depth -= 1
+                if self._depth == 1 and self._capturing:
+                    self._capturing = False
+                    self._object.append(chunk[start:position + 1])
+                    text = ''.join(self._object)
+                    self._object = []
+                    try:
+                        items.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                elif self._depth == 0:
+                    self.complete = True
+                    break
+
+        if self._capturing:
+            self._object.append(chunk[start:])
+        return items
+
+    def parse(self, stream: Iterable[str]) -> Generator[Any, None, None]:
+        """Feed a whole stream, yielding the array objects as they complete."""
+        for chunk in stream:
+            yield from self.feed(chunk)
+            if self.complete:
+                break
+
+
+class JsonFieldStreamParser:
+    """
+    Incremental parser for a streamed JSON object that releases one string field as it arrives.
+
+    Structured evaluations are objects like {"feedback": "...", "correctness": 7}. The decoded
+    text of the chosen field is returned from feed() chunk by chunk, escapes included, so it can
+    be streamed to the client before the object is complete; whichever order the model writes
+    the fields in. After finish(), value holds the whole decoded object (None if it is not
+    valid JSON). Mirrors the interface of FeedbackStreamParser.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field: str = 'feedback'):
+        self.field = field
+        self.value = None
+        self.complete = False
+        self._raw: List[str] = []
+        self._text: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: List[str] = []
+        self._reading_key = False
+        self._last_key = None
+        self._expect_value = False
+        self._streaming = False
+        self._escape_sequence = ''
+
+    @property
+    def found(self) -> bool:
+        return isinstance(self.value, dict)
+
+    @property
+    def feedback(self) -> str:
+        return ''.join(self._text)
+
+    def feed(self, chunk: str) -> str:
+        """Consume one chunk and return the newly decoded text of the field (may be empty)."""
+        if self.complete or not chunk:
+            return ''
+
+        emitted = []
+        start = None if self._depth == 0 else 0
+        for position, char in enumerate(chunk):
+            if self._streaming:
+                if self._escape_sequence:
+                    self._escape_sequence += char
+                    decoded = self._decode_escape()
+                    if decoded is not None:
+                        emitted.append(decoded)
+                elif char == '\\':
+                    self._escape_sequence = char
+                elif char == '"':
+                    self._streaming = False
+                else:
+                    emitted.append(char)
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._reading_key:
+                        self._last_key = json.loads('"' + ''.join(self._key) + '"')
+                        self._reading_key = False
+                    continue
+                if self._reading_key:
+                    self._key.append(char)
+                continue
+
+            if self._depth == 0:
+                # Text before the object, e.g. a ```json fence
+                if char == '{':
+                    self._depth = 1
+                    start = position
+                continue
+
+            if char == '"':
+                if self._depth == 1 and not self._expect_value:
+                    self._reading_key = True
+                    self._key = []
+                    self._in_string = True
+                elif self._depth == 1 and self._last_key == self.field:
+                    self._streaming = True
+                else:
+                    self._in_string = True
+                if self._depth == 1:
+                    self._expect_value = False
+            elif char in '{[':
+                self._depth += 1
+                self._expect_value = False
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._raw.append(chunk[start:position + 1])
+                    self.complete = True
+                    start = None
+                    break
+            elif char == ':' and self._depth == 1:
+                self._expect_value = True
+            elif char == ',' and self._depth == 1:
+                self._expect_value = False
+
+        if start is not None:
+            self._raw.append(chunk[start:])
+        text = ''.join(emitted)
+        if text:
+            self._text.append(text)
+        return text
+
+    def _decode_escape(self) -> Optional[str]:
+        """The decoded text once the pending escape sequence is complete, else None."""
+        sequence = self._escape_sequence
+        if sequence[1] != 'u':
+            self._escape_sequence = ''
+            return self._ESCAPES.get(sequence[1], sequence[1])
+        if len(sequence) < 6:
+            return None
+        code = int(sequence[2:6], 16)
+        if 0xD800 <= code < 0xDC00:
+            # High surrogate, wait for the low half to decode the pair
+            if len(sequence) < 12:
+                if len(sequence) == 7 and sequence[6] != '\\' or len(sequence) == 8 and sequence[7] != 'u':
+                    self._escape_sequence = ''
+                    return chr(code) + sequence[6:]
+                return None
+            self._escape_sequence = ''
+            return json.loads('"' + sequence + '"')
+        self._escape_sequence = ''
+        return chr(code)
+
+    def finish(self) -> str:
+        """Signal the end of the stream and decode the object."""
+        try:
+            self.value = json.loads(''.join(self._raw)) if self.complete else None
+        except json.JSONDecodeError:
+            self.value = None
+        return ''
+
+    def parse(self, stream: Iterable[str]) -> Generator[str, None, None]:
+        """Feed a whole stream, yielding the field text. The decoded object is available afterwards."""
+        for chunk in stream:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        self.finish()
+
+    async def parse_async(self, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """Async counterpart of parse()."""
+        async for chunk in stream:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        self.finish()
@@ -0,0 +1,110 @@
+"""
+Schema-constrained JSON output for the answer evaluators.
+
+In text mode the evaluators ask for "<feedback>####<scores>" and the routes split and
+regex-scan the response, storing 0 for any score they cannot find. In structured mode the model
+is constrained by a response schema to a JSON object with a feedback string and numeric
+scores, so the routes read typed fields instead. Streamed responses are parsed with
+google_ai.stream_parser.JsonFieldStreamParser, which emits the feedback as it arrives.
+
+Enabled with the STRUCTURED_EVALUATION setting.
+"""
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+
+from .config import GENERATION_CONFIG
+
+MIN_SCORE = 0
+MAX_SCORE = 10
+
+TEXT_SCORE_FIELDS = ['correctness', 'completeness']
+LANGUAGE_SCORE_FIELDS = ['pronunciation', 'grammar', 'content']
+
+
+def evaluation_schema(feedback_field: str, feedback_description: str, score_fields: List[str],
+                      score_type: str = 'number') -> Dict[str, Any]:
+    properties = {feedback_field: {'type': 'string', 'description': feedback_description}}
+    for field in score_fields:
+        properties[field] = {'type': score_type, 'description': f'{field} score from {MIN_SCORE} to {MAX_SCORE}'}
+    return {'type': 'object', 'properties': properties, 'required': [feedback_field] + score_fields}
+
+
+TEXT_EVALUATION_SCHEMA = evaluation_schema(
+    'feedback', "Friendly explanation of what was correct, wrong or missing in the student's answer",
+    TEXT_SCORE_FIELDS)
+LANGUAGE_EVALUATION_SCHEMA = evaluation_schema(
+    'feedback', "Feedback in the user's native language", LANGUAGE_SCORE_FIELDS, score_type='integer')
+SSML_EVALUATION_SCHEMA = evaluation_schema(
+    'ssml', "The feedback as SSML, without any scores", LANGUAGE_SCORE_FIELDS, score_type='integer')
+
+TEXT_EVALUATION_FORMAT = """Respond with a JSON object with these fields, feedback first:
+- feedback: A friendly and constructive explanation of what was correct, wrong or missing in the student's answer, aimed at helping the student understand the errors and guiding them on how to improve.
+- correctness: A score between 0-10 that indicates how correct the student's answer is. This score evaluates the accuracy of the content in the student's answer relative to the correct answer.
+- completeness: A score between 0-10 that indicates how complete the student's answer is. This score evaluates the completeness of the content in the student's answer relative to the correct answer.
+"""
+
+LANGUAGE_EVALUATION_FORMAT = """Respond with a JSON object with these fields, feedback first:
+- feedback: The feedback in the user's native language
+- pronunciation: The pronunciation score as an integer
+- grammar: The grammar score as an integer
+- content: The content accuracy score as an integer
+"""
+
+
+class Evaluation(NamedTuple):
+    feedback: str
+    # Score name -> value, None where the model gave no usable score
+    scores: Dict[str, Optional[float]]
+
+
+def structured_evaluation_enabled() -> bool:
+    return has_app_context() and current_app.config.get('STRUCTURED_EVALUATION', False)
+
+
+def structured_generation_config(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """GENERATION_CONFIG constrained to JSON matching schema."""
+    return {**GENERATION_CONFIG, 'response_mime_type': 'application/json', 'response_schema': schema}
+
+
+def parse_score(value: Any) -> Optional[float]:
+    """A numeric score clamped to MIN_SCORE..MAX_SCORE, None if it is missing or not a number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(min(max(value, MIN_SCORE), MAX_SCORE))
+
+
+def evaluation_from_value(value: Optional[Dict[str, Any]], score_fields: List[str],
+                          feedback_field: str = 'feedback', feedback: Optional[str] = None) -> Evaluation:
+    """
+    The feedback and scores of a decoded structured response.
+
+    Missing or invalid scores are None and logged, instead of being stored as 0. When the
+    response could not be decoded, feedback that was already streamed can be passed in.
+    """
+    if not isinstance(value, dict):
+        _warn(f"Structured evaluation is not a JSON object: {value!r:.200}")
+        return Evaluation(feedback or '', {field: None for field in score_fields})
+
+    scores = {}
+    for field in score_fields:
+        scores[field] = parse_score(value.get(field))
+        if scores[field] is None:
+            _warn(f"Structured evaluation has no valid {field} score: {value.get(field)!r}")
+    text = value.get(feedback_field)
+    return Evaluation(text.strip() if isinstance(text, str) else (feedback or ''), scores)
+
+
+def parse_evaluation(response: str, score_fields: List[str], feedback_field: str = 'feedback') -> Evaluation:
+    """The feedback and scores of a complete structured response."""
+    try:
+        value = json.loads(response)
+    except (TypeError, json.JSONDecodeError):
+        value = None
+    return evaluation_from_value(value, score_fields, feedback_field)
+
+
+def _warn(message: str):
+    if has_app_context():
+        current_app.logger.warning(message)
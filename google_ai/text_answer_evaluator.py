@@ -1,13 +1,20 @@
+import hashlib
+
 import google.generativeai as genai
 from flask import current_app
-from typing import Generator
+from typing import Generator, Optional
 from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL
+from .model_registry import get_model
+from .structured_output import (TEXT_EVALUATION_FORMAT, TEXT_EVALUATION_SCHEMA, structured_evaluation_enabled,
+                                structured_generation_config)
 
-SYSTEM_PROMPT = """
+TASK_PROMPT = """
 You are a kind teacher AI that receives a Question, a correct-answer, and a student-answer as text.
 Your task is to evaluate the student-answer based on the information from the correct-answer provided.
 Analyze the language of correct-answer, and provide response in that language. Your response should be in this language.
-You must provide feedback in a friendly and supportive tone. The output should be formatted as a text and should have following segments:
+You must provide feedback in a friendly and supportive tone. """
+
+TEXT_FORMAT = """The output should be formatted as a text and should have following segments:
 
 - first segment: A friendly and constructive explanation of what was correct, wrong or missing in the student's answer, aimed at helping the student understand the errors and guiding them on how to improve.
 - separator: ####, feedback is finished by the separator ####, which indicates end of the student feedback, after this you will provide grade for correctness and completeness separated by new line character
@@ -21,26 +28,40 @@ Correctness:6
 Completeness:5
 """
 
+SYSTEM_PROMPT = TASK_PROMPT + TEXT_FORMAT
+STRUCTURED_SYSTEM_PROMPT = TASK_PROMPT + TEXT_EVALUATION_FORMAT
+
+# Changes whenever the prompt changes, so cached evaluations from an older prompt are not reused
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:12]
+STRUCTURED_PROMPT_VERSION = hashlib.sha256(STRUCTURED_SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:12]
+
+
 def evaluate_text_answer(
     question: str,
     correct_answer: str,
     student_answer: str,
-    model_name: str = DEFAULT_MODEL
+    model_name: str = DEFAULT_MODEL,
+    structured: Optional[bool] = None
 ) -> str:
+    """
+    Returns the evaluation as "<feedback>####<scores>" text, or in structured mode (the
+    STRUCTURED_EVALUATION setting unless structured is given) as a JSON object matching
+    TEXT_EVALUATION_SCHEMA.
+    """
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS
-        )
+        if structured is None:
+            structured = structured_evaluation_enabled()
+        if structured:
+            model = get_model(model_name, generation_config=structured_generation_config(TEXT_EVALUATION_SCHEMA))
+        else:
+            model = get_model(model_name)
 
         prompt = f"""
         Question: '{question}'
         Correct Answer: '{correct_answer}'
         Student Answer: '{student_answer}'
 
-        {SYSTEM_PROMPT}
+        {STRUCTURED_SYSTEM_PROMPT if structured else SYSTEM_PROMPT}
         """
 
         chat_session = model.start_chat(history=[])
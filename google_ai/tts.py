@@ -1,7 +1,154 @@
-from google.cloud import texttospeech
+import hashlib
+import os
 import tempfile
+import threading
+from typing import Dict, Optional
+
+from flask import current_app
+from google.cloud import texttospeech
 import logging
 
+DEFAULT_TTS_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'tts_cache')
+DEFAULT_TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_tts_client() -> texttospeech.TextToSpeechClient:
+    """Return the process-wide TextToSpeechClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = texttospeech.TextToSpeechClient()
+    return _client
+
+
+def normalize_ssml(ssml_text: str) -> str:
+    """
+    Collapse whitespace runs so that formatting differences map to the same cache entry.
+    Whitespace next to tags is kept as one space, since it separates the spoken words.
+    """
+    return ' '.join(ssml_text.split())
+
+
+def speech_cache_key(ssml_text: str, voice, audio_config) -> str:
+    parts = [
+        normalize_ssml(ssml_text),
+        voice.language_code,
+        voice.name,
+        str(int(voice.ssml_gender)),
+        str(int(audio_config.audio_encoding)),
+        str(audio_config.speaking_rate),
+        str(audio_config.pitch),
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SpeechCache:
+    """
+    Content-addressed cache of synthesized audio files in a directory.
+
+    Files are named after the cache key. A hit refreshes the file's modification time, and the
+    least recently used files are removed once the directory grows beyond max_bytes, down to
+    EVICT_TO_RATIO of it. The directory size is scanned once at startup and then tracked from
+    this process's writes; every eviction rescans it, which also picks up other workers' files.
+    """
+
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_TTS_CACHE_MAX_BYTES, suffix: str = '.mp3'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path_for(key)
+        # Write to a temporary file first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            replaced_size = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(data) - replaced_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+        return path
+
+    def evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                target = self.max_bytes * self.EVICT_TO_RATIO
+                for _, size, path in sorted(entries):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= target:
+                        break
+            self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_speech_caches: Dict[str, SpeechCache] = {}
+_speech_caches_lock = threading.Lock()
+
+
+def get_speech_cache() -> SpeechCache:
+    """Return the speech cache for the directory configured by TTS_CACHE_DIR."""
+    directory = current_app.config.get('TTS_CACHE_DIR') or DEFAULT_TTS_CACHE_DIR
+    max_bytes = current_app.config.get('TTS_CACHE_MAX_BYTES', DEFAULT_TTS_CACHE_MAX_BYTES)
+    with _speech_caches_lock:
+        cache = _speech_caches.get(directory)
+        if cache is None:
+            cache = _speech_caches[directory] = SpeechCache(directory, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
+
 
 def replace_unsupported_voices(text: str) -> str:
     """
@@ -28,19 +175,19 @@ def generate_speech_from_ssml(ssml_text):
     """
     Generate speech from SSML text using Google Cloud Text-to-Speech API.
 
+    Identical SSML with the same voice and audio settings is served from the speech cache.
+
     Args:
     ssml_text (str): The SSML text to convert to speech.
 
     Returns:
-    str: Path to the temporary audio file.
+    str: Path to the cached audio file.
 
     Raises:
     Exception: If anything goes wrong.
     """
     try:
-        client = texttospeech.TextToSpeechClient()
         ssml_text = replace_unsupported_voices(ssml_text)
-        synthesis_input = texttospeech.SynthesisInput(ssml=ssml_text)
         voice = texttospeech.VoiceSelectionParams(
             language_code="en-US",
             ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
@@ -49,15 +196,19 @@ def generate_speech_from_ssml(ssml_text):
             audio_encoding=texttospeech.AudioEncoding.MP3
         )
 
-        response = client.synthesize_speech(
+        cache = get_speech_cache()
+        key = speech_cache_key(ssml_text, voice, audio_config)
+        cached_path = cache.get(key)
+        if cached_path is not None:
+            return cached_path
+
+        synthesis_input = texttospeech.SynthesisInput(ssml=ssml_text)
+        response = get_tts_client().synthesize_speech(
             input=synthesis_input, voice=voice, audio_config=audio_config
         )
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio_file:
-            temp_audio_file.write(response.audio_content)
-
-        return temp_audio_file.name
+        return cache.put(key, response.audio_content)
 
     except Exception as e:
         logging.error(f"Shit hit the fan in TTS: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+import google.generativeai as genai
+from flask import current_app
+
+from .model_registry import model_registry
+
+# Gemini keeps uploaded files for 48 hours; stop reusing a handle well before it expires
+DEFAULT_FILE_LIFETIME = timedelta(hours=48)
+EXPIRY_MARGIN = timedelta(hours=1)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    Thread-safe cache of remote Gemini file handles keyed by (API key, content SHA-256, MIME type).
+
+    Entries are dropped once the remote file is close to expiry, and the least recently used
+    entries are evicted above max_entries.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[Any]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                file, expires_at = entry
+                if expires_at - EXPIRY_MARGIN > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return file
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, file, expires_at: datetime):
+        with self._lock:
+            self._entries[key] = (file, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+upload_cache = UploadCache()
+
+
+def upload_file(path: str, mime_type: Optional[str] = None):
+    """
+    Upload a file to Gemini, reusing the remote handle if the same bytes were uploaded before.
+
+    Args:
+    path (str): Path to the local file.
+    mime_type (Optional[str]): MIME type of the file.
+
+    Returns:
+    The genai File handle to pass as a content part.
+    """
+    key = (current_app.config['GEMINI_API_KEY'], file_sha256(path), mime_type)
+    file = upload_cache.get(key)
+    if file is not None:
+        return file
+
+    model_registry.ensure_configured()
+    file = genai.upload_file(path, mime_type=mime_type)
+    upload_cache.put(key, file, _expiration_time(file))
+    return file
+
+
+def _expiration_time(file) -> datetime:
+    expires_at = getattr(file, 'expiration_time', None)
+    if isinstance(expires_at, datetime):
+        return expires_at if expires_at.tzinfo else expires_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) + DEFAULT_FILE_LIFETIME
@@ -1,14 +1,41 @@
+import threading
 from typing import Optional, Union, List
 import google.generativeai as genai
 from flask import current_app
 from typing import Generator
-from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL
+from .config import GENERATION_CONFIG, SAFETY_SETTINGS, DEFAULT_MODEL, DEFAULT_MAX_CONCURRENCY
+from .model_registry import get_model
+from .uploads import upload_file
+
+_api_key_semaphores = {}
+_api_key_semaphores_lock = threading.Lock()
+
+
+def get_api_key_semaphore(api_key: str, limit: int = DEFAULT_MAX_CONCURRENCY) -> threading.BoundedSemaphore:
+    """
+    Returns the process-wide semaphore that caps concurrent calls made with the given API key.
+
+    Args:
+    api_key (str): The Gemini API key the calls are made with.
+    limit (int): Maximum number of concurrent calls. Callers passing a different limit for the
+        same key get a separate semaphore, so a changed configuration takes effect.
+
+    Returns:
+    threading.BoundedSemaphore: The semaphore shared by all callers using this key and limit.
+    """
+    limit = max(1, limit)
+    with _api_key_semaphores_lock:
+        semaphore = _api_key_semaphores.get((api_key, limit))
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _api_key_semaphores[(api_key, limit)] = semaphore
+        return semaphore
 
 
 def execute_genai_operation(
         prompt: str,
         file_paths: Optional[Union[str, List[str]]] = None,
-        mime_type: Optional[str] = None,
+        mime_type: Optional[Union[str, List[str]]] = None,
         model_name: str = DEFAULT_MODEL
 ) -> Optional[str]:
     """
@@ -17,38 +44,67 @@ def execute_genai_operation(
     Args:
     prompt (str): The prompt to send to the AI model.
     file_paths (Optional[Union[str, List[str]]]): Path(s) to the file(s) to be processed.
-    mime_type (Optional[str]): MIME type of the file(s). If multiple files, all must be the same type.
+    mime_type (Optional[Union[str, List[str]]]): MIME type of the file(s), either one for all files or one per file.
     model_name (str): Name of the Gemini model to use.
 
     Returns:
     Optional[str]: The response from the AI model, or None if an error occurred.
     """
     try:
-        genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
+        chat_session = _start_file_chat(prompt, file_paths, mime_type, model_name)
+        response = chat_session.send_message(prompt)
 
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=GENERATION_CONFIG,
-            safety_settings=SAFETY_SETTINGS
-        )
+        return response.text
 
-        parts = []
-        if file_paths:
-            if isinstance(file_paths, str):
-                file_paths = [file_paths]  # Convert single path to list
+    except Exception as e:
+        current_app.logger.error(f"Error in execute_genai_operation: {str(e)}")
+        raise
+        #return None
 
-            for file_path in file_paths:
-                file = genai.upload_file(file_path, mime_type=mime_type)
-                parts.append(file)
 
-        parts.append(prompt)
+def stream_genai_operation(
+        prompt: str,
+        file_paths: Optional[Union[str, List[str]]] = None,
+        mime_type: Optional[Union[str, List[str]]] = None,
+        model_name: str = DEFAULT_MODEL
+) -> Generator[str, None, None]:
+    """
+    Streaming counterpart of execute_genai_operation, yielding the response text as it is generated.
 
-        chat_session = model.start_chat(history=[{"role": "user", "parts": parts}])
-        response = chat_session.send_message(prompt)
+    Args:
+    prompt (str): The prompt to send to the AI model.
+    file_paths (Optional[Union[str, List[str]]]): Path(s) to the file(s) to be processed.
+    mime_type (Optional[Union[str, List[str]]]): MIME type of the file(s), either one for all files or one per file.
+    model_name (str): Name of the Gemini model to use.
 
-        return response.text
+    Yields:
+    str: Chunks of the response text.
+    """
+    try:
+        chat_session = _start_file_chat(prompt, file_paths, mime_type, model_name)
+        for chunk in chat_session.send_message(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
 
     except Exception as e:
-        current_app.logger.error(f"Error in execute_genai_operation: {str(e)}")
+        current_app.logger.error(f"Error in stream_genai_operation: {str(e)}")
         raise
-        #return None
+
+
+def _start_file_chat(prompt, file_paths, mime_type, model_name):
+    """Upload the files and open a chat whose history holds them together with the prompt."""
+    model = get_model(model_name)
+
+    parts = []
+    if file_paths:
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]  # Convert single path to list
+
+        mime_types = mime_type if isinstance(mime_type, list) else [mime_type] * len(file_paths)
+        for file_path, file_mime_type in zip(file_paths, mime_types):
+            file = upload_file(file_path, mime_type=file_mime_type)
+            parts.append(file)
+
+    parts.append(prompt)
+
+    return model.start_chat(history=[{"role": "user", "parts": parts}])
@@ -0,0 +1,37 @@
+"""Add evaluation cache table
+
+Revision ID: 3b8d2f6e4c17
+Revises: a7c3e91d5b20
+Create Date: 2026-10-18 10:02:11.534017
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8d2f6e4c17'
+down_revision = 'a7c3e91d5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('evaluation_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=True),
+    sa.Column('last_used_date', sa.DateTime(), nullable=True),
+    sa.Column('expires_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key', name=op.f('pk_evaluation_cache'))
+    )
+    with op.batch_alter_table('evaluation_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_evaluation_cache_last_used_date'), ['last_used_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('evaluation_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_evaluation_cache_last_used_date'))
+
+    op.drop_table('evaluation_cache')
@@ -0,0 +1,40 @@
+"""Add answered_question table
+
+Revision ID: 4c9e1b7d2a85
+Revises: d92f5a7c3e18
+Create Date: 2026-10-18 21:42:17.508913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c9e1b7d2a85'
+down_revision = 'd92f5a7c3e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('answered_question',
+    sa.Column('prep_session_id', sa.String(length=36), nullable=False),
+    sa.Column('question_id', sa.String(length=36), nullable=False),
+    sa.ForeignKeyConstraint(['prep_session_id'], ['prep_session.id'],
+                            name=op.f('fk_answered_question_prep_session_id_prep_session'), ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'],
+                            name=op.f('fk_answered_question_question_id_question'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('prep_session_id', 'question_id', name=op.f('pk_answered_question'))
+    )
+
+    # Backfill from the existing answers, same as `flask repair-counters`
+    op.execute(
+        "INSERT INTO answered_question (prep_session_id, question_id) "
+        "SELECT DISTINCT answer.prep_session_id, answer.question_id FROM answer "
+        "JOIN prep_session ON prep_session.id = answer.prep_session_id "
+        "JOIN question ON question.id = answer.question_id"
+    )
+
+
+def downgrade():
+    op.drop_table('answered_question')
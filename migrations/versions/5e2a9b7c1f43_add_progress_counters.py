@@ -0,0 +1,42 @@
+"""Add denormalized progress counters to quiz and prep_session
+
+Revision ID: 5e2a9b7c1f43
+Revises: c41e7a9f2d68
+Create Date: 2026-10-18 15:03:52.640291
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9b7c1f43'
+down_revision = 'c41e7a9f2d68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answered_count', sa.Integer(), nullable=True))
+
+    # Backfill from the existing rows, same as `flask repair-counters`
+    op.execute(
+        "UPDATE quiz SET question_count = "
+        "(SELECT count(question.id) FROM question WHERE question.quiz_id = quiz.id)"
+    )
+    op.execute(
+        "UPDATE prep_session SET answered_count = "
+        "(SELECT count(DISTINCT answer.question_id) FROM answer WHERE answer.prep_session_id = prep_session.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.drop_column('answered_count')
+
+    with op.batch_alter_table('quiz', schema=None) as batch_op:
+        batch_op.drop_column('question_count')
@@ -0,0 +1,26 @@
+"""Add index for the paginated my sessions page
+
+Revision ID: 8d6f3a2e9b51
+Revises: 5e2a9b7c1f43
+Create Date: 2026-10-18 15:47:09.118462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d6f3a2e9b51'
+down_revision = '5e2a9b7c1f43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.create_index('ix_prep_session_user_id_start_time_id', ['user_id', 'start_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_prep_session_user_id_start_time_id')
@@ -0,0 +1,48 @@
+"""Add job table for background processing
+
+Revision ID: a7c3e91d5b20
+Revises: f5053bd3f311
+Create Date: 2026-10-18 09:12:40.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e91d5b20'
+down_revision = 'f5053bd3f311'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.String(length=1000), nullable=True),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('quiz_id', sa.String(length=36), nullable=True),
+    sa.Column('idempotency_key', sa.String(length=255), nullable=True),
+    sa.Column('progress_done', sa.Integer(), nullable=False),
+    sa.Column('progress_total', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=255), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('created_date', sa.DateTime(), nullable=True),
+    sa.Column('started_date', sa.DateTime(), nullable=True),
+    sa.Column('finished_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quiz.id'], name=op.f('fk_job_quiz_id_quiz')),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], name=op.f('fk_job_user_id_user')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_job')),
+    sa.UniqueConstraint('idempotency_key', name=op.f('uq_job_idempotency_key'))
+    )
+
+
+def downgrade():
+    op.drop_table('job')
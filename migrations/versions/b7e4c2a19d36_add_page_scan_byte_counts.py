@@ -0,0 +1,28 @@
+"""Record page scan sizes before and after image preprocessing
+
+Revision ID: b7e4c2a19d36
+Revises: 8d6f3a2e9b51
+Create Date: 2026-10-18 17:42:10.318524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c2a19d36'
+down_revision = '8d6f3a2e9b51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('page_scan', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_bytes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('processed_bytes', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('page_scan', schema=None) as batch_op:
+        batch_op.drop_column('processed_bytes')
+        batch_op.drop_column('original_bytes')
@@ -0,0 +1,38 @@
+"""Add composite indexes for the session hot path
+
+Revision ID: c41e7a9f2d68
+Revises: 3b8d2f6e4c17
+Create Date: 2026-10-18 14:21:37.208114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a9f2d68'
+down_revision = '3b8d2f6e4c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.create_index('ix_answer_prep_session_id_question_id', ['prep_session_id', 'question_id'], unique=False)
+
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.create_index('ix_prep_session_user_id_quiz_id_status', ['user_id', 'quiz_id', 'status'], unique=False)
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.create_index('ix_question_quiz_id_position_id', ['quiz_id', 'position', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_quiz_id_position_id')
+
+    with op.batch_alter_table('prep_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_prep_session_user_id_quiz_id_status')
+
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_prep_session_id_question_id')
@@ -0,0 +1,43 @@
+"""Add question cache table
+
+Revision ID: d92f5a7c3e18
+Revises: b7e4c2a19d36
+Create Date: 2026-10-18 19:11:46.207853
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd92f5a7c3e18'
+down_revision = 'b7e4c2a19d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('content_sha256', sa.String(length=64), nullable=False),
+    sa.Column('perceptual_hash', sa.String(length=16), nullable=True),
+    sa.Column('prompt_version', sa.String(length=32), nullable=False),
+    sa.Column('model_name', sa.String(length=100), nullable=False),
+    sa.Column('questions', sa.Text(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=True),
+    sa.Column('last_used_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key', name=op.f('pk_question_cache'))
+    )
+    with op.batch_alter_table('question_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_question_cache_last_used_date'), ['last_used_date'], unique=False)
+        batch_op.create_index('ix_question_cache_prompt_version_model_name', ['prompt_version', 'model_name'],
+                              unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question_cache', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_cache_prompt_version_model_name')
+        batch_op.drop_index(batch_op.f('ix_question_cache_last_used_date'))
+
+    op.drop_table('question_cache')
@@ -0,0 +1,233 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+import numpy as np
+
+from google_ai.audio_formats import gemini_audio_mime
+import google_ai.audio_preprocessing as audio_preprocessing
+from google_ai.audio_preprocessing import decode_audio, detect_speech, empty_answer_feedback, ffmpeg_available, \
+    prepare_audio, read_wav, resample, upload_audio, write_wav
+
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), '..', 'files', 'audio')
+
+
+def write_stereo_wav(path, seconds=1.0, sample_rate=48000, frequency=440.0):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t)
+    pcm = (np.stack([tone, tone], axis=1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def speech_like(seconds, sample_rate=16000, leading=0.0, trailing=0.0, seed=0):
+    """A modulated tone between stretches of low background noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    samples = np.concatenate([np.zeros(int(leading * sample_rate)), voiced, np.zeros(int(trailing * sample_rate))])
+    return (samples + rng.normal(0, 0.001, len(samples))).astype(np.float32)
+
+
+class TestVoiceActivity(unittest.TestCase):
+
+    def test_silence_and_background_noise_have_no_speech(self):
+        rng = np.random.default_rng(1)
+        self.assertEqual(detect_speech(np.zeros(32000, dtype=np.float32), 16000).speech_seconds, 0)
+        noise = rng.normal(0, 0.002, 32000).astype(np.float32)
+        self.assertFalse(detect_speech(noise, 16000).has_speech())
+
+    def test_speech_bounds_include_padding(self):
+        activity = detect_speech(speech_like(1.0, leading=1.5, trailing=2.0), 16000)
+
+        self.assertTrue(activity.has_speech())
+        self.assertAlmostEqual(activity.duration, 4.5)
+        self.assertAlmostEqual(activity.speech_seconds, 1.0, delta=0.1)
+        self.assertAlmostEqual(activity.start, 1.3, delta=0.05)
+        self.assertAlmostEqual(activity.end, 2.7, delta=0.05)
+
+    def test_continuous_speech_is_detected(self):
+        activity = detect_speech(speech_like(2.0), 16000)
+        self.assertAlmostEqual(activity.speech_seconds, 2.0, delta=0.1)
+
+    def test_clicks_are_not_speech(self):
+        samples = np.zeros(32000, dtype=np.float32)
+        samples[8000:8320] = 0.8  # one 20 ms click
+        self.assertEqual(detect_speech(samples, 16000).speech_seconds, 0)
+
+    def test_empty_answer_feedback(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            silent = os.path.join(tmp_dir, 'silent.wav')
+            spoken = os.path.join(tmp_dir, 'spoken.wav')
+            write_wav(silent, np.zeros(16000, dtype=np.float32), 16000)
+            write_wav(spoken, speech_like(1.0, leading=0.5), 16000)
+
+            self.assertIn('record your answer again', empty_answer_feedback(silent))
+            self.assertIn('noch einmal', empty_answer_feedback(silent, 'de'))
+            self.assertIsNone(empty_answer_feedback(spoken, 'de'))
+            # Compressed recordings cannot be checked without ffmpeg and go to the model
+            with mock.patch('google_ai.audio_preprocessing.ffmpeg_available', return_value=False):
+                self.assertIsNone(empty_answer_feedback(os.path.join(AUDIO_DIR, 'no_text_audio.wav')))
+
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_browser_recordings(self):
+        # Real WebM/Opus recordings despite the .wav extension
+        self.assertIn('noch einmal', empty_answer_feedback(os.path.join(AUDIO_DIR, 'no_text_audio.wav'), 'de'))
+        self.assertIsNone(empty_answer_feedback(os.path.join(AUDIO_DIR, 'german_howareyou.wav'), 'de'))
+        self.assertIsNone(empty_answer_feedback(os.path.join(AUDIO_DIR, 'sorry_forgotten.wav'), 'de'))
+
+
+class TestAudioPreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stereo_48k_wav_becomes_mono_16k(self):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_stereo_wav(path)
+
+        prepared = prepare_audio(path, normalization='wav', target_sample_rate=16000)
+
+        self.assertNotEqual(prepared.path, path)
+        self.assertEqual(prepared.mime_type, 'audio/wav')
+        self.assertEqual(prepared.original_size, os.path.getsize(path))
+        self.assertLess(prepared.size, prepared.original_size / 5)
+        samples, sample_rate = read_wav(prepared.path)
+        self.assertEqual(sample_rate, 16000)
+        self.assertEqual(samples.shape, (16000, 1))
+        # The tone survives resampling
+        self.assertAlmostEqual(float(np.abs(samples).max()), 0.5, delta=0.02)
+
+    def test_silence_is_trimmed(self):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_wav(path, speech_like(1.0, leading=2.0, trailing=2.0), 16000)
+
+        prepared = prepare_audio(path, normalization='wav', target_sample_rate=16000)
+        samples, _ = read_wav(prepared.path)
+
+        self.assertAlmostEqual(len(samples) / 16000, 1.4, delta=0.05)
+
+    def test_already_compact_wav_is_kept(self):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_wav(path, np.zeros(1600, dtype=np.float32), 16000)
+
+        prepared = prepare_audio(path, normalization='wav', target_sample_rate=16000)
+
+        self.assertEqual(prepared.path, path)
+        self.assertEqual(os.listdir(self.tmp_dir), ['answer.wav'])
+
+    @mock.patch('google_ai.audio_preprocessing.upload_file')
+    def test_unconverted_webm_keeps_the_wav_label(self, mock_upload_file):
+        # The browser recordings in the fixtures are WebM despite their .wav extension
+        source = os.path.join(AUDIO_DIR, 'german_howareyou.wav')
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        shutil.copy(source, path)
+
+        with mock.patch('google_ai.audio_preprocessing.ffmpeg_available', return_value=False):
+            prepared = prepare_audio(path, normalization='opus')
+            upload_audio(path)
+
+        self.assertEqual((prepared.path, prepared.mime_type), (path, 'audio/webm'))
+        # audio/webm is not a documented Gemini type
+        self.assertEqual(mock_upload_file.call_args.kwargs['mime_type'], 'audio/wav')
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_webm_is_converted_even_when_larger(self):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        shutil.copy(os.path.join(AUDIO_DIR, 'german_howareyou.wav'), path)
+
+        prepared = prepare_audio(path, normalization='wav')
+
+        self.assertEqual(prepared.mime_type, 'audio/wav')
+        self.assertGreater(prepared.size, prepared.original_size)
+
+    def test_gemini_audio_mime(self):
+        self.assertEqual(gemini_audio_mime('audio/ogg'), 'audio/ogg')
+        self.assertEqual(gemini_audio_mime('audio/mpeg'), 'audio/mp3')
+        for undocumented in ('audio/webm', 'audio/mp4', None):
+            self.assertEqual(gemini_audio_mime(undocumented), 'audio/wav')
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_browser_recording_is_decoded_trimmed_and_encoded(self):
+        source = os.path.join(AUDIO_DIR, 'german_wiegehtsdir.wav')
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        shutil.copy(source, path)
+
+        prepared = prepare_audio(path)
+
+        self.assertEqual(prepared.mime_type, 'audio/ogg')
+        self.assertLess(prepared.size, prepared.original_size / 3)
+        original, _ = decode_audio(path)
+        samples, sample_rate = decode_audio(prepared.path)
+        self.assertEqual(sample_rate, 16000)
+        # Leading and trailing silence is cut, the speech is kept
+        self.assertLess(len(samples), len(original) * 0.95)
+        self.assertTrue(detect_speech(samples, sample_rate).has_speech())
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    def test_opus_output_for_wav_input(self):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_stereo_wav(path, seconds=2.0)
+
+        prepared = prepare_audio(path, normalization='opus')
+
+        self.assertEqual((prepared.mime_type, os.path.splitext(prepared.path)[1]), ('audio/ogg', '.ogg'))
+        self.assertLess(prepared.size, prepared.original_size / 20)
+
+    def test_resample_length(self):
+        samples = np.zeros(44100, dtype=np.float32)
+        self.assertEqual(len(resample(samples, 44100, 16000)), 16000)
+        self.assertIs(resample(samples, 16000, 16000), samples)
+
+    @mock.patch('google_ai.audio_preprocessing.upload_file')
+    def test_upload_audio_sends_prepared_file(self, mock_upload_file):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_stereo_wav(path)
+
+        upload_audio(path)
+
+        uploaded_path = mock_upload_file.call_args.args[0]
+        self.assertNotEqual(uploaded_path, path)
+        self.assertEqual(mock_upload_file.call_args.kwargs['mime_type'], 'audio/wav')
+        self.assertEqual(os.listdir(self.tmp_dir), ['answer.wav'])
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    @mock.patch('google_ai.audio_preprocessing.upload_file')
+    def test_checked_recording_is_decoded_once(self, mock_upload_file):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        shutil.copy(os.path.join(AUDIO_DIR, 'german_wiegehtsdir.wav'), path)
+
+        with mock.patch('google_ai.audio_preprocessing.decode_audio', wraps=decode_audio) as mock_decode, \
+                mock.patch('google_ai.audio_preprocessing.detect_speech', wraps=detect_speech) as mock_detect:
+            self.assertIsNone(empty_answer_feedback(path))
+            upload_audio(path)
+
+        self.assertEqual((mock_decode.call_count, mock_detect.call_count), (1, 1))
+        self.assertTrue(mock_upload_file.call_args.args[0].endswith('.16k.ogg'))
+        self.assertNotIn(path, audio_preprocessing._decoded_audio)
+
+    @mock.patch('google_ai.audio_preprocessing.upload_file')
+    def test_recording_changed_after_the_check_is_decoded_again(self, mock_upload_file):
+        path = os.path.join(self.tmp_dir, 'answer.wav')
+        write_stereo_wav(path, seconds=1.0)
+        self.assertIsNone(empty_answer_feedback(path))
+        write_stereo_wav(path, seconds=2.0)
+
+        with mock.patch('google_ai.audio_preprocessing.decode_audio', wraps=decode_audio) as mock_decode:
+            upload_audio(path)
+
+        self.assertEqual(mock_decode.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
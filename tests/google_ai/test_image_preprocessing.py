@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+from google_ai.image_preprocessing import image_mime_type, preprocess_page_images, use_image_pool
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), '..', 'files', 'images')
+
+
+def draw_page(size, color=False):
+    """White page with a few lines of dark 'text' and optionally a red heading."""
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for line in range(8):
+        y = int(height * (0.25 + line * 0.08))
+        draw.rectangle([int(width * 0.15), y, int(width * 0.85), y + max(2, height // 80)], fill=(20, 20, 20))
+    if color:
+        draw.rectangle([int(width * 0.15), int(height * 0.1), int(width * 0.85), int(height * 0.18)],
+                       fill=(200, 30, 30))
+    return image
+
+
+class TestImagePreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def prepare(self, *paths, **kwargs):
+        kwargs.setdefault('max_workers', 1)
+        return preprocess_page_images(list(paths), **kwargs)
+
+    def test_phone_photo_is_downsampled(self):
+        path = os.path.join(self.tmp_dir, 'page.jpg')
+        shutil.copy(os.path.join(IMAGES_DIR, 'kiara-geschichte-0.jpg'), path)
+
+        [prepared] = self.prepare(path, max_side=1536)
+
+        self.assertEqual(prepared.source_path, path)
+        self.assertEqual(prepared.mime_type, 'image/jpeg')
+        self.assertEqual(prepared.original_size, os.path.getsize(path))
+        self.assertLess(prepared.size, prepared.original_size / 2)
+        with Image.open(prepared.path) as image:
+            self.assertLessEqual(max(image.size), 1536)
+
+    def test_exif_orientation_is_applied(self):
+        path = os.path.join(self.tmp_dir, 'rotated.jpg')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise when displayed
+        draw_page((800, 600)).save(path, exif=exif, quality=95)
+
+        [prepared] = self.prepare(path, max_side=2000)
+
+        with Image.open(prepared.path) as image:
+            self.assertGreater(image.height, image.width)
+
+    def test_transparent_png_is_cropped_flattened_and_grayscale(self):
+        path = os.path.join(self.tmp_dir, 'page.png')
+        canvas = Image.new('RGBA', (1200, 1600), (255, 255, 255, 0))
+        canvas.paste(draw_page((600, 800)).convert('RGBA'), (300, 400))
+        canvas.save(path)
+
+        [prepared] = self.prepare(path)
+
+        self.assertEqual(prepared.mime_type, 'image/jpeg')
+        with Image.open(prepared.path) as image:
+            self.assertEqual(image.mode, 'L')
+            # Only the text block and a small margin remain
+            self.assertLess(image.width, 600)
+
+    def test_color_is_kept_when_it_matters(self):
+        path = os.path.join(self.tmp_dir, 'page.png')
+        draw_page((1000, 1400), color=True).save(path)
+
+        [prepared] = self.prepare(path)
+
+        with Image.open(prepared.path) as image:
+            self.assertEqual(image.mode, 'RGB')
+
+    def test_gif_is_always_reencoded(self):
+        path = os.path.join(self.tmp_dir, 'page.gif')
+        draw_page((200, 300)).convert('P').save(path)
+
+        [prepared] = self.prepare(path)
+
+        self.assertEqual(image_mime_type(path), 'image/gif')
+        self.assertEqual(prepared.mime_type, 'image/jpeg')
+        self.assertNotEqual(prepared.path, path)
+
+    def test_small_jpeg_that_does_not_shrink_is_kept(self):
+        path = os.path.join(self.tmp_dir, 'small.jpg')
+        Image.frombytes('RGB', (64, 64), os.urandom(64 * 64 * 3)).save(path, quality=30)
+
+        [prepared] = self.prepare(path)
+
+        self.assertEqual(prepared.path, path)
+        self.assertEqual(os.listdir(self.tmp_dir), ['small.jpg'])
+
+    def test_unreadable_image_is_passed_through(self):
+        path = os.path.join(self.tmp_dir, 'broken.png')
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + b'\x00' * 32)
+
+        [prepared] = self.prepare(path)
+
+        self.assertEqual(prepared.path, path)
+        self.assertEqual(prepared.mime_type, 'image/png')
+
+    @mock.patch('google_ai.image_preprocessing.os.cpu_count', return_value=4)
+    def test_pool_is_only_started_for_large_uploads(self, _):
+        paths = []
+        for index in range(2):
+            paths.append(os.path.join(self.tmp_dir, f'page{index}.png'))
+            draw_page((1000, 1400)).save(paths[-1])
+
+        with mock.patch('google_ai.image_preprocessing.get_image_pool') as get_image_pool:
+            prepared = preprocess_page_images(paths, max_workers=4, pool_min_pixels=3_000_000)
+        get_image_pool.assert_not_called()
+        self.assertEqual([image.source_path for image in prepared], paths)
+
+        with ThreadPoolExecutor(max_workers=2) as pool, \
+                mock.patch('google_ai.image_preprocessing.get_image_pool', return_value=pool) as get_image_pool:
+            self.assertEqual(preprocess_page_images(paths, max_workers=4, pool_min_pixels=2_800_000), prepared)
+        get_image_pool.assert_called_once_with(4)
+
+    @mock.patch('google_ai.image_preprocessing._pool', object())
+    def test_running_pool_is_used_for_small_uploads(self):
+        with mock.patch('google_ai.image_preprocessing.os.cpu_count', return_value=4):
+            self.assertTrue(use_image_pool(['a.jpg', 'b.jpg'], 4, 10 ** 9))
+            self.assertFalse(use_image_pool(['a.jpg'], 4, 0))
+        with mock.patch('google_ai.image_preprocessing.os.cpu_count', return_value=1):
+            self.assertFalse(use_image_pool(['a.jpg', 'b.jpg'], 4, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+from app import create_app
+from google_ai.config import GENERATION_CONFIG
+from google_ai.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.registry = ModelRegistry()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    @mock.patch('google_ai.model_registry.genai')
+    def test_models_are_reused_per_settings(self, mock_genai):
+        mock_genai.GenerativeModel.side_effect = lambda **kwargs: mock.Mock(**kwargs)
+
+        first = self.registry.get_model("model-a")
+        second = self.registry.get_model("model-a", generation_config=dict(GENERATION_CONFIG))
+        other = self.registry.get_model("model-a", system_instruction="Be kind")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(mock_genai.GenerativeModel.call_count, 2)
+        mock_genai.configure.assert_called_once_with(api_key=self.app.config['GEMINI_API_KEY'])
+        self.assertEqual(self.registry.stats()['hits'], 1)
+        self.assertEqual(self.registry.stats()['misses'], 2)
+
+    @mock.patch('google_ai.model_registry.genai')
+    def test_changing_api_key_rebuilds_models(self, mock_genai):
+        mock_genai.GenerativeModel.side_effect = lambda **kwargs: mock.Mock(**kwargs)
+
+        first = self.registry.get_model("model-a")
+        self.app.config['GEMINI_API_KEY'] = 'another-key'
+        second = self.registry.get_model("model-a")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(mock_genai.configure.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
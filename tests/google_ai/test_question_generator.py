@@ -1,8 +1,12 @@
+import time
 import unittest
 import os
+from unittest import mock
 from pathlib import Path
 from flask import current_app
-from google_ai import generate_questions, config
+from google_ai import generate_questions, generate_questions_timed, config
+from google_ai.question_generator import plan_batches
+from google_ai.utils import get_api_key_semaphore
 from tests.test_config import TEST_IMAGES_DIR
 from app import create_app
 from config import TestingConfig
@@ -87,6 +91,157 @@ class TestQuestionGenerator(unittest.TestCase):
         finally:
             config.DEFAULT_PRO_MODEL = original_model
 
+    def test_generate_questions_parallel_preserves_page_order(self):
+        pages = [f"page_{i}.jpg" for i in range(6)]
+
+        def fake_execute(prompt, file_paths, mime_type, model_name):
+            index = int(file_paths.split('_')[1].split('.')[0])
+            # Earlier pages finish last, so completion order is the reverse of page order
+            time.sleep(0.05 * (len(pages) - index))
+            return f'[{{"page_nr": {index}, "question": "Q{index}?", "answer": "A{index}.", "difficulty_level": "easy"}}]'
+
+        self.app.config['GEMINI_MAX_CONCURRENCY'] = len(pages)
+        self.app.config['QUESTION_BATCH_MAX_PAGES'] = 1
+        with mock.patch('google_ai.question_generator.execute_genai_operation', side_effect=fake_execute):
+            start = time.perf_counter()
+            questions, timings = generate_questions_timed(pages)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual([q['page_nr'] for q in questions], list(range(1, len(pages) + 1)))
+        self.assertEqual([t['image_path'] for t in timings], pages)
+        self.assertTrue(all(t['question_count'] == 1 for t in timings))
+        # Roughly the slowest page, not the sum of all pages
+        self.assertLess(elapsed, 0.05 * sum(range(1, len(pages) + 1)))
+
+    def test_plan_batches_respects_page_and_token_budget(self):
+        pages = [f"page_{i}.jpg" for i in range(7)]  # missing files are estimated at 1032 tokens
+        self.assertEqual(plan_batches(pages, 3, 100000), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(plan_batches(pages, 10, 2500), [[0, 1], [2, 3], [4, 5], [6]])
+        # A page over the budget on its own still gets a batch
+        self.assertEqual(plan_batches(pages[:2], 10, 10), [[0], [1]])
+
+    def test_batched_page_numbers_map_to_upload_order(self):
+        pages = [f"page_{i}.jpg" for i in range(4)]
+
+        def fake_execute(prompt, file_paths, mime_type, model_name):
+            self.assertEqual(len(file_paths), 2)
+            self.assertEqual(mime_type, ['image/jpeg', 'image/jpeg'])
+            return ('[{"page_nr": 2, "question": "Q2?", "answer": "A.", "difficulty_level": "easy"},'
+                    ' {"page_nr": 1, "question": "Q1?", "answer": "A.", "difficulty_level": "easy"}]')
+
+        with mock.patch('google_ai.question_generator.execute_genai_operation', side_effect=fake_execute) as execute:
+            questions, timings = generate_questions_timed(pages, max_workers=2, max_pages_per_call=2)
+
+        self.assertEqual(execute.call_count, 2)
+        self.assertEqual([q['page_nr'] for q in questions], [2, 1, 4, 3])
+        self.assertEqual([t['batch'] for t in timings], [0, 0, 1, 1])
+        self.assertTrue(all(t['question_count'] == 1 for t in timings))
+
+    def test_few_pages_are_not_batched_below_the_concurrency_limit(self):
+        pages = [f"page_{i}.jpg" for i in range(3)]
+        response = '[{"page_nr": 1, "question": "Q?", "answer": "A.", "difficulty_level": "easy"}]'
+
+        with mock.patch('google_ai.question_generator.execute_genai_operation', return_value=response) as execute:
+            generate_questions_timed(pages, max_workers=4, max_pages_per_call=5)
+
+        self.assertEqual(execute.call_count, 3)
+
+    def test_api_key_semaphore_follows_the_configured_limit(self):
+        self.assertIs(get_api_key_semaphore('key', 2), get_api_key_semaphore('key', 2))
+        semaphore = get_api_key_semaphore('key', 3)
+        self.assertIsNot(semaphore, get_api_key_semaphore('key', 2))
+        for _ in range(3):
+            self.assertTrue(semaphore.acquire(blocking=False))
+        self.assertFalse(semaphore.acquire(blocking=False))
+        for _ in range(3):
+            semaphore.release()
+
+    def test_batch_with_invalid_json_is_split_and_retried(self):
+        pages = [f"page_{i}.jpg" for i in range(4)]
+
+        def fake_execute(prompt, file_paths, mime_type, model_name):
+            if isinstance(file_paths, list):
+                return '[{"page_nr": 1, "question": "truncated'
+            index = int(file_paths.split('_')[1].split('.')[0])
+            return f'[{{"page_nr": 1, "question": "Q{index}?", "answer": "A.", "difficulty_level": "easy"}}]'
+
+        with mock.patch('google_ai.question_generator.execute_genai_operation', side_effect=fake_execute) as execute:
+            questions, timings = generate_questions_timed(pages, max_workers=1, max_pages_per_call=4)
+
+        # One failed call for 4 pages, two failed calls for the halves, then one call per page
+        self.assertEqual(execute.call_count, 7)
+        self.assertEqual(timings[0]['calls'], 7)
+        self.assertEqual([q['question'] for q in questions], ['Q0?', 'Q1?', 'Q2?', 'Q3?'])
+        self.assertEqual([q['page_nr'] for q in questions], [1, 2, 3, 4])
+
+    def test_streamed_questions_are_handed_over_before_the_batch_finishes(self):
+        pages = [f"page_{i}.jpg" for i in range(2)]
+        events = []
+
+        def fake_stream(prompt, file_paths, mime_type, model_name):
+            yield '```json\n[{"page_nr": 2, "question": "Q2?", "answer": "A.", '
+            yield '"difficulty_level": "easy"}, {"page_nr": 1, "question": "Q1?", '
+            yield '"answer": "A.", "difficulty_level": "easy"}'
+            yield ']\n```'
+
+        with mock.patch('google_ai.question_generator.stream_genai_operation', side_effect=fake_stream), \
+                mock.patch('google_ai.question_generator.execute_genai_operation') as execute:
+            questions, _ = generate_questions_timed(
+                pages, max_workers=1, max_pages_per_call=2,
+                on_questions=lambda streamed: events.append([q['page_nr'] for q in streamed]),
+                on_page_done=lambda done, total: events.append(('done', done, total)))
+
+        execute.assert_not_called()
+        self.assertEqual(events[-1], ('done', 2, 2))
+        self.assertEqual(sum(events[:-1], []), [2, 1])
+        self.assertEqual([q['question'] for q in questions], ['Q2?', 'Q1?'])
+
+    def test_broken_off_stream_prompts_again_only_for_missing_pages(self):
+        pages = [f"page_{i}.jpg" for i in range(3)]
+        streamed = []
+
+        def fake_stream(prompt, file_paths, mime_type, model_name):
+            if isinstance(file_paths, list) and len(file_paths) == 3:
+                yield '[{"page_nr": 1, "question": "Q1?", "answer": "A.", "difficulty_level": "easy"}, '
+                yield '{"page_nr": 2, "que'
+                return
+            yield '[{"page_nr": 1, "question": "Q%s?", "answer": "A.", "difficulty_level": "easy"}]' % len(file_paths)
+
+        with mock.patch('google_ai.question_generator.stream_genai_operation', side_effect=fake_stream) as stream:
+            questions, timings = generate_questions_timed(pages, max_workers=1, max_pages_per_call=3,
+                                                          on_questions=streamed.extend)
+
+        # Pages 2 and 3 were never reached and are prompted together again
+        self.assertEqual(stream.call_count, 2)
+        self.assertEqual(stream.call_args.kwargs['file_paths'], pages[1:])
+        self.assertEqual(timings[0]['calls'], 2)
+        self.assertEqual([(q['page_nr'], q['question']) for q in questions], [(1, 'Q1?'), (2, 'Q2?')])
+        self.assertEqual(streamed, questions)
+
+    def test_broken_off_stream_does_not_repeat_questions_without_page(self):
+        pages = [f"page_{i}.jpg" for i in range(3)]
+        streamed = []
+
+        def fake_stream(prompt, file_paths, mime_type, model_name):
+            if isinstance(file_paths, list) and len(file_paths) == 3:
+                yield '[{"question": "Q1?", "answer": "A.", "difficulty_level": "easy"}, '
+                yield '{"page_nr": 2, "question": "Q2?", "answer": "A.", "difficulty_level": "easy"}, '
+                yield '{"page_nr": 9, "question": "Q2b?", "answer": "A.", "difficulty_level": "easy"}, '
+                yield '{"page_nr": 3, "que'
+                return
+            yield '[{"page_nr": 1, "question": "Q3?", "answer": "A.", "difficulty_level": "easy"}]'
+
+        with mock.patch('google_ai.question_generator.stream_genai_operation', side_effect=fake_stream) as stream:
+            questions, _ = generate_questions_timed(pages, max_workers=1, max_pages_per_call=3,
+                                                    on_questions=streamed.extend)
+
+        # The unlinked questions count for pages 1 and 2, so only page 3 is prompted again
+        self.assertEqual(stream.call_count, 2)
+        self.assertEqual(stream.call_args.kwargs['file_paths'], pages[2])
+        self.assertEqual([q['question'] for q in streamed], ['Q1?', 'Q2?', 'Q2b?', 'Q3?'])
+        self.assertEqual([q['page_nr'] for q in questions], [None, 2, None, 3])
+        self.assertEqual(streamed, questions)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+import unittest
+import xml.etree.ElementTree as ET
+
+from google_ai.ssml_segmenter import SSMLSegmenter
+
+SSML = """<speak>
+  <voice name="en-US-Standard-A">
+    That was a good try! Your pronunciation of the words was mostly clear.
+    You need to include <voice name="de-DE-Standard-A">und</voice> between
+    <voice name="de-DE-Standard-A">Bier. Und</voice> and <voice name="de-DE-Standard-A">einen</voice>.
+    A correct version would be: <voice name="de-DE-Standard-A">Ich möchte ein Bier, bitte.</voice>
+    Keep practicing!
+  </voice>
+"""
+
+
+def segment(text, chunk_size, min_chars=40):
+    segmenter = SSMLSegmenter(min_chars=min_chars)
+    segments = []
+    for i in range(0, len(text), chunk_size):
+        segments.extend(segmenter.feed(text[i:i + chunk_size]))
+    segments.extend(segmenter.finish())
+    return segments
+
+
+class TestSSMLSegmenter(unittest.TestCase):
+
+    def test_segments_are_valid_ssml(self):
+        segments = segment(SSML, 1000)
+        self.assertGreater(len(segments), 1)
+        for ssml in segments:
+            root = ET.fromstring(ssml)
+            self.assertEqual(root.tag, 'speak')
+            self.assertEqual(root[0].get('name'), 'en-US-Standard-A')
+
+    def test_chunking_does_not_change_segments(self):
+        expected = segment(SSML, 1000)
+        for chunk_size in (1, 2, 5, 13):
+            self.assertEqual(segment(SSML, chunk_size), expected)
+
+    def test_nested_voice_is_never_split(self):
+        for ssml in segment(SSML, 3):
+            self.assertEqual(ssml.count('<voice'), ssml.count('</voice>'))
+        self.assertTrue(any('Bier. Und</voice>' in ssml for ssml in segment(SSML, 3)))
+
+    def test_text_is_preserved(self):
+        def words(text):
+            return ET.tostring(ET.fromstring(text), method='text', encoding='unicode').split()
+
+        joined = [word for ssml in segment(SSML, 7) for word in words(ssml)]
+        self.assertEqual(joined, words(SSML + '</speak>'))
+
+    def test_truncated_stream_is_closed(self):
+        segments = segment('<speak><voice name="en-US-Standard-A">Hello <voice name="de-DE-Standard-A">Hal', 4)
+        self.assertEqual(len(segments), 1)
+        ET.fromstring(segments[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
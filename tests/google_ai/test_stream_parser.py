@@ -0,0 +1,146 @@
+import json
+import unittest
+
+from google_ai.stream_parser import FeedbackStreamParser, JsonArrayStreamParser, JsonFieldStreamParser
+
+
+class TestFeedbackStreamParser(unittest.TestCase):
+
+    def test_captures_feedback_and_scores(self):
+        parser = FeedbackStreamParser('###')
+        emitted = list(parser.parse(["Good ", "answer!\n####\nCorrectness:", "6\nCompleteness:5"]))
+        self.assertEqual(emitted, ["Good ", "answer!\n"])
+        self.assertTrue(parser.found)
+        self.assertEqual(parser.feedback, "Good answer!\n")
+        self.assertEqual(parser.scores, "#\nCorrectness:6\nCompleteness:5")
+
+    def test_separator_starting_in_held_chunks(self):
+        parser = FeedbackStreamParser('###')
+        emitted = list(parser.parse(["Well done #", "#", "#Pronunciation: 7"]))
+        self.assertEqual(emitted, ["Well done "])
+        self.assertEqual(parser.scores, "Pronunciation: 7")
+
+    def test_partial_separator_is_released(self):
+        parser = FeedbackStreamParser('###')
+        emitted = list(parser.parse(["C# ", "and F#", "# are languages"]))
+        self.assertEqual(emitted, ["C# ", "and F## are languages"])
+        self.assertFalse(parser.found)
+        self.assertEqual(parser.scores, "")
+
+    def test_held_text_is_flushed_at_end(self):
+        parser = FeedbackStreamParser('###')
+        emitted = list(parser.parse(["Ends with #"]))
+        self.assertEqual(emitted, ["Ends with #"])
+        self.assertEqual(parser.feedback, "Ends with #")
+
+    def test_matches_naive_split_on_long_stream(self):
+        text = ("Feedback with some # signs and ## doubles. " * 500) + "####\nCorrectness:7\nCompleteness:8"
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        parser = FeedbackStreamParser('###')
+        emitted = "".join(parser.parse(chunks))
+        expected_feedback, _, expected_scores = text.partition('###')
+        self.assertEqual(emitted, expected_feedback)
+        self.assertEqual(parser.scores, expected_scores)
+
+
+class TestJsonArrayStreamParser(unittest.TestCase):
+
+    QUESTIONS = [
+        {'page_nr': 1, 'question': 'Was sagt "Kiara" {leise}?', 'answer': 'Pfad C:\\temp [x]',
+         'difficulty_level': 'easy'},
+        {'page_nr': 2, 'question': 'Wohin?', 'answer': 'Nach Hause', 'difficulty_level': 'medium',
+         'topics': ['a', {'b': [1, 2]}]},
+    ]
+
+    def feed_in_chunks(self, text, size):
+        parser = JsonArrayStreamParser()
+        items = []
+        for i in range(0, len(text), size):
+            items.extend(parser.feed(text[i:i + size]))
+        return parser, items
+
+    def test_objects_are_returned_as_soon_as_they_close(self):
+        parser = JsonArrayStreamParser()
+        self.assertEqual(parser.feed('[{"page_nr": 1, "question": "Q1?"'), [])
+        self.assertEqual(parser.feed('}, {"page_nr": 2'), [{'page_nr': 1, 'question': 'Q1?'}])
+        self.assertFalse(parser.complete)
+        self.assertEqual(parser.feed('}]'), [{'page_nr': 2}])
+        self.assertTrue(parser.complete)
+
+    def test_any_chunking_gives_the_same_objects(self):
+        text = '```json\n' + json.dumps(self.QUESTIONS, ensure_ascii=False) + '\n```'
+        for size in (1, 2, 3, 5, 64, len(text)):
+            parser, items = self.feed_in_chunks(text, size)
+            self.assertEqual(items, self.QUESTIONS, size)
+            self.assertTrue(parser.complete)
+            self.assertEqual(parser.errors, 0)
+
+    def test_text_after_the_array_is_ignored(self):
+        parser = JsonArrayStreamParser()
+        items = list(parser.parse(['[{"a": 1}]', ' and [{"b": 2}]']))
+        self.assertEqual(items, [{'a': 1}])
+
+    def test_invalid_element_is_skipped(self):
+        parser, items = self.feed_in_chunks('[{"a": 1}, {"b": tru}, {"c": 3}]', 4)
+        self.assertEqual(items, [{'a': 1}, {'c': 3}])
+        self.assertEqual(parser.errors, 1)
+
+    def test_truncated_response_keeps_completed_objects(self):
+        parser, items = self.feed_in_chunks('[{"a": 1}, {"b": "trunc', 3)
+        self.assertEqual(items, [{'a': 1}])
+        self.assertFalse(parser.complete)
+
+    def test_only_the_current_object_is_buffered(self):
+        parser = JsonArrayStreamParser()
+        for i in range(1000):
+            parser.feed(json.dumps({'question': 'Q' * 100, 'n': i}) + ', ' if i else '[')
+            self.assertLess(sum(len(part) for part in parser._object), 200)
+
+
+class TestJsonFieldStreamParser(unittest.TestCase):
+
+    EVALUATION = {'correctness': 7, 'feedback': 'Sag "Hallo" \\ {nicht} [Tschüss]\nWeiter so 😀', 'completeness': 5.5}
+
+    def feed_in_chunks(self, text, size, field='feedback'):
+        parser = JsonFieldStreamParser(field)
+        emitted = [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+        parser.finish()
+        return parser, ''.join(emitted)
+
+    def test_feedback_is_released_before_the_object_closes(self):
+        parser = JsonFieldStreamParser('feedback')
+        self.assertEqual(parser.feed('{"feedback": "Gut'), 'Gut')
+        self.assertEqual(parser.feed(' gemacht", "correctness": 8'), ' gemacht')
+        self.assertEqual(parser.feed(', "completeness": 9}'), '')
+        parser.finish()
+        self.assertEqual(parser.value, {'feedback': 'Gut gemacht', 'correctness': 8, 'completeness': 9})
+
+    def test_any_chunking_and_key_order_gives_the_same_feedback(self):
+        texts = [json.dumps(self.EVALUATION), json.dumps(self.EVALUATION, ensure_ascii=False),
+                 '```json\n' + json.dumps(self.EVALUATION, indent=2) + '\n```']
+        for text in texts:
+            for size in (1, 2, 3, 5, 7, len(text)):
+                parser, emitted = self.feed_in_chunks(text, size)
+                self.assertEqual(emitted, self.EVALUATION['feedback'], (text, size))
+                self.assertEqual(parser.feedback, self.EVALUATION['feedback'])
+                self.assertEqual(parser.value, self.EVALUATION)
+
+    def test_nested_field_of_the_same_name_is_not_streamed(self):
+        parser, emitted = self.feed_in_chunks('{"notes": {"feedback": "no"}, "items": ["}"], "feedback": "yes"}', 4)
+        self.assertEqual(emitted, 'yes')
+        self.assertTrue(parser.found)
+
+    def test_other_field(self):
+        parser, emitted = self.feed_in_chunks('{"ssml": "<speak>Hallo</speak>", "grammar": 6}', 3, field='ssml')
+        self.assertEqual(emitted, '<speak>Hallo</speak>')
+        self.assertEqual(parser.value['grammar'], 6)
+
+    def test_truncated_response_keeps_streamed_feedback(self):
+        parser, emitted = self.feed_in_chunks('{"feedback": "Gut", "correctness": 7, "compl', 5)
+        self.assertEqual(emitted, 'Gut')
+        self.assertFalse(parser.found)
+        self.assertIsNone(parser.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
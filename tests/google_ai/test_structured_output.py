@@ -0,0 +1,77 @@
+import json
+import unittest
+from unittest import mock
+
+from app import create_app
+from google_ai.config import GENERATION_CONFIG
+from google_ai.structured_output import (LANGUAGE_SCORE_FIELDS, TEXT_EVALUATION_SCHEMA, TEXT_SCORE_FIELDS,
+                                         evaluation_from_value, parse_evaluation, parse_score,
+                                         structured_generation_config)
+from google_ai.text_answer_evaluator import (PROMPT_VERSION, STRUCTURED_PROMPT_VERSION, SYSTEM_PROMPT,
+                                             evaluate_text_answer)
+
+
+class TestStructuredOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_parse_score(self):
+        self.assertEqual(parse_score(7), 7.0)
+        self.assertEqual(parse_score(6.5), 6.5)
+        self.assertEqual(parse_score(14), 10.0)
+        self.assertEqual(parse_score(-2), 0.0)
+        for invalid in (None, '7', True, [7]):
+            self.assertIsNone(parse_score(invalid), invalid)
+
+    def test_missing_scores_are_none_not_zero(self):
+        evaluation = evaluation_from_value({'feedback': ' Gut gemacht! ', 'correctness': 8}, TEXT_SCORE_FIELDS)
+
+        self.assertEqual(evaluation.feedback, 'Gut gemacht!')
+        self.assertEqual(evaluation.scores, {'correctness': 8.0, 'completeness': None})
+
+    def test_undecodable_response_keeps_streamed_feedback(self):
+        evaluation = evaluation_from_value(None, LANGUAGE_SCORE_FIELDS, feedback='Gut')
+
+        self.assertEqual(evaluation.feedback, 'Gut')
+        self.assertEqual(evaluation.scores, {'pronunciation': None, 'grammar': None, 'content': None})
+
+    def test_parse_evaluation(self):
+        response = json.dumps({'completeness': 5, 'ssml': '<speak>Gut</speak>', 'correctness': 6})
+
+        self.assertEqual(parse_evaluation(response, TEXT_SCORE_FIELDS, feedback_field='ssml').feedback,
+                         '<speak>Gut</speak>')
+        self.assertEqual(parse_evaluation('Gut\n####\nCorrectness:6', TEXT_SCORE_FIELDS).scores,
+                         {'correctness': None, 'completeness': None})
+
+    def test_generation_config_adds_schema(self):
+        config = structured_generation_config(TEXT_EVALUATION_SCHEMA)
+
+        self.assertEqual(config['response_mime_type'], 'application/json')
+        self.assertEqual(config['response_schema']['required'], ['feedback', 'correctness', 'completeness'])
+        self.assertEqual(config['temperature'], GENERATION_CONFIG['temperature'])
+        self.assertNotIn('response_schema', GENERATION_CONFIG)
+
+    @mock.patch('google_ai.text_answer_evaluator.get_model')
+    def test_text_evaluator_follows_the_setting(self, mock_get_model):
+        mock_get_model.return_value.start_chat.return_value.send_message.return_value.text = '{}'
+
+        evaluate_text_answer('Q?', 'A', 'B')
+        self.assertNotIn('generation_config', mock_get_model.call_args.kwargs)
+        self.assertIn(SYSTEM_PROMPT, mock_get_model.return_value.start_chat.return_value.send_message.call_args.args[0])
+
+        self.app.config['STRUCTURED_EVALUATION'] = True
+        evaluate_text_answer('Q?', 'A', 'B')
+        self.assertEqual(mock_get_model.call_args.kwargs['generation_config']['response_schema'],
+                         TEXT_EVALUATION_SCHEMA)
+        self.assertNotIn('####', mock_get_model.return_value.start_chat.return_value.send_message.call_args.args[0])
+        self.assertNotEqual(PROMPT_VERSION, STRUCTURED_PROMPT_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import create_app
+from google_ai.tts import SpeechCache, generate_speech_from_ssml, normalize_ssml
+
+
+class TestSpeechCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app.config['TTS_CACHE_DIR'] = self.tmp_dir.name
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+        self.tmp_dir.cleanup()
+
+    def test_normalize_ssml_ignores_formatting(self):
+        pretty = '<speak>\n  <voice name="en-US-Standard-A">\n    Hello   there\n  </voice>\n</speak>'
+        compact = '<speak> <voice name="en-US-Standard-A"> Hello there </voice> </speak>'
+        self.assertEqual(normalize_ssml(pretty), normalize_ssml(compact))
+
+    def test_normalize_ssml_keeps_spaces_between_words_and_tags(self):
+        self.assertNotEqual(normalize_ssml('word <break/>next'), normalize_ssml('word<break/>next'))
+        self.assertEqual(normalize_ssml(' word  <break/>\n next '), 'word <break/> next')
+
+    @mock.patch('google_ai.tts.get_tts_client')
+    def test_identical_ssml_is_synthesized_once(self, mock_get_client):
+        mock_get_client.return_value.synthesize_speech.return_value = mock.Mock(audio_content=b'ID3-audio')
+
+        first = generate_speech_from_ssml('<speak> <voice name="en-US-Standard-A">Hi</voice> </speak>')
+        second = generate_speech_from_ssml('<speak>\n  <voice name="en-US-Standard-A">Hi</voice>\n</speak>\n')
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(self.tmp_dir.name))
+        with open(first, 'rb') as f:
+            self.assertEqual(f.read(), b'ID3-audio')
+        mock_get_client.return_value.synthesize_speech.assert_called_once()
+
+        generate_speech_from_ssml('<speak>Something else</speak>')
+        self.assertEqual(mock_get_client.return_value.synthesize_speech.call_count, 2)
+
+    def test_least_recently_used_files_are_evicted(self):
+        cache = SpeechCache(self.tmp_dir.name, max_bytes=25)
+        first = cache.put('first', b'x' * 10)
+        second = cache.put('second', b'x' * 10)
+        past = time.time() - 60
+        os.utime(first, (past, past))
+        os.utime(second, (past - 60, past - 60))
+
+        # Reading 'second' makes 'first' the least recently used entry
+        self.assertEqual(cache.get('second'), second)
+        cache.put('third', b'x' * 10)
+
+        self.assertIsNone(cache.get('first'))
+        self.assertEqual(cache.get('second'), second)
+        self.assertTrue(os.path.exists(cache.path_for('third')))
+
+    def test_writes_below_the_limit_do_not_scan_the_directory(self):
+        with open(os.path.join(self.tmp_dir.name, 'existing.mp3'), 'wb') as f:
+            f.write(b'x' * 10)
+        cache = SpeechCache(self.tmp_dir.name, max_bytes=35)
+
+        with mock.patch('google_ai.tts.os.scandir', wraps=os.scandir) as mock_scandir:
+            cache.put('first', b'x' * 10)
+            cache.put('first', b'x' * 10)
+            cache.put('second', b'x' * 10)
+            mock_scandir.assert_not_called()
+            cache.put('third', b'x' * 10)
+            mock_scandir.assert_called_once()
+
+        self.assertLessEqual(sum(os.path.getsize(os.path.join(self.tmp_dir.name, name))
+                                 for name in os.listdir(self.tmp_dir.name)), 35)
+
+
+if __name__ == '__main__':
+    unittest.main()
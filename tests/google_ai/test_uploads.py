@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from app import create_app
+from google_ai.uploads import upload_file, upload_cache
+
+
+class TestUploadCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        upload_cache.clear()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.first = self._write('first.wav', b'RIFF-same-bytes')
+        self.copy = self._write('copy.wav', b'RIFF-same-bytes')
+
+    def tearDown(self):
+        upload_cache.clear()
+        self.tmp_dir.cleanup()
+        self.app_context.pop()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    @mock.patch('google_ai.uploads.genai')
+    def test_identical_content_is_uploaded_once(self, mock_genai):
+        mock_genai.upload_file.return_value = mock.Mock(
+            expiration_time=datetime.now(timezone.utc) + timedelta(hours=48))
+
+        first = upload_file(self.first, mime_type="audio/wav")
+        second = upload_file(self.copy, mime_type="audio/wav")
+
+        self.assertIs(first, second)
+        mock_genai.upload_file.assert_called_once_with(self.first, mime_type="audio/wav")
+        self.assertEqual(upload_cache.stats()['hits'], 1)
+
+        upload_file(self.copy, mime_type="audio/ogg")
+        self.assertEqual(mock_genai.upload_file.call_count, 2)
+
+    @mock.patch('google_ai.uploads.genai')
+    def test_expiring_handle_is_uploaded_again(self, mock_genai):
+        mock_genai.upload_file.return_value = mock.Mock(
+            expiration_time=datetime.now(timezone.utc) + timedelta(minutes=30))
+
+        upload_file(self.first, mime_type="audio/wav")
+        upload_file(self.first, mime_type="audio/wav")
+
+        self.assertEqual(mock_genai.upload_file.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
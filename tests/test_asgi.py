@@ -0,0 +1,132 @@
+import asyncio
+import io
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+from app import create_app, db
+from app.asgi import StreamingEvaluationApp, build_environ
+from app.models import Answer, PrepSession, Question, Quiz, User
+
+
+async def _call(app, method, path, body=b'', boundary='x', cookie=None):
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'root_path': '',
+        'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+        'headers': [(b'host', b'testserver'),
+                    (b'content-type', f'multipart/form-data; boundary={boundary}'.encode())]
+    }
+    if cookie:
+        scope['headers'].append((b'cookie', cookie.encode()))
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestStreamingEvaluationApp(unittest.TestCase):
+
+    def setUp(self):
+        self.app = StreamingEvaluationApp(create_app('testing'))
+
+    def test_evaluation_requires_login(self):
+        sent = asyncio.run(_call(self.app, 'POST', '/quiz-session/evaluate_audio'))
+        self.assertEqual(sent[0]['status'], 401)
+        self.assertEqual(json.loads(sent[1]['body']), {'error': 'Unauthorized'})
+
+    def test_other_routes_are_served_by_flask(self):
+        sent = asyncio.run(_call(self.app, 'GET', '/about'))
+        self.assertEqual(sent[0]['status'], 200)
+
+    def test_build_environ_maps_headers(self):
+        scope = {'method': 'POST', 'path': '/x', 'query_string': b'a=1',
+                 'headers': [(b'content-type', b'text/plain'), (b'accept', b'a'), (b'accept', b'b')]}
+        environ = build_environ(scope, b'hello')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['CONTENT_LENGTH'], '5')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'a,b')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+
+
+class TestAuthenticatedStreamingEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        flask_app = create_app('testing')
+        flask_app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', UPLOAD_FOLDER=self.tmp_dir.name)
+        self.flask_app = flask_app
+        self.app = StreamingEvaluationApp(flask_app)
+        self.app_context = flask_app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('learner@example.com', first_name='Ana')
+        quiz = Quiz('German', user.id, lng='en', target_lng='de', type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.flush()
+        self.question = Question(quiz_id=quiz.id, question_text='Wie geht es dir?', answer='Gut',
+                                 difficulty_level='medium')
+        self.prep_session = PrepSession(user_id=user.id, quiz_id=quiz.id, status='in_progress')
+        db.session.add_all([self.question, self.prep_session])
+        db.session.commit()
+
+        serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.cookie = f"{flask_app.config['SESSION_COOKIE_NAME']}=" + serializer.dumps(
+            {'_user_id': user.id, '_fresh': True, 'user': user.to_dict()})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp_dir.cleanup()
+
+    @mock.patch('app.quiz_session.routes.empty_answer_feedback', return_value=None)
+    @mock.patch('app.quiz_session.routes.evaluate_audio_answer_async')
+    def test_streams_feedback_and_stores_answer(self, mock_evaluate, _):
+        in_transaction = []
+
+        async def chunks(*args):
+            # The request's connection is back in the pool while the model streams
+            in_transaction.append(db.session().in_transaction())
+            for chunk in ('Gut gemacht!', '\n####\nCorrectness:8\nCompleteness:', '7'):
+                yield chunk
+        mock_evaluate.side_effect = chunks
+
+        _, body = encode_multipart({
+            'question_id': self.question.id, 'session_id': self.prep_session.id,
+            'audio': FileStorage(io.BytesIO(b'RIFF\x00\x00\x00\x00WAVEfmt '), 'answer.wav')
+        }, boundary='boundary')
+        sent = asyncio.run(_call(self.app, 'POST', '/quiz-session/evaluate_audio', body, boundary='boundary',
+                                 cookie=self.cookie))
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/plain; charset=utf-8'), sent[0]['headers'])
+        self.assertNotIn(b'content-length', dict(sent[0]['headers']))
+        self.assertEqual(b''.join(message.get('body', b'') for message in sent[1:]), b'Gut gemacht!\n')
+        self.assertEqual(in_transaction, [False])
+        answer = Answer.query.one()
+        self.assertEqual((answer.feedback, answer.correctness, answer.completeness), ('Gut gemacht!', 8.0, 7.0))
+
+    def test_before_request_hooks_run(self):
+        self.flask_app.before_request(lambda: ('Down for maintenance', 503))
+
+        sent = asyncio.run(_call(self.app, 'POST', '/quiz-session/evaluate_audio', cookie=self.cookie))
+
+        self.assertEqual(sent[0]['status'], 503)
+        self.assertEqual(sent[1]['body'], b'Down for maintenance')
+        self.assertEqual(Answer.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+from werkzeug.datastructures import FileStorage
+
+from app.utils.audio_ingest import AudioIngestError, ingest_audio, sniff_audio_mime
+
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), 'files', 'audio')
+
+
+class TestAudioIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _upload(self, data, filename='recording.wav'):
+        return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+    def test_streams_upload_with_hash_size_and_format(self):
+        with open(os.path.join(AUDIO_DIR, 'german_howareyou.wav'), 'rb') as f:
+            data = f.read()
+
+        audio = ingest_audio(self._upload(data), self.tmp_dir.name, chunk_size=1000)
+
+        self.assertEqual(audio.size, len(data))
+        self.assertEqual(audio.sha256, hashlib.sha256(data).hexdigest())
+        # Browser recordings are WebM even when the upload is named .wav
+        self.assertEqual(audio.mime_type, 'audio/webm')
+        self.assertTrue(audio.path.endswith('.wav'))
+        with open(audio.path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_rejects_empty_upload(self):
+        with self.assertRaisesRegex(AudioIngestError, 'empty'):
+            ingest_audio(self._upload(b''), self.tmp_dir.name)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_rejects_oversize_upload_without_leaving_files(self):
+        with self.assertRaisesRegex(AudioIngestError, 'too large'):
+            ingest_audio(self._upload(b'x' * 5000), self.tmp_dir.name, max_bytes=4096, chunk_size=1024)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_sniff_audio_mime(self):
+        self.assertEqual(sniff_audio_mime(b'RIFF\x00\x00\x00\x00WAVEfmt '), 'audio/wav')
+        self.assertEqual(sniff_audio_mime(b'OggS\x00\x02'), 'audio/ogg')
+        self.assertEqual(sniff_audio_mime(b'ID3\x04\x00'), 'audio/mpeg')
+        self.assertEqual(sniff_audio_mime(b'\x00\x00\x00\x20ftypM4A '), 'audio/mp4')
+        self.assertIsNone(sniff_audio_mime(b'hello world'))
+
+    def test_unknown_extension_is_taken_from_format(self):
+        audio = ingest_audio(self._upload(b'OggS' + b'\x00' * 100, filename='blob'), self.tmp_dir.name)
+        self.assertTrue(audio.path.endswith('.ogg'))
+
+
+if __name__ == '__main__':
+    unittest.main()
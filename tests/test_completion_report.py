@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+
+from app import create_app, db
+from app.models import Answer, PrepSession, Question, Quiz, User
+from app.utils.query_counter import count_queries
+from app.utils.user_cache import get_user_cache
+
+
+class TestCompletionReport(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(email='learner@example.com')
+        db.session.add(user)
+        db.session.flush()
+        quiz = Quiz('Biology', user.id, type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.flush()
+        prep_session = PrepSession(user_id=user.id, quiz_id=quiz.id, status='in_progress')
+        db.session.add(prep_session)
+        db.session.commit()
+        self.user_id, self.quiz_id, self.session_id = user.id, quiz.id, prep_session.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = self.user_id
+            session['_fresh'] = True
+            session['user'] = user.to_dict()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_answers(self, count):
+        start = datetime(2026, 1, 1) + timedelta(hours=db.session.query(Answer).count())
+        for i in range(count):
+            question = Question(quiz_id=self.quiz_id, question_text=f'Question text {i}', answer='A',
+                                position=i, difficulty_level='medium')
+            db.session.add(question)
+            db.session.flush()
+            db.session.add(Answer(user_id=self.user_id, question_id=question.id, prep_session_id=self.session_id,
+                                  answer_text=f'Answer text {i}', date=start + timedelta(minutes=i)))
+        db.session.commit()
+        db.session.remove()
+
+    def _get(self, url):
+        g.pop('_login_user', None)
+        get_user_cache().clear()
+        with count_queries() as stats:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return stats.count, response
+
+    def test_report_query_count_does_not_depend_on_answer_count(self):
+        self._add_answers(2)
+        # The first visit marks the session completed
+        self._get(f'/quiz-session/complete/{self.session_id}')
+        few, _ = self._get(f'/quiz-session/complete/{self.session_id}')
+
+        self._add_answers(20)
+        many, response = self._get(f'/quiz-session/complete/{self.session_id}')
+
+        self.assertEqual(few, many)
+        self.assertIn(b'Question text 19', response.data)
+
+    def test_language_practice_report_renders_question_text(self):
+        self._add_answers(3)
+        _, response = self._get(f'/language-practice/complete/{self.session_id}')
+        self.assertIn(b'Question text 2', response.data)
+
+    def test_json_report_is_paginated(self):
+        self._add_answers(5)
+
+        _, response = self._get(f'/quiz-session/complete/{self.session_id}/report?per_page=2')
+        first = response.get_json()
+        self.assertEqual([a['question_text'] for a in first['answers']], ['Question text 0', 'Question text 1'])
+        self.assertEqual(first['next_page'], 2)
+
+        _, response = self._get(f'/quiz-session/complete/{self.session_id}/report?per_page=2&page=3')
+        last = response.get_json()
+        self.assertEqual([a['answer_text'] for a in last['answers']], ['Answer text 4'])
+        self.assertIsNone(last['next_page'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.utils.evaluation_cache import (MemoryEvaluationCache, SQLEvaluationCache, make_evaluation_key)
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_key_ignores_case_and_whitespace(self):
+        first = make_evaluation_key("What?", "Light", "  Photosynthesis  uses light", "model", "v1")
+        second = make_evaluation_key("What?", "Light", "photosynthesis uses LIGHT", "model", "v1")
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, make_evaluation_key("What?", "Light", "photosynthesis uses light", "model", "v2"))
+        self.assertNotEqual(first, make_evaluation_key("What?", "Light", "photosynthesis uses light", "other", "v1"))
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = MemoryEvaluationCache(max_size=2)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        self.assertEqual(cache.get("a"), "A")
+        cache.set("c", "C")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_memory_cache_expires_entries(self):
+        cache = MemoryEvaluationCache(ttl_seconds=10)
+        with mock.patch('app.utils.evaluation_cache.time.monotonic', return_value=100):
+            cache.set("a", "A")
+        with mock.patch('app.utils.evaluation_cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get("a"))
+
+    def test_get_or_compute_only_computes_once(self):
+        cache = MemoryEvaluationCache()
+        compute = mock.Mock(return_value="feedback####Correctness:5")
+        self.assertEqual(cache.get_or_compute("key", compute), "feedback####Correctness:5")
+        self.assertEqual(cache.get_or_compute("key", compute), "feedback####Correctness:5")
+        compute.assert_called_once()
+
+    def test_sql_cache_round_trip_and_prune(self):
+        cache = SQLEvaluationCache(db.engine, max_size=2, prune_interval=1)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        self.assertEqual(cache.get("a"), "A")
+        cache.set("c", "C")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
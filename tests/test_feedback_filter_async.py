@@ -0,0 +1,25 @@
+import asyncio
+import unittest
+from app.utils.feedback_filter import filter_feedback_stream_async
+
+
+async def _collect(chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return [chunk async for chunk in filter_feedback_stream_async(stream())]
+
+
+class TestFeedbackFilterAsync(unittest.TestCase):
+
+    def test_separator_split_across_chunks(self):
+        filtered = asyncio.run(_collect(["This is a ", "test #", "#", "# with ", "separator split"]))
+        self.assertEqual(filtered, ["This is a ", "test "])
+
+    def test_no_separator(self):
+        filtered = asyncio.run(_collect(["This is ", "a test ", "without separator"]))
+        self.assertEqual(filtered, ["This is ", "a test ", "without separator"])
+
+
+if __name__ == '__main__':
+    unittest.main()
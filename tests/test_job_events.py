@@ -0,0 +1,126 @@
+import json
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.jobs.handlers import GENERATE_QUESTIONS_JOB
+from app.jobs.queue import claim_next, enqueue, run_job
+from app.models import Job, JobStatus, Question, Quiz, User
+
+
+def parse_events(body):
+    """The (event, id, data) of each message in an SSE response body, comments skipped."""
+    events = []
+    for message in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.split('\n') if not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return events
+
+
+class TestJobEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', JOB_EVENTS_POLL_INTERVAL=0)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('teacher@example.com', first_name='Ana')
+        self.user_id = user.id
+        quiz = Quiz('Kiara', user.id, type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.commit()
+        self.quiz_id = quiz.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = self.user_id
+            session['_fresh'] = True
+            session['user'] = user.to_dict()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_job(self, status, done=0, total=2):
+        job = enqueue(GENERATE_QUESTIONS_JOB, {'quiz_id': self.quiz_id, 'image_paths': []},
+                      user_id=self.user_id, quiz_id=self.quiz_id)
+        job.status = status
+        job.progress_done = done
+        job.progress_total = total
+        db.session.commit()
+        return job.id
+
+    def add_questions(self, count):
+        return Question.bulk_create(self.quiz_id, [
+            {'question_text': f'Q{i}?', 'answer': f'A{i}', 'difficulty_level': 'easy'} for i in range(count)
+        ])
+
+    def test_finished_job_streams_new_questions_and_done(self):
+        self.add_questions(3)
+        db.session.commit()
+        job_id = self.create_job(JobStatus.SUCCEEDED, done=2)
+
+        response = self.client.get(f'/jobs/{job_id}/events?after=1')
+
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        events = parse_events(response.get_data(as_text=True))
+        self.assertEqual([(event, event_id) for event, event_id, _ in events],
+                         [('question', '2'), ('question', '3'), ('progress', None), ('done', None)])
+        self.assertEqual(events[0][2]['question_text'], 'Q1?')
+        self.assertIn('/edit_question/', events[0][2]['edit_url'])
+        self.assertEqual(events[2][2]['percentage'], 100)
+        self.assertEqual(events[3][2]['status'], JobStatus.SUCCEEDED)
+
+    def test_reconnect_resumes_after_last_event_id(self):
+        self.add_questions(3)
+        db.session.commit()
+        job_id = self.create_job(JobStatus.SUCCEEDED, done=2)
+
+        response = self.client.get(f'/jobs/{job_id}/events', headers={'Last-Event-ID': '2'})
+
+        events = parse_events(response.get_data(as_text=True))
+        self.assertEqual([data['position'] for event, _, data in events if event == 'question'], [3])
+
+    def test_running_job_stream_ends_after_max_seconds(self):
+        self.app.config['JOB_EVENTS_MAX_SECONDS'] = 0
+        self.add_questions(1)
+        db.session.commit()
+        job_id = self.create_job(JobStatus.RUNNING, done=1)
+
+        response = self.client.get(f'/jobs/{job_id}/events')
+
+        events = parse_events(response.get_data(as_text=True))
+        self.assertEqual([event for event, _, _ in events], ['question', 'progress'])
+        self.assertEqual(events[1][2]['percentage'], 50)
+
+    def test_events_of_another_users_job_are_forbidden(self):
+        other = User.create('other@example.com', first_name='Ivo')
+        job = enqueue(GENERATE_QUESTIONS_JOB, {'quiz_id': self.quiz_id}, user_id=other.id, quiz_id=self.quiz_id)
+        db.session.commit()
+
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/events').status_code, 403)
+
+    def test_failed_attempt_discards_committed_questions(self):
+        def generate(image_paths, quiz_id, on_page_done=None, on_questions_saved=None):
+            on_questions_saved(self.add_questions(2))
+            raise RuntimeError("Model call failed")
+
+        job = enqueue(GENERATE_QUESTIONS_JOB, {'quiz_id': self.quiz_id, 'image_paths': ['page.jpg']},
+                      user_id=self.user_id, quiz_id=self.quiz_id)
+        db.session.commit()
+
+        with mock.patch('app.quiz.routes.generate_and_save_questions', side_effect=generate):
+            run_job(claim_next('worker-1'))
+
+        self.assertEqual(db.session.get(Job, job.id).status, JobStatus.QUEUED)
+        self.assertEqual(Question.query.filter_by(quiz_id=self.quiz_id).count(), 0)
+        self.assertEqual(db.session.get(Quiz, self.quiz_id).question_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from app import create_app, db
+from app.jobs.handlers import enqueue_question_generation
+from app.jobs.queue import job_handler, enqueue, claim_next, run_inline, run_job, retry, run_worker, update_progress
+from app.models import Job, JobStatus
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.calls = []
+
+        @job_handler('test_echo')
+        def echo(job, payload):
+            self.calls.append(payload)
+            update_progress(job, 1, 1)
+            return {'echo': payload['value']}
+
+        @job_handler('test_fail')
+        def fail(job, payload):
+            self.calls.append(payload)
+            raise ValueError("boom")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_enqueue_claim_and_run(self):
+        job = enqueue('test_echo', {'value': 42})
+        db.session.commit()
+
+        claimed = claim_next('worker-1')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, JobStatus.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next('worker-2'))
+
+        run_job(claimed)
+        job = db.session.get(Job, job.id)
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.get_result(), {'echo': 42})
+        self.assertEqual(job.progress_percentage, 100)
+
+    def test_idempotency_key_returns_existing_job(self):
+        first = enqueue('test_echo', {'value': 1}, idempotency_key='same')
+        second = enqueue('test_echo', {'value': 2}, idempotency_key='same')
+        db.session.commit()
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Job.query.count(), 1)
+
+    def test_question_generation_key_follows_image_contents(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            page = os.path.join(tmp_dir, 'page1.jpg')
+            with open(page, 'wb') as f:
+                f.write(b'first page')
+            first = enqueue_question_generation('quiz-1', [page], user_id=None)
+            db.session.commit()
+            self.assertEqual(enqueue_question_generation('quiz-1', [page], user_id=None).id, first.id)
+
+            with open(page, 'wb') as f:
+                f.write(b'another page')
+            second = enqueue_question_generation('quiz-1', [page], user_id=None)
+            db.session.commit()
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(Job.query.count(), 2)
+
+    def test_failed_job_is_retried_until_max_attempts(self):
+        job = enqueue('test_fail', {'value': 1}, max_attempts=2)
+        db.session.commit()
+
+        run_job(claim_next('worker-1'))
+        job = db.session.get(Job, job.id)
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertEqual(job.error, "boom")
+
+        # Skip the retry backoff
+        job.run_after = None
+        db.session.commit()
+
+        run_job(claim_next('worker-1'))
+        job = db.session.get(Job, job.id)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(len(self.calls), 2)
+
+        retry(job)
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertEqual(job.attempts, 0)
+
+    def test_inline_run_claims_the_job_and_runs_it_once(self):
+        job = enqueue('test_echo', {'value': 1}, idempotency_key='same')
+        db.session.commit()
+
+        job = run_inline(job)
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.attempts, 1)
+
+        # The same upload again gets the finished job back, which is not run a second time
+        again = enqueue('test_echo', {'value': 1}, idempotency_key='same')
+        self.assertEqual(run_inline(again).status, JobStatus.SUCCEEDED)
+        self.assertEqual(run_job(again).status, JobStatus.SUCCEEDED)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_failed_inline_run_fails_the_job(self):
+        job = enqueue('test_fail', {'value': 1})
+        db.session.commit()
+
+        job = run_inline(job)
+        self.assertEqual((job.status, job.attempts, job.error), (JobStatus.FAILED, 1, "boom"))
+
+        retry(job)
+        job = run_inline(job)
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 1))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_run_worker_once_drains_queue(self):
+        for value in range(3):
+            enqueue('test_echo', {'value': value})
+        db.session.commit()
+
+        self.assertEqual(run_worker(once=True), 3)
+        self.assertEqual(Job.query.filter_by(status=JobStatus.SUCCEEDED).count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+
+from app import create_app, db
+from app.models import Answer, PrepSession, Question, Quiz, User
+from app.quiz.routes import MY_SESSIONS_PAGE_SIZE
+from app.utils.query_counter import assert_max_queries, count_queries
+from app.utils.user_cache import get_user_cache
+
+
+class TestMySessions(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(email='learner@example.com')
+        db.session.add(self.user)
+        db.session.commit()
+        self.user_id = self.user.id
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = self.user_id
+            session['_fresh'] = True
+            session['user'] = self.user.to_dict()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _create_sessions(self, count, start=datetime(2026, 1, 1)):
+        for i in range(count):
+            quiz = Quiz(f'Quiz {i}', self.user_id, type='QUESTIONS')
+            db.session.add(quiz)
+            db.session.flush()
+            question = Question(quiz_id=quiz.id, question_text='Q', answer='A', position=0,
+                                difficulty_level='medium')
+            db.session.add(question)
+            quiz.question_count = 1
+            prep_session = PrepSession(user_id=self.user_id, quiz_id=quiz.id, status='in_progress',
+                                       start_time=start + timedelta(minutes=i))
+            db.session.add(prep_session)
+            db.session.flush()
+            db.session.add(Answer(user_id=self.user_id, question_id=question.id,
+                                  prep_session_id=prep_session.id, answer_text='text'))
+            prep_session.answered_count = 1
+        db.session.commit()
+        db.session.remove()
+
+    def _count_queries(self, url):
+        # Requests share the test's app context, drop the user Flask-Login cached on g
+        g.pop('_login_user', None)
+        get_user_cache().clear()
+        with count_queries() as stats:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return stats.count, response
+
+    def test_query_count_does_not_depend_on_session_count(self):
+        self._create_sessions(2)
+        few, _ = self._count_queries('/quiz/my-sessions')
+
+        self._create_sessions(20, start=datetime(2026, 2, 1))
+        many, response = self._count_queries('/quiz/my-sessions')
+
+        self.assertEqual(few, many)
+        self.assertIn(b'1/1', response.data)
+        self.assertIn(b'Quiz 19', response.data)
+
+    def test_query_budget(self):
+        self._create_sessions(30)
+        g.pop('_login_user', None)
+        # Loading the user and the page query
+        with assert_max_queries(2):
+            self.client.get('/quiz/my-sessions')
+
+    def test_unknown_counters_are_computed_in_the_same_query(self):
+        self._create_sessions(1)
+        db.session.execute(PrepSession.__table__.update().values(answered_count=None))
+        db.session.execute(Quiz.__table__.update().values(question_count=None))
+        db.session.commit()
+
+        _, response = self._count_queries('/quiz/my-sessions')
+        self.assertIn(b'1/1', response.data)
+
+    def test_keyset_pagination(self):
+        self._create_sessions(MY_SESSIONS_PAGE_SIZE + 5)
+
+        first = self.client.get('/quiz/my-sessions').get_data(as_text=True)
+        self.assertIn(f'Quiz {MY_SESSIONS_PAGE_SIZE + 4}<', first)
+        self.assertNotIn('Quiz 4<', first)
+        self.assertIn('Older sessions', first)
+
+        cursor = first.split('before=')[1].split('"')[0]
+        second = self.client.get(f'/quiz/my-sessions?before={cursor}').get_data(as_text=True)
+        self.assertIn('Quiz 4<', second)
+        self.assertIn('Quiz 0<', second)
+        self.assertNotIn('Quiz 5<', second)
+        self.assertNotIn('Older sessions', second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.models import PageScan, Quiz, User
+from app.quiz.routes import generate_and_save_questions
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'files', 'images')
+
+
+def streamed(questions):
+    """Fake generate_questions_timed that hands the questions over like a streamed response."""
+    def generate(image_paths, **kwargs):
+        if questions:
+            kwargs['on_questions'](questions)
+        return questions, []
+    return generate
+
+
+class TestPageImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', UPLOAD_FOLDER=self.tmp_dir,
+                               PAGE_IMAGE_WORKERS=1)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('learner@example.com', first_name='Ana')
+        self.quiz = Quiz('Kiara', user.id, type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.flush()
+        self.path = os.path.join(self.tmp_dir, 'kiara-geschichte-0.jpg')
+        shutil.copy(os.path.join(IMAGES_DIR, 'kiara-geschichte-0.jpg'), self.path)
+        db.session.add(PageScan(quiz_id=self.quiz.id, file_name='kiara-geschichte-0.jpg'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.tmp_dir)
+
+    @mock.patch('app.quiz.routes.generate_questions_timed')
+    def test_processed_pages_are_sent_and_sizes_recorded(self, mock_generate):
+        mock_generate.side_effect = streamed([{'page_nr': 1, 'question': 'Wer ist Kiara?', 'answer': 'Ein Mädchen',
+                                               'difficulty_level': 'easy'}])
+
+        created = generate_and_save_questions([self.path], self.quiz.id)
+        db.session.commit()
+
+        self.assertEqual(created, 1)
+        [sent_paths] = mock_generate.call_args.args
+        self.assertEqual(sent_paths, [os.path.join(self.tmp_dir, 'kiara-geschichte-0.page.jpg')])
+        page_scan = PageScan.query.one()
+        self.assertEqual(page_scan.original_bytes, os.path.getsize(self.path))
+        self.assertEqual(page_scan.processed_bytes, os.path.getsize(sent_paths[0]))
+        self.assertLess(page_scan.processed_bytes, page_scan.original_bytes)
+
+    @mock.patch('app.quiz.routes.generate_questions_timed')
+    def test_questions_are_linked_to_their_page_scan(self, mock_generate):
+        second_path = os.path.join(self.tmp_dir, 'page-2.jpg')
+        shutil.copy(self.path, second_path)
+        second_page = PageScan(quiz_id=self.quiz.id, file_name='page-2.jpg')
+        db.session.add(second_page)
+        db.session.commit()
+        mock_generate.side_effect = streamed([
+            {'page_nr': 2, 'question': 'Q2?', 'answer': 'A', 'difficulty_level': 'easy'},
+            {'page_nr': None, 'question': 'Q?', 'answer': 'A', 'difficulty_level': 'easy'},
+        ])
+
+        generate_and_save_questions([self.path, second_path], self.quiz.id)
+        db.session.commit()
+
+        linked = {question.question_text: question.page_scan_id for question in self.quiz.questions}
+        self.assertEqual(linked, {'Q2?': second_page.id, 'Q?': None})
+
+    @mock.patch('app.quiz.routes.generate_questions_timed', return_value=(None, []))
+    def test_preprocessing_can_be_disabled(self, mock_generate):
+        self.app.config['PAGE_IMAGE_PREPROCESSING'] = False
+
+        generate_and_save_questions([self.path], self.quiz.id)
+
+        self.assertEqual(mock_generate.call_args.args[0], [self.path])
+        self.assertIsNone(PageScan.query.one().processed_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
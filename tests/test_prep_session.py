@@ -0,0 +1,130 @@
+import unittest
+
+from app import create_app, db
+from app.models import Answer, AnsweredQuestion, PrepSession, Question, Quiz, User
+from app.quiz_session.routes import store_answer
+from app.utils.query_counter import count_queries
+
+
+class TestPrepSession(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(email='learner@example.com')
+        db.session.add(self.user)
+        db.session.flush()
+        self.quiz = Quiz('Biology', self.user.id, type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.flush()
+        self.questions = [Question(quiz_id=self.quiz.id, question_text=f'Q{i}', answer='A', position=i,
+                                   difficulty_level='medium')
+                          for i in range(3)]
+        db.session.add_all(self.questions)
+        self.prep_session = PrepSession(user_id=self.user.id, quiz_id=self.quiz.id, status='in_progress')
+        db.session.add(self.prep_session)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _answer(self, question, prep_session=None):
+        db.session.add(Answer(user_id=self.user.id, question_id=question.id,
+                              prep_session_id=(prep_session or self.prep_session).id, answer_text='text'))
+        db.session.commit()
+
+    def test_current_question_skips_answered_questions(self):
+        self.assertEqual(self.prep_session.get_current_question().id, self.questions[0].id)
+
+        self._answer(self.questions[0])
+        self._answer(self.questions[0])
+        self.assertEqual(self.prep_session.get_current_question().id, self.questions[1].id)
+
+        self._answer(self.questions[2])
+        self.assertEqual(self.prep_session.get_current_question().id, self.questions[1].id)
+
+        self._answer(self.questions[1])
+        self.assertIsNone(self.prep_session.get_current_question())
+
+    def test_answers_of_other_sessions_are_ignored(self):
+        other = PrepSession(user_id=self.user.id, quiz_id=self.quiz.id, status='in_progress')
+        db.session.add(other)
+        db.session.commit()
+        self._answer(self.questions[0], other)
+
+        self.assertEqual(self.prep_session.get_current_question().id, self.questions[0].id)
+
+    def test_current_question_is_a_single_query(self):
+        for question in self.questions[:2]:
+            self._answer(question)
+        db.session.expire_all()
+
+        with count_queries() as stats:
+            self.assertEqual(self.prep_session.get_current_question().id, self.questions[2].id)
+
+        # One refresh of the expired session row plus the anti-join itself
+        self.assertEqual(len([s for s in stats.statements if 'FROM answer' in s and 'EXISTS' not in s]), 0)
+        self.assertEqual(len([s for s in stats.statements if 'EXISTS' in s]), 1)
+
+    def test_store_answer_counts_each_question_once(self):
+        Quiz.adjust_question_count(self.quiz.id, len(self.questions))
+        db.session.commit()
+
+        for question in (self.questions[0], self.questions[0], self.questions[1]):
+            store_answer(self.user.id, question.id, self.prep_session.id, 'answer.wav', 'Good')
+
+        db.session.refresh(self.prep_session)
+        self.assertEqual(self.prep_session.answered_count, 2)
+        self.assertEqual(self.prep_session.get_distinct_answered_questions_count(), 2)
+        self.assertEqual(self.prep_session.get_total_quiz_questions_count(), 3)
+
+    def test_answer_recorded_concurrently_is_not_counted_twice(self):
+        # Another request recorded the first answer after this one started
+        db.session.add(AnsweredQuestion(prep_session_id=self.prep_session.id, question_id=self.questions[0].id))
+        db.session.execute(PrepSession.__table__.update().values(answered_count=1))
+        db.session.commit()
+
+        store_answer(self.user.id, self.questions[0].id, self.prep_session.id, 'answer.wav', 'Good')
+
+        db.session.refresh(self.prep_session)
+        self.assertEqual(self.prep_session.answered_count, 1)
+        self.assertEqual(Answer.query.filter_by(prep_session_id=self.prep_session.id).count(), 1)
+
+    def test_unknown_counters_fall_back_to_live_counts(self):
+        self._answer(self.questions[0])
+        self.prep_session.answered_count = None
+        self.quiz.question_count = None
+        db.session.commit()
+
+        self.assertEqual(self.prep_session.get_distinct_answered_questions_count(), 1)
+        self.assertEqual(self.prep_session.get_total_quiz_questions_count(), 3)
+
+    def test_repair_recomputes_counters(self):
+        # Answers added without store_answer leave the counters stale
+        self._answer(self.questions[0])
+        self._answer(self.questions[1])
+        self._answer(self.questions[1])
+
+        Quiz.repair_question_counts()
+        PrepSession.repair_answered_counts()
+        db.session.commit()
+
+        db.session.refresh(self.quiz)
+        db.session.refresh(self.prep_session)
+        self.assertEqual(self.quiz.question_count, 3)
+        self.assertEqual(self.prep_session.answered_count, 2)
+
+        # The repaired session does not count an answered question again
+        store_answer(self.user.id, self.questions[1].id, self.prep_session.id, 'answer.wav', 'Good')
+        db.session.refresh(self.prep_session)
+        self.assertEqual(self.prep_session.answered_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from app import create_app, db
+from app.models import Quiz, User
+from app.utils.query_counter import assert_max_queries, count_queries, statement_shape
+
+
+class TestQueryCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_statement_shape_collapses_in_lists_and_whitespace(self):
+        self.assertEqual(statement_shape("SELECT *\n  FROM quiz WHERE id IN (?, ?, ?)"),
+                         "SELECT * FROM quiz WHERE id IN (?)")
+        self.assertEqual(statement_shape("SELECT * FROM quiz WHERE id IN (?)"),
+                         "SELECT * FROM quiz WHERE id IN (?)")
+
+    def test_counts_and_groups_repeated_statements(self):
+        with count_queries() as stats:
+            for i in range(3):
+                db.session.get(User, str(i))
+            Quiz.query.count()
+
+        self.assertEqual(stats.count, 4)
+        self.assertGreaterEqual(stats.duration, 0)
+        repeated = stats.repeated_shapes(3)
+        self.assertEqual(len(repeated), 1)
+        self.assertIn('FROM user', repeated[0][0])
+        self.assertEqual(repeated[0][1], 3)
+
+    def test_nested_collectors_both_count(self):
+        with count_queries() as outer:
+            Quiz.query.count()
+            with count_queries() as inner:
+                Quiz.query.count()
+        self.assertEqual(outer.count, 2)
+        self.assertEqual(inner.count, 1)
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1):
+            Quiz.query.count()
+
+        with self.assertRaises(AssertionError) as ctx:
+            with assert_max_queries(1):
+                Quiz.query.count()
+                Quiz.query.count()
+        self.assertIn('Expected at most 1 queries, got 2', str(ctx.exception))
+
+    def test_request_headers_and_n_plus_one_warning(self):
+        app = create_app('testing')
+        app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', QUERY_COUNTER_ENABLED=True,
+                          QUERY_COUNTER_N_PLUS_ONE_THRESHOLD=3)
+
+        @app.route('/_n_plus_one')
+        def n_plus_one():
+            for i in range(4):
+                db.session.get(User, str(i))
+            return 'ok'
+
+        from app.utils.query_counter import init_query_counter
+        init_query_counter(app)
+
+        with app.app_context():
+            db.create_all()
+        with self.assertLogs(app.logger, level='WARNING') as logs:
+            response = app.test_client().get('/_n_plus_one')
+
+        self.assertEqual(response.headers['X-Query-Count'], '4')
+        self.assertIn('X-Query-Time-Ms', response.headers)
+        self.assertIn('Possible N+1 in GET /_n_plus_one', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from app import create_app, db
+from app.models import Question, Quiz, User
+from app.utils.query_counter import assert_max_queries
+
+
+class TestQuestionBulkInsert(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('teacher@example.com', first_name='Ana')
+        self.quiz = Quiz('Kiara', user.id, type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.commit()
+        self.quiz_id = self.quiz.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def rows(self, count):
+        return [{'question_text': f'Q{i}?', 'answer': f'A{i}', 'difficulty_level': 'easy'} for i in range(count)]
+
+    def test_questions_are_inserted_with_one_executemany(self):
+        with assert_max_queries(3):
+            ids = Question.bulk_create(self.quiz_id, self.rows(200))
+        db.session.commit()
+
+        self.assertEqual(len(set(ids)), 200)
+        questions = Question.query.filter_by(quiz_id=self.quiz_id).order_by(Question.position).all()
+        self.assertEqual([question.id for question in questions], ids)
+        self.assertEqual([question.position for question in questions], list(range(1, 201)))
+        self.assertEqual(db.session.get(Quiz, self.quiz_id).question_count, 200)
+
+    def test_positions_continue_after_existing_questions(self):
+        db.session.add(Question(quiz_id=self.quiz_id, question_text='Q', answer='A', position=7,
+                                difficulty_level='medium'))
+        db.session.flush()
+
+        Question.bulk_create(self.quiz_id, self.rows(2))
+
+        positions = [question.position for question in
+                     Question.query.filter_by(quiz_id=self.quiz_id).order_by(Question.position)]
+        self.assertEqual(positions, [7, 8, 9])
+
+    def test_rollback_discards_the_whole_batch(self):
+        Question.bulk_create(self.quiz_id, self.rows(5))
+        db.session.rollback()
+
+        self.assertEqual(Question.query.filter_by(quiz_id=self.quiz_id).count(), 0)
+        self.assertEqual(db.session.get(Quiz, self.quiz_id).question_count, 0)
+
+    def test_empty_list_is_a_no_op(self):
+        with assert_max_queries(0):
+            self.assertEqual(Question.bulk_create(self.quiz_id, []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
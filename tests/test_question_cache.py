@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app import create_app, db
+from app.models import PageScan, Question, QuestionCacheEntry, Quiz, User
+from app.quiz.routes import generate_and_save_questions
+from app.utils.question_cache import fingerprint_page, get_question_cache, make_question_cache_key
+from google_ai.config import DEFAULT_PRO_MODEL
+from google_ai.question_generator import PROMPT_VERSION
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'files', 'images')
+QUESTIONS = [{'page_nr': 1, 'question': 'Wer ist Kiara?', 'answer': 'Ein Mädchen', 'difficulty_level': 'easy'}]
+
+
+def streamed(questions):
+    """Fake generate_questions_timed that hands the questions over like a streamed response."""
+    def generate(image_paths, **kwargs):
+        if questions:
+            kwargs['on_questions'](questions)
+        return questions, []
+    return generate
+
+
+class TestQuestionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', UPLOAD_FOLDER=self.tmp_dir,
+                               PAGE_IMAGE_WORKERS=1, PAGE_IMAGE_PREPROCESSING=False)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User.create('teacher@example.com', first_name='Ana')
+        self.page = self.copy_page('kiara-geschichte-0.jpg', 'first.jpg')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.tmp_dir)
+
+    def copy_page(self, source, name):
+        path = os.path.join(self.tmp_dir, name)
+        shutil.copy(os.path.join(IMAGES_DIR, source), path)
+        return path
+
+    def new_quiz(self, *paths):
+        quiz = Quiz('Kiara', self.user.id, type='QUESTIONS')
+        db.session.add(quiz)
+        db.session.flush()
+        for path in paths:
+            db.session.add(PageScan(quiz_id=quiz.id, file_name=os.path.basename(path)))
+        db.session.commit()
+        return quiz
+
+    @mock.patch('app.quiz.routes.generate_questions_timed', side_effect=streamed(QUESTIONS))
+    def test_same_page_is_copied_from_cache(self, mock_generate):
+        generate_and_save_questions([self.page], self.new_quiz(self.page).id)
+        db.session.commit()
+        quiz = self.new_quiz(self.page)
+
+        created = generate_and_save_questions([self.page], quiz.id)
+        db.session.commit()
+
+        self.assertEqual(created, 1)
+        self.assertEqual(mock_generate.call_count, 1)
+        question = Question.query.filter_by(quiz_id=quiz.id).one()
+        self.assertEqual((question.question_text, question.answer, question.difficulty_level),
+                         ('Wer ist Kiara?', 'Ein Mädchen', 'easy'))
+        self.assertEqual(question.page_scan_id, PageScan.query.filter_by(quiz_id=quiz.id).one().id)
+        self.assertEqual(db.session.get(Quiz, quiz.id).question_count, 1)
+
+    @mock.patch('app.quiz.routes.generate_questions_timed', side_effect=streamed(QUESTIONS))
+    def test_rephotographed_page_hits_and_is_aliased(self, mock_generate):
+        generate_and_save_questions([self.page], self.new_quiz(self.page).id)
+        rescan = os.path.join(self.tmp_dir, 'rescan.jpg')
+        with Image.open(self.page) as image:
+            image.resize((image.width // 3, image.height // 3)).save(rescan, quality=60)
+
+        created = generate_and_save_questions([rescan], self.new_quiz(rescan).id)
+
+        self.assertEqual(created, 1)
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertEqual(get_question_cache().stats()['perceptual_hits'], 1)
+        alias_key = make_question_cache_key(fingerprint_page(rescan).sha256, DEFAULT_PRO_MODEL, PROMPT_VERSION)
+        self.assertIsNotNone(db.session.get(QuestionCacheEntry, alias_key))
+
+    @mock.patch('app.quiz.routes.generate_questions_timed')
+    def test_only_new_pages_are_generated(self, mock_generate):
+        mock_generate.side_effect = streamed(QUESTIONS)
+        generate_and_save_questions([self.page], self.new_quiz(self.page).id)
+        other_page = self.copy_page('kiara-geschichte-1 .jpg', 'second.jpg')
+        mock_generate.side_effect = streamed([{'page_nr': 1, 'question': 'Wohin geht Kiara?',
+                                               'answer': 'Nach Hause', 'difficulty_level': 'medium'}])
+        quiz = self.new_quiz(self.page, other_page)
+
+        created = generate_and_save_questions([self.page, other_page], quiz.id)
+        db.session.commit()
+
+        self.assertEqual(created, 2)
+        self.assertEqual(mock_generate.call_args.args[0], [other_page])
+        scans = {scan.file_name: scan.id for scan in PageScan.query.filter_by(quiz_id=quiz.id)}
+        linked = {question.question_text: question.page_scan_id for question in quiz.questions}
+        self.assertEqual(linked, {'Wer ist Kiara?': scans['first.jpg'], 'Wohin geht Kiara?': scans['second.jpg']})
+
+    def test_prompt_version_and_model_are_part_of_the_key(self):
+        cache = get_question_cache()
+        fingerprint = fingerprint_page(self.page)
+        cache.set(fingerprint, DEFAULT_PRO_MODEL, PROMPT_VERSION, QUESTIONS)
+
+        self.assertIsNone(cache.get(fingerprint, DEFAULT_PRO_MODEL, 'older-prompt'))
+        self.assertIsNone(cache.get(fingerprint, 'another-model', PROMPT_VERSION))
+        self.assertEqual(cache.get(fingerprint, DEFAULT_PRO_MODEL, PROMPT_VERSION),
+                         [{'question': 'Wer ist Kiara?', 'answer': 'Ein Mädchen', 'difficulty_level': 'easy'}])
+
+    def test_least_recently_used_entries_are_pruned(self):
+        cache = get_question_cache()
+        cache.max_size = 1
+        cache.set(fingerprint_page(self.page), DEFAULT_PRO_MODEL, PROMPT_VERSION, QUESTIONS)
+        other_page = self.copy_page('kiara-geschichte-1 .jpg', 'second.jpg')
+        cache.set(fingerprint_page(other_page), DEFAULT_PRO_MODEL, PROMPT_VERSION, QUESTIONS)
+
+        cache.prune()
+
+        self.assertEqual([entry.content_sha256 for entry in QuestionCacheEntry.query.all()],
+                         [fingerprint_page(other_page).sha256])
+
+    @mock.patch('app.quiz.routes.generate_questions_timed', side_effect=streamed(QUESTIONS))
+    def test_cache_can_be_disabled(self, mock_generate):
+        self.app.extensions['question_cache'] = None
+
+        generate_and_save_questions([self.page], self.new_quiz(self.page).id)
+        generate_and_save_questions([self.page], self.new_quiz(self.page).id)
+
+        self.assertEqual(mock_generate.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.models import Job, JobStatus, Question, Quiz, User
+from tests.test_page_images import streamed
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'files', 'images')
+
+
+class TestQuizUploadJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', UPLOAD_FOLDER=self.tmp_dir,
+                               WTF_CSRF_ENABLED=False, RUN_JOBS_INLINE=True, PAGE_IMAGE_PREPROCESSING=False,
+                               QUESTION_CACHE_ENABLED=False)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('teacher@example.com', first_name='Ana')
+        self.quiz = Quiz('Kiara', user.id, lng='de', type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.commit()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = user.id
+            session['_fresh'] = True
+            session['user'] = user.to_dict()
+
+        with open(os.path.join(IMAGES_DIR, 'kiara-geschichte-0.jpg'), 'rb') as f:
+            self.page = f.read()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.tmp_dir)
+
+    def upload(self, content, filename='page1.jpg'):
+        return self.client.post(f'/quiz/{self.quiz.id}/edit', data={
+            'title': 'Kiara', 'lng': 'de', 'type': 'QUESTIONS', 'images': (io.BytesIO(content), filename)
+        }, content_type='multipart/form-data')
+
+    @mock.patch('app.quiz.routes.generate_questions_timed')
+    def test_same_upload_again_does_not_generate_again(self, mock_generate):
+        mock_generate.side_effect = streamed([{'page_nr': 1, 'question': 'Wer ist Kiara?', 'answer': 'Ein Mädchen',
+                                               'difficulty_level': 'easy'}])
+
+        self.assertEqual(self.upload(self.page).status_code, 302)
+        self.assertEqual(self.upload(self.page).status_code, 302)
+
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertEqual(Question.query.filter_by(quiz_id=self.quiz.id).count(), 1)
+        self.assertEqual(Job.query.one().status, JobStatus.SUCCEEDED)
+        # The job deletes its images when done, the repeated upload's copy is deleted right away
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_pages_with_the_same_name_are_kept_apart(self):
+        self.app.config['RUN_JOBS_INLINE'] = False
+        self.upload(b'first page')
+        self.upload(b'second page')
+
+        contents = []
+        for job in Job.query.order_by(Job.created_date).all():
+            [path] = job.get_payload()['image_paths']
+            self.assertTrue(os.path.basename(path).endswith('-page1.jpg'))
+            with open(path, 'rb') as f:
+                contents.append(f.read())
+        self.assertEqual(contents, [b'first page', b'second page'])
+
+    @mock.patch('app.quiz.routes.generate_questions_timed', side_effect=RuntimeError('model unavailable'))
+    def test_failed_inline_job_is_not_left_queued(self, _):
+        self.upload(self.page)
+
+        job = Job.query.one()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import html
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app import create_app, db
+from app.language_practice.routes import generate_audio_evaluation as generate_language_evaluation
+from app.models import Answer, PrepSession, Question, Quiz, User
+from app.quiz_session.routes import generate_audio_evaluation
+from google_ai.audio_preprocessing import REPEAT_ANSWER_MESSAGES, ffmpeg_available, write_wav
+
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), 'files', 'audio')
+
+
+class TestSilentAnswer(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('learner@example.com', first_name='Ana')
+        self.quiz = Quiz('German', user.id, lng='de', target_lng='de', type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.flush()
+        self.question = Question(quiz_id=self.quiz.id, question_text='Wie geht es dir?', answer='Gut',
+                                 difficulty_level='medium')
+        self.prep_session = PrepSession(user_id=user.id, quiz_id=self.quiz.id, status='in_progress')
+        db.session.add_all([self.question, self.prep_session])
+        db.session.commit()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.audio_path = os.path.join(self.tmp_dir.name, 'silent.wav')
+        write_wav(self.audio_path, np.zeros(16000, dtype=np.float32), 16000)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @mock.patch('app.quiz_session.routes.evaluate_audio_answer')
+    def test_quiz_session_answers_silence_locally(self, mock_evaluate):
+        output = ''.join(generate_audio_evaluation(self.question, self.audio_path, self.prep_session.user_id,
+                                                   self.prep_session.id))
+
+        self.assertIn('noch einmal', output)
+        mock_evaluate.assert_not_called()
+        self.assertEqual(Answer.query.count(), 0)
+
+    @unittest.skipUnless(ffmpeg_available(), "ffmpeg is not installed")
+    @mock.patch('app.quiz_session.routes.evaluate_audio_answer')
+    def test_silent_browser_recording_is_answered_locally(self, mock_evaluate):
+        # The browser uploads WebM/Opus, labelled audio/wav
+        path = os.path.join(self.tmp_dir.name, 'answer.wav')
+        shutil.copy(os.path.join(AUDIO_DIR, 'no_text_audio.wav'), path)
+
+        output = ''.join(generate_audio_evaluation(self.question, path, self.prep_session.user_id,
+                                                   self.prep_session.id))
+
+        self.assertEqual(output, html.escape(REPEAT_ANSWER_MESSAGES['de']))
+        mock_evaluate.assert_not_called()
+        self.assertEqual(Answer.query.count(), 0)
+
+    @mock.patch('app.language_practice.routes.evaluate_language_audio')
+    def test_language_practice_answers_silence_locally(self, mock_evaluate):
+        self.quiz.lng = 'fr'
+        db.session.commit()
+
+        output = ''.join(generate_language_evaluation(self.question, self.audio_path, self.prep_session))
+
+        self.assertEqual(output, html.escape(REPEAT_ANSWER_MESSAGES['fr']))
+        mock_evaluate.assert_not_called()
+        self.assertEqual(Answer.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.language_practice.routes import generate_audio_evaluation as generate_language_evaluation
+from app.models import Answer, PrepSession, Question, Quiz, User
+from app.quiz_session.routes import generate_audio_evaluation
+
+
+def chunked(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStructuredEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', STRUCTURED_EVALUATION=True,
+                               EVALUATION_CACHE_BACKEND='none')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('learner@example.com', first_name='Ana')
+        self.quiz = Quiz('German', user.id, lng='en', target_lng='de', type='QUESTIONS')
+        db.session.add(self.quiz)
+        db.session.flush()
+        self.question = Question(quiz_id=self.quiz.id, question_text='Wie geht es dir?', answer='Gut',
+                                 difficulty_level='medium')
+        self.prep_session = PrepSession(user_id=user.id, quiz_id=self.quiz.id, status='in_progress')
+        db.session.add_all([self.question, self.prep_session])
+        db.session.commit()
+
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = user.id
+            session['_fresh'] = True
+            session['user'] = user.to_dict()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.audio_path = os.path.join(self.tmp_dir.name, 'answer.wav')
+        open(self.audio_path, 'wb').close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @mock.patch('app.quiz_session.routes.evaluate_text_answer')
+    def test_text_answer_scores_are_typed_fields(self, mock_evaluate):
+        mock_evaluate.return_value = json.dumps({'completeness': 4, 'feedback': 'Fast richtig ####', 'correctness': 7})
+
+        response = self.client.post('/quiz-session/evaluate_text', data={
+            'text': 'Gut, danke', 'question_id': self.question.id, 'session_id': self.prep_session.id})
+
+        self.assertEqual(response.get_data(as_text=True), 'Fast richtig ####\n####\nCorrectness:7\nCompleteness:4')
+        self.assertTrue(mock_evaluate.call_args.kwargs['structured'])
+        answer = Answer.query.one()
+        self.assertEqual((answer.feedback, answer.correctness, answer.completeness), ('Fast richtig ####', 7.0, 4.0))
+
+    @mock.patch('app.quiz_session.routes.empty_answer_feedback', return_value=None)
+    @mock.patch('app.quiz_session.routes.evaluate_audio_answer')
+    def test_audio_answer_streams_feedback_and_stores_missing_score_as_null(self, mock_evaluate, _):
+        mock_evaluate.return_value = iter(chunked('{"correctness": 6, "feedback": "Gut \\"gemacht\\"!"}'))
+
+        output = ''.join(generate_audio_evaluation(self.question, self.audio_path, self.prep_session.user_id,
+                                                   self.prep_session.id))
+
+        self.assertEqual(output, 'Gut "gemacht"!')
+        answer = Answer.query.one()
+        self.assertEqual((answer.feedback, answer.correctness, answer.completeness), ('Gut "gemacht"!', 6.0, None))
+
+    @mock.patch('app.language_practice.routes.empty_answer_feedback', return_value=None)
+    @mock.patch('app.language_practice.routes.evaluate_language_audio')
+    def test_language_answer_scores_are_typed_fields(self, mock_evaluate, _):
+        mock_evaluate.return_value = iter(chunked(json.dumps(
+            {'grammar': 6, 'content': 8, 'feedback': 'Say <b>und</b>', 'pronunciation': 7})))
+
+        output = ''.join(generate_language_evaluation(self.question, self.audio_path, self.prep_session))
+
+        self.assertEqual(output, 'Say <b>und</b>')
+        answer = Answer.query.one()
+        self.assertEqual((answer.pronunciation_score, answer.grammar_score, answer.content_score), (7.0, 6.0, 8.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
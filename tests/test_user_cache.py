@@ -0,0 +1,71 @@
+import unittest
+
+from flask import session
+
+from app import create_app, db
+from app.auth_helpers import load_user
+from app.models import User
+from app.utils.query_counter import count_queries
+from app.utils.user_cache import get_user_cache
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User.create('learner@example.com', first_name='Ana', picture='a.png')
+        self.user_id = user.id
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_second_load_is_served_from_cache(self):
+        with count_queries() as first:
+            user = load_user(self.user_id)
+        db.session.remove()
+        with count_queries() as second:
+            cached = load_user(self.user_id)
+
+        self.assertEqual(first.count, 1)
+        self.assertEqual(second.count, 0)
+        self.assertEqual(cached.email, user.email)
+        self.assertEqual(get_user_cache().stats()['hits'], 1)
+
+        # The cached identity is attached to the session and can lazy-load relationships
+        self.assertIn(cached, db.session)
+        self.assertEqual(cached.quizzes, [])
+
+    def test_update_invalidates_cached_identity(self):
+        load_user(self.user_id)
+        User.get_or_create('learner@example.com', first_name='Ana Marija')
+        db.session.remove()
+
+        self.assertEqual(load_user(self.user_id).first_name, 'Ana Marija')
+
+    def test_unknown_user_is_not_cached(self):
+        self.assertIsNone(load_user('missing'))
+        self.assertEqual(get_user_cache().stats()['entries'], 0)
+
+    def test_identity_from_session(self):
+        self.app.config['USER_FROM_SESSION'] = True
+        with self.app.test_request_context():
+            session['user'] = {'id': self.user_id, 'email': 'learner@example.com', 'first_name': 'Ana',
+                               'last_name': None, 'picture': 'a.png'}
+            with count_queries() as stats:
+                user = load_user(self.user_id)
+
+        self.assertEqual(stats.count, 0)
+        self.assertEqual(user.id, self.user_id)
+        self.assertEqual(user.first_name, 'Ana')
+
+
+if __name__ == '__main__':
+    unittest.main()